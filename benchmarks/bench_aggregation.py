@@ -0,0 +1,85 @@
+# bench_aggregation.py
+#
+# aggregation.aggregate_scored frente a los groupby con lambdas que usaban
+# generate_report.py y generar_reporte_html_empleado, sobre datasets
+# puntuados sintéticos de distintos tamaños. La referencia solo se mide
+# hasta --max-referencia filas (con millones tarda minutos) y se comprueba
+# que ambos dan los mismos números.
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_aggregation.py [--filas 100000 1000000 10000000] [--max-referencia 1000000]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from aggregation import aggregate_scored  # noqa: E402
+from bench_individual_reports import dataset_puntuado  # noqa: E402
+
+DIAS = 250
+
+
+def referencia(reporte: pd.DataFrame) -> pd.DataFrame:
+    """Los dos groupby anteriores: mensual del reporte general + tardanza media del individual."""
+    mensual = reporte.groupby(['empleado_id', 'nombre_empleado', 'mes', 'anio'], observed=True).agg({
+        'prob_tardanza': 'mean',
+        'prob_presente': 'mean',
+        'prediccion': ['count', lambda x: (x == 1).sum()],
+        'tardanza_min': lambda x: x[reporte.loc[x.index, 'prediccion'] == 1].mean()
+        if (reporte.loc[x.index, 'prediccion'] == 1).any() else 0,
+    }).reset_index()
+    mensual.columns = ['empleado_id', 'nombre_empleado', 'mes', 'anio', 'prob_tardanza_promedio',
+                       'prob_asistencia_promedio', 'total_dias', 'dias_tardanza', 'tardanza_promedio']
+    return mensual
+
+
+def bench_aggregation(filas: list[int], max_referencia: int) -> list[dict]:
+    resultados = []
+    for n in filas:
+        reporte = dataset_puntuado(max(n // DIAS, 1), DIAS)
+        for clave in ('empleado_id', 'nombre_empleado'):
+            reporte[clave] = reporte[clave].astype('category')   # como al leer el parquet
+
+        inicio = time.perf_counter()
+        por_empleado, mensual = aggregate_scored(reporte)
+        segundos = time.perf_counter() - inicio
+        r = {"filas": len(reporte), "grupos": len(mensual), "segundos": segundos,
+             "referencia": None, "iguales": None}
+
+        if len(reporte) <= max_referencia:
+            inicio = time.perf_counter()
+            esperado = referencia(reporte)
+            r["referencia"] = time.perf_counter() - inicio
+            columnas = ['total_dias', 'dias_tardanza', 'prob_tardanza_promedio',
+                        'prob_asistencia_promedio', 'tardanza_promedio']
+            r["iguales"] = all(np.allclose(mensual[c].to_numpy(dtype=float),
+                                           esperado[c].to_numpy(dtype=float), rtol=1e-12, atol=0)
+                               for c in columnas)
+        resultados.append(r)
+        del reporte
+
+    print(f"\n{'Filas':>12s} {'Grupos':>9s} {'Motor (s)':>10s} {'Filas/s':>12s} "
+          f"{'Lambdas (s)':>12s} {'Aceleración':>12s}  Iguales")
+    print("=" * 84)
+    for r in resultados:
+        ref = f"{r['referencia']:12.2f} {r['referencia'] / r['segundos']:11.1f}x" if r["referencia"] else f"{'-':>12s} {'-':>12s}"
+        print(f"{r['filas']:12,d} {r['grupos']:9,d} {r['segundos']:10.2f} "
+              f"{r['filas'] / r['segundos']:12,.0f} {ref}  {r['iguales'] if r['iguales'] is not None else '-'}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Motor de agregación frente a los groupby con lambdas")
+    parser.add_argument("--filas", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--max-referencia", type=int, default=1_000_000,
+                        help="tamaño máximo en el que se mide también la versión con lambdas")
+    args = parser.parse_args()
+    resultados = bench_aggregation(args.filas, args.max_referencia)
+    if any(r["iguales"] is False for r in resultados):
+        raise SystemExit("❌ El motor no coincide con la referencia")
@@ -0,0 +1,77 @@
+# bench_calendar.py
+#
+# Fechas y features de calendario por fila (pd.to_datetime + accesores .dt
+# sobre todas las filas, como hacían clean_data y build_features) frente a
+# la dimensión calendario: interpretar solo las fechas distintas y cruzar
+# por dia_id. Se comprueba que ambas dan los mismos valores.
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_calendar.py [--filas 100000 1000000 5000000] [--dias 730]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from calendar_table import COLUMNAS_CALENDARIO, join_calendar, parse_fechas  # noqa: E402
+
+
+def fechas_sinteticas(n: int, dias: int, semilla: int = 0) -> pd.Series:
+    """Columna 'fecha' como en fichajes.csv (dd/mm/aaaa) con `dias` fechas distintas y ~0,1% vacías."""
+    rng = np.random.default_rng(semilla)
+    calendario = pd.date_range("2024-01-01", periods=dias, freq="D").strftime("%d/%m/%Y").to_numpy(dtype=object)
+    serie = pd.Series(calendario[rng.integers(0, dias, n)])
+    serie[rng.random(n) < 0.001] = np.nan
+    return serie
+
+
+def referencia(serie: pd.Series) -> pd.DataFrame:
+    fecha = pd.to_datetime(serie, errors='coerce', dayfirst=True)
+    return pd.DataFrame({
+        'dia_semana': fecha.dt.dayofweek,
+        'mes': fecha.dt.month,
+        'anio': fecha.dt.year,
+        'dia_mes': fecha.dt.day,
+        'semana_anio': fecha.dt.isocalendar().week,
+    }).fillna(0)
+
+
+def dimension(serie: pd.Series) -> pd.DataFrame:
+    return join_calendar(parse_fechas(serie), ['dia_semana'] + COLUMNAS_CALENDARIO)
+
+
+def bench_calendar(filas: list[int], dias: int) -> list[dict]:
+    resultados = []
+    for n in filas:
+        serie = fechas_sinteticas(n, dias)
+        tiempos = {}
+        for nombre, funcion in (("referencia", referencia), ("dimension", dimension)):
+            inicio = time.perf_counter()
+            salida = funcion(serie)
+            tiempos[nombre] = time.perf_counter() - inicio
+            if nombre == "referencia":
+                esperado = salida
+        iguales = all(np.array_equal(esperado[c].to_numpy(dtype=np.int64), salida[c].to_numpy(dtype=np.int64))
+                      for c in esperado.columns)
+        resultados.append({"filas": n, **tiempos, "iguales": iguales})
+
+    print(f"\n{'Filas':>12s} {'Por fila (s)':>13s} {'Calendario (s)':>15s} {'Aceleración':>12s}  Iguales")
+    print("=" * 66)
+    for r in resultados:
+        print(f"{r['filas']:12,d} {r['referencia']:13.3f} {r['dimension']:15.3f} "
+              f"{r['referencia'] / r['dimension']:11.1f}x  {r['iguales']}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Features de fecha por fila frente a la dimensión calendario")
+    parser.add_argument("--filas", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--dias", type=int, default=730, help="fechas distintas en los datos")
+    args = parser.parse_args()
+    resultados = bench_calendar(args.filas, args.dias)
+    if not all(r["iguales"] for r in resultados):
+        raise SystemExit("❌ La dimensión calendario no coincide con el cálculo por fila")
@@ -0,0 +1,105 @@
+# bench_individual_reports.py
+#
+# Escalado de generate_individual_reports con 1, 2, 4... procesos hasta el
+# número de núcleos, sobre un dataset puntuado sintético de muchos empleados.
+# Comprueba además que todas las ejecuciones producen exactamente los mismos
+# archivos (misma fecha de generación fija).
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_individual_reports.py [--empleados 2000] [--dias 250] [--procesos 1 2 4]
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from generate_individual_reports import generate_individual_reports  # noqa: E402
+from scoring import dias_map, meses_map  # noqa: E402
+from storage import save_table  # noqa: E402
+
+GENERADO = datetime(2024, 1, 1, 8, 0, 0)
+
+
+def dataset_puntuado(n_empleados: int, n_dias: int, semilla: int = 42) -> pd.DataFrame:
+    """Mismas columnas que scoring.score_dataset, con valores aleatorios."""
+    rng = np.random.default_rng(semilla)
+    fechas = pd.bdate_range("2023-01-02", periods=n_dias)
+    n = n_empleados * n_dias
+    fecha = pd.Series(np.tile(fechas.values, n_empleados))
+    prob_presente = rng.uniform(0, 1, n)
+    mes = fecha.dt.month
+    return pd.DataFrame({
+        "empleado_id": np.repeat([f"emp-{i:05d}" for i in range(n_empleados)], n_dias),
+        "nombre_empleado": np.repeat([f"Empleado {i:05d}" for i in range(n_empleados)], n_dias),
+        "fecha": fecha,
+        "fecha_str": fecha.dt.strftime("%d/%m/%Y"),
+        "dia_semana": fecha.dt.dayofweek.map(dias_map),
+        "mes": mes,
+        "mes_nombre": mes.map(meses_map),
+        "anio": fecha.dt.year,
+        "tardanza_min": rng.integers(-10, 60, n).astype(float),
+        "prediccion": (prob_presente < 0.3).astype(int),
+        "prob_presente": prob_presente,
+        "prob_tardanza": 1 - prob_presente,
+    })
+
+
+def huella_directorio(directorio: str) -> str:
+    h = hashlib.sha256()
+    for nombre in sorted(os.listdir(directorio)):
+        h.update(nombre.encode())
+        with open(os.path.join(directorio, nombre), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def bench_individual_reports(n_empleados: int, n_dias: int, procesos: list[int] | None = None) -> list[dict]:
+    n_cpu = os.cpu_count() or 1
+    procesos = procesos or sorted({1, *[2 ** k for k in range(1, n_cpu.bit_length())], n_cpu})
+    print(f"📦 {n_empleados:,} empleados x {n_dias} días = {n_empleados * n_dias:,} filas | CPUs: {n_cpu}")
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "predicciones_detalladas.parquet")
+        save_table(dataset_puntuado(n_empleados, n_dias), ruta)
+
+        for n in procesos:
+            directorio = os.path.join(tmp, f"reportes_{n}")
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_individual_reports(ruta, n_procesos=n, generado=GENERADO, directorio=directorio)
+            segundos = time.perf_counter() - inicio
+            resultados.append({"procesos": n, "segundos": segundos,
+                               "huella": huella_directorio(directorio)})
+
+    base = resultados[0]["segundos"]
+    print(f"\n{'Procesos':>9s} {'Tiempo (s)':>11s} {'Aceleración':>12s} {'Eficiencia':>11s}  Salida idéntica")
+    print("=" * 62)
+    for r in resultados:
+        r["aceleracion"] = base / r["segundos"]
+        r["eficiencia"] = r["aceleracion"] / r["procesos"]
+        r["salida_identica"] = r["huella"] == resultados[0]["huella"]
+        print(f"{r['procesos']:9d} {r['segundos']:11.2f} {r['aceleracion']:11.2f}x "
+              f"{r['eficiencia']:10.0%}  {r['salida_identica']}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escalado de los reportes individuales en paralelo")
+    parser.add_argument("--empleados", type=int, default=2000)
+    parser.add_argument("--dias", type=int, default=250)
+    parser.add_argument("--procesos", type=int, nargs="+", default=None,
+                        help="números de procesos a probar (por defecto 1, 2, 4... hasta los núcleos)")
+    args = parser.parse_args()
+    resultados = bench_individual_reports(args.empleados, args.dias, args.procesos)
+    if not all(r["salida_identica"] for r in resultados):
+        raise SystemExit("❌ La salida cambia según el número de procesos")
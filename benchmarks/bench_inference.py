@@ -0,0 +1,109 @@
+# bench_inference.py
+#
+# Filas por segundo de RandomForestClassifier.predict_proba frente al motor
+# plano de inference.py (compilado con numba y versión NumPy), con 10k, 100k
+# y 1M filas del dataset de features, en su orden (como las puntúa
+# scoring.py) y remuestreadas al azar. Comprueba además que las clases
+# predichas son idénticas a las de sklearn. Por defecto mide el modelo que
+# deja train_model: el resultado depende mucho de su tamaño y profundidad.
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_inference.py [--modelo models/random_forest.pkl] [--filas 10000 100000 1000000]
+
+import argparse
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+
+from inference import NUMBA_DISPONIBLE, FlatForest  # noqa: E402
+from storage import load_table, ruta_datos  # noqa: E402
+
+FILAS = (10_000, 100_000, 1_000_000)
+# La versión NumPy es mucho más lenta; por encima de este tamaño se omite
+MAX_FILAS_NUMPY = 100_000
+
+
+def _cronometrar(funcion, repeticiones: int) -> tuple[float, object]:
+    """Mejor tiempo (s) de varias repeticiones y el resultado de la última."""
+    mejor, resultado = float("inf"), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def bench_inference(ruta_modelo: str, ruta_features: str, filas: list[int]) -> list[dict]:
+    with open(ruta_modelo, "rb") as f:
+        model = pickle.load(f)
+    model.set_params(n_jobs=1)
+    df = load_table(ruta_features)
+    X_base = df[list(model.feature_names_in_)]
+    n_cpu = os.cpu_count() or 1
+
+    motores = {"sklearn (1 hilo)": model}
+    if n_cpu > 1:
+        motores[f"sklearn ({n_cpu} hilos)"] = pickle.loads(pickle.dumps(model)).set_params(n_jobs=-1)
+    if NUMBA_DISPONIBLE:
+        motores["plano compilado (1 hilo)"] = FlatForest.from_model(model, compilado=True, n_hilos=1)
+        if n_cpu > 1:
+            motores[f"plano compilado ({n_cpu} hilos)"] = FlatForest.from_model(model, compilado=True, n_hilos=-1)
+        # Primera llamada: compila (o lee de la caché de numba) fuera del cronómetro
+        motores["plano compilado (1 hilo)"].predict_proba(X_base[:10])
+    motores["plano NumPy (1 hilo)"] = FlatForest.from_model(model, compilado=False, n_hilos=1)
+
+    print(f"🌲 Modelo: {ruta_modelo} ({model.n_estimators} árboles, "
+          f"profundidad máx. {max(e.tree_.max_depth for e in model.estimators_)}, "
+          f"{sum(e.tree_.node_count for e in model.estimators_):,} nodos) | CPUs: {n_cpu}")
+
+    rng = np.random.default_rng(42)
+    resultados = []
+    for n in filas:
+        # En orden las filas contiguas se parecen y sklearn acierta más saltos;
+        # remuestreadas al azar no
+        ordenes = {
+            "en orden": np.arange(n) % len(X_base),
+            "aleatorio": rng.integers(0, len(X_base), size=n),
+        }
+        for orden, indices in ordenes.items():
+            X = X_base.iloc[indices].reset_index(drop=True)
+            repeticiones = 3 if n <= 100_000 else 1
+            referencia = None
+            print(f"\n📦 {n:,} filas ({orden})")
+            for nombre, motor in motores.items():
+                if nombre.startswith("plano NumPy") and n > MAX_FILAS_NUMPY:
+                    continue
+                segundos, proba = _cronometrar(lambda: motor.predict_proba(X), repeticiones)
+                clases = model.classes_.take(np.argmax(proba, axis=1))
+                if referencia is None:
+                    referencia = (clases, proba, segundos)
+                r = {
+                    "filas": n,
+                    "orden": orden,
+                    "motor": nombre,
+                    "segundos": segundos,
+                    "filas_por_segundo": n / segundos,
+                    "frente_a_sklearn": referencia[2] / segundos,
+                    "clases_identicas": bool(np.array_equal(clases, referencia[0])),
+                    "probabilidades_identicas": bool(np.array_equal(proba, referencia[1])),
+                }
+                resultados.append(r)
+                print(f"   {nombre:28s} {r['segundos']:8.3f} s {r['filas_por_segundo']:12,.0f} filas/s "
+                      f"{r['frente_a_sklearn']:5.2f}x | clases idénticas: {r['clases_identicas']} "
+                      f"| proba idénticas: {r['probabilidades_identicas']}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de inferencia: sklearn vs motor plano")
+    parser.add_argument("--modelo", default="models/random_forest.pkl")
+    parser.add_argument("--features", default=ruta_datos("empleados_features"))
+    parser.add_argument("--filas", type=int, nargs="+", default=list(FILAS))
+    args = parser.parse_args()
+    resultados = bench_inference(args.modelo, args.features, args.filas)
+    if not all(r["clases_identicas"] for r in resultados):
+        raise SystemExit("❌ Algún motor no da las mismas clases que sklearn")
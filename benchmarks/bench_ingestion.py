@@ -0,0 +1,73 @@
+# bench_ingestion.py
+#
+# Lectura de fichajes.csv como se hacía antes (pd.read_csv con inferencia
+# de tipos de todas las columnas, cabeceras normalizadas a mano y fecha
+# interpretada con parse_fechas) frente a
+# ingestion.read_fichajes (esquema declarado, usecols, todo como texto y
+# validación con cuarentena) con el motor C de pandas y con el de Arrow.
+# Ambos entregan lo mismo a clean_data: columnas normalizadas y fecha
+# convertida. El CSV se genera con generate_fichajes.py en un directorio
+# temporal. El lector de Arrow es multihilo: gana más cuantos más núcleos.
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_ingestion.py [--filas 100000 1000000] [--empleados 5000]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pandas as pd  # noqa: E402
+
+from calendar_table import parse_fechas  # noqa: E402
+from generate_fichajes import generate_fichajes  # noqa: E402
+from ingestion import MOTORES, PYARROW_DISPONIBLE, read_fichajes  # noqa: E402
+
+
+def referencia(csv: str) -> pd.DataFrame:
+    df = pd.read_csv(csv)
+    df.columns = [c.strip().lower() for c in df.columns]
+    df['fecha'] = parse_fechas(df['fecha'])
+    return df
+
+
+def bench_ingestion(filas: list[int], empleados: int) -> list[dict]:
+    directorio = tempfile.mkdtemp(prefix="bench_ingestion_")
+    motores = [m for m in MOTORES if m != "pyarrow" or PYARROW_DISPONIBLE]
+    resultados = []
+    try:
+        for n in filas:
+            csv = generate_fichajes(n, min(empleados, n), os.path.join(directorio, f"fichajes_{n}.csv"))
+            tiempos = {}
+            inicio = time.perf_counter()
+            referencia(csv)
+            tiempos["referencia"] = time.perf_counter() - inicio
+            for motor in motores:
+                inicio = time.perf_counter()
+                df = read_fichajes(csv, cuarentena=os.path.join(directorio, "cuarentena.csv"),
+                                   motor=motor, verbose=False)
+                tiempos[motor] = time.perf_counter() - inicio
+            resultados.append({"filas": n, **tiempos, "cuarentena": df.attrs["validacion"]["cuarentena"]})
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    print(f"\n{'Filas':>12s} {'read_csv (s)':>13s} " + " ".join(f"{'esquema ' + m + ' (s)':>20s}" for m in motores)
+          + f" {'Aceleración':>12s} {'Cuarentena':>11s}")
+    print("=" * (40 + 21 * len(motores) + 12))
+    for r in resultados:
+        mejor = min(r[m] for m in motores)
+        print(f"{r['filas']:12,d} {r['referencia']:13.3f} " + " ".join(f"{r[m]:20.3f}" for m in motores)
+              + f" {r['referencia'] / mejor:11.1f}x {r['cuarentena']:11,d}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pd.read_csv con inferencia frente a la ingesta con esquema")
+    parser.add_argument("--filas", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--empleados", type=int, default=5_000)
+    args = parser.parse_args()
+    bench_ingestion(args.filas, args.empleados)
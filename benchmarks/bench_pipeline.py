@@ -0,0 +1,188 @@
+# bench_pipeline.py
+#
+# Benchmark de punta a punta: genera un fichajes.csv sintético
+# (generate_fichajes.py) en un directorio de trabajo temporal y ejecuta las
+# etapas en el orden de siempre (preprocess, features, train_model, predict,
+# generate_report, generate_individual_reports), cada una en su propio
+# proceso, como se lanzan a mano. De cada etapa se guarda el tiempo real, el
+# tiempo de CPU y el pico de memoria (RSS máximo de su proceso, con
+# os.wait4), y todo va a un JSON para comparar ejecuciones y detectar
+# regresiones. Pensado para Linux (ru_maxrss en KB).
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_pipeline.py [--escalas pequena mediana] [--filas N --empleados M]
+#                                       [--etapas preprocess features ...] [--salida resultados.json]
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from generate_fichajes import generate_fichajes  # noqa: E402
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# (filas, empleados)
+ESCALAS = {
+    "pequena": (10_000, 100),
+    "mediana": (1_000_000, 5_000),
+    "grande": (10_000_000, 50_000),
+}
+
+# Etapas en orden: nombre -> script de src/
+ETAPAS = {
+    "preprocess": "preprocess.py",
+    "features": "features.py",
+    "train_model": "train_model.py",
+    "predict": "predict.py",
+    "generate_report": "generate_report.py",
+    "generate_individual_reports": "generate_individual_reports.py",
+}
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+
+
+def ejecutar_etapa(argumentos: list[str], directorio: str, registro: str,
+                   limite_segundos: float | None = None) -> dict:
+    """
+    Lanza `python src/<script> ...` con `directorio` como directorio de
+    trabajo (los scripts usan rutas relativas: data/, models/, reports/) y
+    mide ese proceso, no el del benchmark. La salida de la etapa queda en
+    `registro`; si supera `limite_segundos` se mata.
+    """
+    with open(registro, "w", encoding="utf-8") as salida:
+        inicio = time.perf_counter()
+        proceso = subprocess.Popen([sys.executable, os.path.join(SRC, argumentos[0]), *argumentos[1:]],
+                                   cwd=directorio, stdout=salida, stderr=subprocess.STDOUT)
+        agotado = False
+        while True:
+            pid, estado, uso = os.wait4(proceso.pid, os.WNOHANG if limite_segundos else 0)
+            if pid:
+                break
+            if time.perf_counter() - inicio > limite_segundos:
+                proceso.kill()
+                agotado = True
+            time.sleep(0.05)
+        segundos = time.perf_counter() - inicio
+    proceso.returncode = os.waitstatus_to_exitcode(estado)
+    return {
+        "segundos": round(segundos, 3),
+        "cpu_segundos": round(uso.ru_utime + uso.ru_stime, 3),
+        "pico_rss_mb": round(uso.ru_maxrss / 1024, 1),
+        "codigo_salida": proceso.returncode,
+        "tiempo_agotado": agotado,
+    }
+
+
+def bench_pipeline(filas: int, empleados: int, etapas: list[str], args_entrenamiento: list[str],
+                   limite_segundos: float | None = None, conservar: str | None = None,
+                   semilla: int = 42) -> dict:
+    """Genera los datos y ejecuta `etapas` en un directorio temporal (o en `conservar`)."""
+    directorio = conservar or tempfile.mkdtemp(prefix="bench_pipeline_")
+    registros = os.path.join(directorio, "registros")
+    os.makedirs(registros, exist_ok=True)
+    try:
+        inicio = time.perf_counter()
+        csv = generate_fichajes(filas, empleados, os.path.join(directorio, "data", "raw", "fichajes.csv"),
+                                semilla=semilla)
+        resultado = {
+            "filas": filas, "empleados": empleados,
+            "csv_mb": round(os.path.getsize(csv) / 1e6, 1),
+            "generacion_segundos": round(time.perf_counter() - inicio, 3),
+            "etapas": {},
+        }
+        print(f"\n📦 {filas:,} filas, {empleados:,} empleados ({resultado['csv_mb']} MB)")
+
+        for etapa in etapas:
+            argumentos = [ETAPAS[etapa]] + (args_entrenamiento if etapa == "train_model" else [])
+            medida = ejecutar_etapa(argumentos, directorio, os.path.join(registros, f"{etapa}.log"),
+                                    limite_segundos)
+            medida["filas_por_segundo"] = round(filas / medida["segundos"]) if medida["segundos"] else None
+            resultado["etapas"][etapa] = medida
+            estado = "✅" if medida["codigo_salida"] == 0 else "❌"
+            print(f"   {estado} {etapa:<30s} {medida['segundos']:9.2f} s  CPU {medida['cpu_segundos']:9.2f} s  "
+                  f"pico {medida['pico_rss_mb']:8.1f} MB")
+            if medida["codigo_salida"] != 0:
+                motivo = "tiempo agotado" if medida["tiempo_agotado"] else f"código {medida['codigo_salida']}"
+                with open(os.path.join(registros, f"{etapa}.log"), encoding="utf-8", errors="replace") as f:
+                    final = f.readlines()[-5:]
+                print(f"      {motivo}; se omiten las etapas siguientes. Final del registro:")
+                print("".join(f"      | {linea}" for linea in final), end="")
+                break
+
+        resultado["total_segundos"] = round(sum(m["segundos"] for m in resultado["etapas"].values()), 3)
+        resultado["completo"] = (len(resultado["etapas"]) == len(etapas)
+                                 and all(m["codigo_salida"] == 0 for m in resultado["etapas"].values()))
+        return resultado
+    finally:
+        if conservar is None:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+def entorno() -> dict:
+    """Máquina y versiones, para no comparar ejecuciones de equipos distintos sin saberlo."""
+    import numpy
+    import pandas
+    import sklearn
+    return {
+        "maquina": platform.node(),
+        "sistema": platform.platform(),
+        "cpu": platform.processor() or platform.machine(),
+        "nucleos": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta del pipeline con datos sintéticos")
+    parser.add_argument("--escalas", nargs="+", choices=list(ESCALAS), default=["pequena"])
+    parser.add_argument("--filas", type=int, default=None, help="escala a medida (junto con --empleados)")
+    parser.add_argument("--empleados", type=int, default=None)
+    parser.add_argument("--etapas", nargs="+", choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument("--max-fits", type=int, default=None, help="se pasa a train_model.py")
+    parser.add_argument("--max-seconds", type=float, default=None, help="se pasa a train_model.py")
+    parser.add_argument("--limite", type=float, default=None, help="segundos máximos por etapa")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--conservar", default=None,
+                        help="directorio de trabajo a conservar (datos, modelos, reportes y registros)")
+    parser.add_argument("--salida", default=None,
+                        help=f"JSON de resultados (por defecto {DIRECTORIO_RESULTADOS}/pipeline_<fecha>.json)")
+    args = parser.parse_args()
+
+    if (args.filas is None) != (args.empleados is None):
+        parser.error("--filas y --empleados van juntos")
+    escalas = [(args.filas, args.empleados)] if args.filas else [ESCALAS[e] for e in args.escalas]
+    args_entrenamiento = ((["--max-fits", str(args.max_fits)] if args.max_fits is not None else [])
+                          + (["--max-seconds", str(args.max_seconds)] if args.max_seconds is not None else []))
+
+    ejecucion = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "entorno": entorno(),
+        "parametros": {"etapas": args.etapas, "args_entrenamiento": args_entrenamiento,
+                       "limite_segundos": args.limite, "semilla": args.semilla},
+        "resultados": [],
+    }
+    for filas, empleados in escalas:
+        conservar = (os.path.join(args.conservar, f"{filas}_{empleados}") if args.conservar and len(escalas) > 1
+                     else args.conservar)
+        ejecucion["resultados"].append(bench_pipeline(filas, empleados, args.etapas, args_entrenamiento,
+                                                      args.limite, conservar, args.semilla))
+
+    salida = args.salida or os.path.join(DIRECTORIO_RESULTADOS,
+                                         f"pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(ejecucion, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados en {salida}")
+    if not all(r["completo"] for r in ejecucion["resultados"]):
+        raise SystemExit("❌ Alguna etapa falló")
@@ -0,0 +1,82 @@
+# bench_search.py
+#
+# Compara la búsqueda exhaustiva (GridSearchCV) con successive halving
+# sobre el dataset de features: ajustes, tiempo y f1_weighted.
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_search.py [--muestra 20000] [--rejilla completa|reducida] [--max-fits 600]
+#
+# Con la rejilla completa y todas las filas la búsqueda exhaustiva tarda horas;
+# --muestra y --rejilla reducida permiten una comparación rápida.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+from sklearn.metrics import f1_score  # noqa: E402
+from sklearn.model_selection import GridSearchCV, ParameterGrid, train_test_split  # noqa: E402
+
+from encoding import matriz_features  # noqa: E402
+from search import SuccessiveHalvingSearch  # noqa: E402
+from storage import load_table, ruta_datos  # noqa: E402
+from train_model import MAX_AJUSTES_HALVING, PARAM_GRID  # noqa: E402
+
+REJILLA_REDUCIDA = {
+    "n_estimators": [50, 100],
+    "max_depth": [15, None],
+    "min_samples_split": [2, 10],
+    "min_samples_leaf": [1, 4],
+    "criterion": ["gini", "entropy"],
+    "max_features": ["sqrt", None],
+}
+
+
+def _evaluar(nombre, busqueda, X_train, y_train, X_test, y_test) -> dict:
+    inicio = time.perf_counter()
+    busqueda.fit(X_train, y_train)
+    segundos = time.perf_counter() - inicio
+    ajustes = getattr(busqueda, "n_fits_", None)
+    if ajustes is None:
+        ajustes = len(busqueda.cv_results_["params"]) * busqueda.n_splits_
+    f1_test = f1_score(y_test, busqueda.best_estimator_.predict(X_test), average="weighted")
+    return {"busqueda": nombre, "ajustes": ajustes, "segundos": segundos,
+            "f1_cv": busqueda.best_score_, "f1_test": f1_test}
+
+
+def bench_search(muestra: int, rejilla: dict, max_fits: int) -> list[dict]:
+    df = load_table(ruta_datos("empleados_features"))
+    if muestra and muestra < len(df):
+        df, _ = train_test_split(df, train_size=muestra, stratify=df["ausencia"], random_state=42)
+    X, y = matriz_features(df), df["ausencia"]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    n_combinaciones = len(ParameterGrid(rejilla))
+    print(f"📦 {len(X_train):,} filas de entrenamiento | {n_combinaciones} combinaciones x 5 folds")
+
+    base = RandomForestClassifier(random_state=42, class_weight="balanced")
+    resultados = [
+        _evaluar("halving", SuccessiveHalvingSearch(base, rejilla, max_fits=max_fits, cv=5, verbose=False),
+                 X_train, y_train, X_test, y_test),
+        _evaluar("exhaustiva", GridSearchCV(base, rejilla, cv=5, scoring="f1_weighted", n_jobs=-1),
+                 X_train, y_train, X_test, y_test),
+    ]
+
+    print(f"\n{'Búsqueda':12s} {'Ajustes':>8s} {'Tiempo (s)':>11s} {'F1 CV':>8s} {'F1 test':>8s}")
+    print("=" * 52)
+    for r in resultados:
+        print(f"{r['busqueda']:12s} {r['ajustes']:8d} {r['segundos']:11.1f} {r['f1_cv']:8.4f} {r['f1_test']:8.4f}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--muestra", type=int, default=20_000)
+    parser.add_argument("--rejilla", choices=["completa", "reducida"], default="reducida")
+    parser.add_argument("--max-fits", type=int, default=MAX_AJUSTES_HALVING)
+    args = parser.parse_args()
+
+    rejilla = PARAM_GRID if args.rejilla == "completa" else REJILLA_REDUCIDA
+    bench_search(args.muestra, rejilla, args.max_fits)
@@ -0,0 +1,146 @@
+# bench_shared_memory.py
+#
+# Búsqueda de hiperparámetros con X_train copiado a cada worker (modo actual)
+# frente a X_train compartido como memmap compacto (--memoria-compartida).
+# Mide el pico de memoria (PSS sumado del proceso y sus workers) y ajustes/s.
+# Uso (desde la raíz del repo, Linux):
+#   python benchmarks/bench_shared_memory.py [--repeticiones 4] [--n-jobs -1]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+REJILLA = {
+    "n_estimators": [50],
+    "max_depth": [15, None],
+    "min_samples_leaf": [1, 4],
+    "max_features": ["sqrt", None],
+}
+
+
+def _memoria_proceso_kb(pid: int) -> int:
+    """PSS del proceso (reparte las páginas compartidas entre quienes las usan); RSS si no hay PSS."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for linea in f:
+                if linea.startswith("Pss:"):
+                    return int(linea.split()[1])
+    except OSError:
+        pass
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _descendientes(pid: int) -> list[int]:
+    hijos = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        hijos.setdefault(ppid, []).append(int(entrada))
+    pendientes, resultado = [pid], []
+    while pendientes:
+        actual = pendientes.pop()
+        resultado.append(actual)
+        pendientes.extend(hijos.get(actual, []))
+    return resultado
+
+
+class MuestreadorMemoria(threading.Thread):
+    """Muestrea cada `intervalo` s la memoria total del proceso y sus descendientes."""
+
+    def __init__(self, intervalo: float = 0.2):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico_kb = 0
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.is_set():
+            total = sum(_memoria_proceso_kb(p) for p in _descendientes(os.getpid()))
+            self.pico_kb = max(self.pico_kb, total)
+            self._parar.wait(self.intervalo)
+
+    def stop(self):
+        self._parar.set()
+        self.join()
+
+
+def _ejecutar_modo(memoria_compartida: bool, repeticiones: int, n_jobs: int) -> dict:
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import GridSearchCV, ParameterGrid
+
+    from encoding import matriz_features
+    from shared_dataset import SharedDataset
+    from storage import load_table, ruta_datos
+
+    df = load_table(ruta_datos("empleados_features"))
+    df = pd.concat([df] * repeticiones, ignore_index=True)
+    X, y = matriz_features(df), df["ausencia"]
+    del df
+
+    grid = GridSearchCV(RandomForestClassifier(random_state=42, class_weight="balanced"),
+                        REJILLA, cv=5, scoring="f1_weighted", n_jobs=n_jobs, refit=False)
+    ajustes = len(ParameterGrid(REJILLA)) * 5
+
+    muestreador = MuestreadorMemoria()
+    muestreador.start()
+    inicio = time.perf_counter()
+    if memoria_compartida:
+        with SharedDataset(X, y) as datos:
+            grid.fit(datos.X, datos.y)
+    else:
+        grid.fit(X, y)
+    segundos = time.perf_counter() - inicio
+    muestreador.stop()
+
+    return {"modo": "memmap" if memoria_compartida else "copia", "filas": len(X),
+            "ajustes": ajustes, "segundos": segundos, "ajustes_por_segundo": ajustes / segundos,
+            "pico_memoria_mb": muestreador.pico_kb / 1024, "f1": float(grid.best_score_)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticiones", type=int, default=4,
+                        help="veces que se replica el dataset para simular más filas")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--modo", choices=["copia", "memmap"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        resultado = _ejecutar_modo(args.modo == "memmap", args.repeticiones, args.n_jobs)
+        print(json.dumps(resultado))
+        sys.exit(0)
+
+    # Cada modo en un proceso nuevo para que los workers de joblib no se reutilicen entre modos
+    resultados = []
+    for modo in ("copia", "memmap"):
+        salida = subprocess.run(
+            [sys.executable, __file__, "--modo", modo, "--repeticiones", str(args.repeticiones),
+             "--n-jobs", str(args.n_jobs)],
+            capture_output=True, text=True, check=True,
+        )
+        resultados.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+
+    print(f"{'Modo':8s} {'Filas':>10s} {'Ajustes':>8s} {'Tiempo (s)':>11s} {'Ajustes/s':>10s} {'Pico MB':>9s} {'F1':>8s}")
+    print("=" * 70)
+    for r in resultados:
+        print(f"{r['modo']:8s} {r['filas']:10,d} {r['ajustes']:8d} {r['segundos']:11.1f} "
+              f"{r['ajustes_por_segundo']:10.2f} {r['pico_memoria_mb']:9.1f} {r['f1']:8.4f}")
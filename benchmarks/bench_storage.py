@@ -0,0 +1,61 @@
+# bench_storage.py
+#
+# Compara guardar/cargar el dataset de features en CSV, Parquet y Feather.
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_storage.py [ruta_features]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from storage import compact_dtypes, load_table, save_table  # noqa: E402
+
+REPETICIONES = 5
+COLUMNAS_PROYECCION = ["dia_semana", "tardanza_min", "ausencia"]
+
+
+def _cronometrar(funcion, repeticiones: int = REPETICIONES) -> float:
+    """Mejor tiempo (s) de varias repeticiones."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def bench_storage(ruta_features: str) -> list[dict]:
+    df = load_table(ruta_features)
+    print(f"📦 Dataset: {ruta_features} ({len(df):,} filas, {len(df.columns)} columnas)")
+    print(f"   Memoria original:    {df.memory_usage(deep=True).sum() / 1e6:.2f} MB")
+    print(f"   Memoria compactada:  {compact_dtypes(df).memory_usage(deep=True).sum() / 1e6:.2f} MB")
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for extension in (".csv", ".parquet", ".feather"):
+            ruta = os.path.join(tmp, "features" + extension)
+            guardar = _cronometrar(lambda: save_table(df, ruta))
+            cargar = _cronometrar(lambda: load_table(ruta))
+            proyeccion = _cronometrar(lambda: load_table(ruta, columns=COLUMNAS_PROYECCION))
+            resultados.append({
+                "formato": extension[1:],
+                "tamano_mb": os.path.getsize(ruta) / 1e6,
+                "guardar_s": guardar,
+                "cargar_s": cargar,
+                "cargar_3_columnas_s": proyeccion,
+            })
+
+    print(f"\n{'Formato':10s} {'Tamaño (MB)':>12s} {'Guardar (s)':>12s} {'Cargar (s)':>12s} {'3 cols (s)':>12s}")
+    print("=" * 62)
+    for r in resultados:
+        print(f"{r['formato']:10s} {r['tamano_mb']:12.2f} {r['guardar_s']:12.4f} "
+              f"{r['cargar_s']:12.4f} {r['cargar_3_columnas_s']:12.4f}")
+    return resultados
+
+
+if __name__ == "__main__":
+    ruta = sys.argv[1] if len(sys.argv) > 1 else "data/processed/empleados_features.csv"
+    bench_storage(ruta)
@@ -0,0 +1,141 @@
+# generate_fichajes.py
+#
+# Genera un fichajes.csv sintético con el mismo esquema que el real
+# (Empleado_ID en UUID, Nombre_Empleado, Fecha dd/mm/aaaa, horas de entrada y
+# salida teóricas y reales HH:MM, Ausencia en texto) a la escala pedida.
+# Cada empleado tiene su horario y su propensión a llegar tarde o faltar;
+# las filas salen en orden de fecha, como una exportación del sistema de
+# fichajes, y una pequeña fracción trae valores sucios (horas ilegibles,
+# fechas vacías) para que la limpieza recorra también sus rutas lentas.
+# Se escribe por bloques: 10M de filas no necesitan 10M de filas en memoria.
+# Uso (desde la raíz del repo):
+#   python benchmarks/generate_fichajes.py --filas 1000000 --empleados 5000 [--salida data/raw/fichajes.csv]
+
+import argparse
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS = ["Empleado_ID", "Nombre_Empleado", "Fecha", "Hora_Entrada_Teorica", "Hora_Entrada_Real",
+            "Hora_Salida_Teorica", "Hora_Salida_Real", "Ausencia"]
+
+HORARIOS = [("07:00", "16:00"), ("08:00", "17:00"), ("08:30", "17:30"), ("09:00", "18:00")]
+NOMBRES = ["ANA", "LUIS", "MARIA", "JOSE", "CARMEN", "JUAN", "ROSA", "CARLOS", "ELENA", "JORGE",
+           "LUCIA", "PEDRO", "SOFIA", "MIGUEL", "PAULA", "DIEGO"]
+APELLIDOS = ["GARCIA", "QUISPE", "FLORES", "RODRIGUEZ", "SANCHEZ", "RAMIREZ", "TORRES", "MENDOZA",
+             "CASTILLO", "VARGAS", "ROJAS", "CHAVEZ", "HUAMAN", "DIAZ", "RIOS", "CRUZ"]
+
+TAMANO_BLOQUE = 1_000_000
+FRACCION_SUCIA = 0.001
+
+# "HH:MM" de cada minuto del día (se indexa en lugar de formatear fila a fila)
+_HORAS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)], dtype=object)
+
+
+def _minutos(hora: str) -> int:
+    return int(hora[:2]) * 60 + int(hora[3:])
+
+
+def _empleados(n: int, rng: np.random.Generator) -> dict[str, np.ndarray]:
+    ids = np.array([str(uuid.UUID(bytes=rng.bytes(16), version=4)).upper() for _ in range(n)], dtype=object)
+    nombres = np.array([f"{NOMBRES[i % len(NOMBRES)]} {APELLIDOS[(i // len(NOMBRES)) % len(APELLIDOS)]} "
+                        f"{APELLIDOS[(i * 7 + 3) % len(APELLIDOS)]} {i:05d}" for i in range(n)], dtype=object)
+    horario = rng.integers(0, len(HORARIOS), n)
+    return {
+        "id": ids,
+        "nombre": nombres,
+        "entrada": np.array([_minutos(HORARIOS[h][0]) for h in horario]),
+        "salida": np.array([_minutos(HORARIOS[h][1]) for h in horario]),
+        # Propensión individual: unos casi siempre puntuales, otros a menudo tarde
+        "p_tarde": rng.beta(2, 8, n),
+        "p_ausente": rng.beta(1, 25, n),
+    }
+
+
+def _bloque(n: int, fechas: np.ndarray, empleados: dict, rng: np.random.Generator,
+            fraccion_sucia: float) -> pd.DataFrame:
+    e = rng.integers(0, len(empleados["id"]), n)
+    d = np.sort(rng.integers(0, len(fechas), n))
+
+    u = rng.random(n)
+    ausente = u < empleados["p_ausente"][e]
+    tarde = ~ausente & (u < empleados["p_ausente"][e] + empleados["p_tarde"][e])
+    retraso = np.where(tarde, rng.gamma(2.0, 9.0, n).astype(int) + 1, -rng.integers(0, 15, n))
+    entrada_teorica = empleados["entrada"][e]
+    salida_teorica = empleados["salida"][e]
+    entrada_real = np.clip(entrada_teorica + retraso, 0, 24 * 60 - 1)
+    salida_real = np.clip(salida_teorica + rng.integers(-20, 40, n), 0, 24 * 60 - 1)
+
+    # Texto de Ausencia como en la exportación: vacío casi siempre para los presentes
+    ausencia = np.where(ausente, "Ausente", np.where(tarde, "Tardanza", ""))
+    ausencia = np.where((ausencia == "") & (rng.random(n) < 0.15), "Presente", ausencia).astype(object)
+
+    bloque = pd.DataFrame({
+        "Empleado_ID": empleados["id"][e],
+        "Nombre_Empleado": empleados["nombre"][e],
+        "Fecha": fechas[d],
+        "Hora_Entrada_Teorica": _HORAS[entrada_teorica],
+        "Hora_Entrada_Real": np.where(ausente, None, _HORAS[entrada_real]),
+        "Hora_Salida_Teorica": _HORAS[salida_teorica],
+        "Hora_Salida_Real": np.where(ausente, None, _HORAS[salida_real]),
+        "Ausencia": ausencia,
+    })
+
+    # Valores sucios: horas con segundos o AM/PM, ilegibles y fechas vacías
+    if fraccion_sucia > 0:
+        sucias = np.flatnonzero(rng.random(n) < fraccion_sucia)
+        tipo = rng.integers(0, 4, len(sucias))
+        col = bloque.columns.get_loc("Hora_Entrada_Real")
+        bloque.iloc[sucias[tipo == 0], col] = "8:05:30"
+        bloque.iloc[sucias[tipo == 1], col] = "08:10 AM"
+        bloque.iloc[sucias[tipo == 2], col] = "sin marca"
+        bloque.iloc[sucias[tipo == 3], bloque.columns.get_loc("Fecha")] = None
+    return bloque
+
+
+def generate_fichajes(filas: int, empleados: int, salida: str = "data/raw/fichajes.csv",
+                      dias: int | None = None, desde: str = "2024-01-01", semilla: int = 42,
+                      fraccion_sucia: float = FRACCION_SUCIA, tamano_bloque: int = TAMANO_BLOQUE) -> str:
+    """
+    Escribe `filas` fichajes de `empleados` empleados en `salida`. Por
+    defecto los días laborables cubiertos son los necesarios para ~1
+    fichaje por empleado y día (mínimo 20). Con la misma semilla el
+    archivo es siempre idéntico.
+    """
+    rng = np.random.default_rng(semilla)
+    dias = dias or max(20, -(-filas // empleados))
+    fechas = pd.bdate_range(desde, periods=dias).strftime("%d/%m/%Y").to_numpy(dtype=object)
+    plantilla = _empleados(empleados, rng)
+
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    escritas = 0
+    with open(salida, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(COLUMNAS) + "\n")
+        while escritas < filas:
+            n = min(tamano_bloque, filas - escritas)
+            # Cada bloque cubre su tramo de fechas, así el archivo completo sigue en orden de fecha
+            tramo = fechas[escritas * dias // filas:max((escritas + n) * dias // filas, escritas * dias // filas + 1)]
+            _bloque(n, tramo, plantilla, rng, fraccion_sucia).to_csv(f, header=False, index=False)
+            escritas += n
+    return salida
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un fichajes.csv sintético con el esquema real")
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--empleados", type=int, default=1_000)
+    parser.add_argument("--dias", type=int, default=None, help="días laborables cubiertos")
+    parser.add_argument("--desde", default="2024-01-01")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sucias", type=float, default=FRACCION_SUCIA, help="fracción de filas con valores sucios")
+    parser.add_argument("--salida", default="data/raw/fichajes.csv")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    ruta = generate_fichajes(args.filas, args.empleados, args.salida, dias=args.dias, desde=args.desde,
+                             semilla=args.semilla, fraccion_sucia=args.sucias)
+    print(f"✅ {args.filas:,} fichajes de {args.empleados:,} empleados en {ruta} "
+          f"({os.path.getsize(ruta) / 1e6:.1f} MB, {time.perf_counter() - inicio:.1f} s)")
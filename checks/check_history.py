@@ -0,0 +1,150 @@
+# check_history.py
+#
+# Las features de historial por empleado (history.py) calculadas de forma
+# incremental tienen que ser idénticas al cálculo completo:
+#   - HistoryState en lotes cronológicos, guardado y recargado entre lotes
+#     (history.verificar_incremental);
+#   - build_features como lo ejecuta el pipeline: cada ejecución lee todos
+#     los fichajes hasta ese día, continúa con load_history el estado y las
+#     features de la anterior y solo pasa por el estado los fichajes nuevos;
+#   - un fichaje nuevo con un día ya procesado obliga a recalcular desde
+#     cero y el resultado sigue siendo el completo;
+#   - HistoryState.features_dia (el servicio) da lo mismo que update() para
+#     el día siguiente al último fichaje de cada empleado.
+# Todo sobre un fichajes.csv sintético (generate_fichajes.py) en un
+# directorio temporal. Termina con código 1 si algo no coincide.
+# Uso (desde la raíz del repo):
+#   python checks/check_history.py [--filas 20000] [--empleados 100] [--ejecuciones 4]
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import features  # noqa: E402
+from encoding import EmployeeVocabulary  # noqa: E402
+from generate_fichajes import generate_fichajes  # noqa: E402
+from history import COLUMNAS_HISTORIAL, HistoryState, verificar_incremental  # noqa: E402
+from ingestion import read_fichajes  # noqa: E402
+from preprocess import clean_data  # noqa: E402
+from storage import save_table  # noqa: E402
+
+
+class _Contador:
+    """Envuelve features.history_features para contar cuántos fichajes pasan por el estado."""
+
+    def __init__(self):
+        self.filas = 0
+        self.ultima = 0
+        self.original = features.history_features
+
+    def __call__(self, df, estado=None):
+        self.filas += len(df)
+        self.ultima = len(df)
+        return self.original(df, estado)
+
+
+def _ejecucion(limpio: pd.DataFrame, tmp: str, vocabulario: EmployeeVocabulary) -> pd.DataFrame:
+    """Una ejecución de la etapa features del pipeline sobre `limpio`, continuando la anterior."""
+    ruta_estado, ruta_features = os.path.join(tmp, "historial.npz"), os.path.join(tmp, "features.parquet")
+    estado, anteriores = features.load_history(ruta_estado, ruta_features)
+    df = features.build_features(limpio.copy(), verbose=False, historial=estado, vocabulario=vocabulario,
+                                 anteriores=anteriores)
+    estado.save(ruta_estado)
+    save_table(df, ruta_features)
+    return df
+
+
+def check_history(filas: int, empleados: int, ejecuciones: int) -> list[str]:
+    fallos = []
+
+    def comprobar(nombre: str, condicion: bool, detalle=""):
+        print(f"   {'✅' if condicion else '❌'} {nombre}")
+        if not condicion:
+            fallos.append(f"{nombre} {detalle}".strip())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fichajes = generate_fichajes(filas, empleados, os.path.join(tmp, "fichajes.csv"))
+        limpio = clean_data(read_fichajes(fichajes, verbose=False), verbose=False)
+        completo = features.build_features(limpio.copy(), verbose=False, historial=True,
+                                           vocabulario=EmployeeVocabulary())[COLUMNAS_HISTORIAL]
+
+        comprobar(f"HistoryState en {ejecuciones} lotes igual al cálculo completo",
+                  verificar_incremental(limpio, ejecuciones))
+
+        # Cortes en días completos: un día a medias obligaría (con razón) a recalcular
+        dias = np.sort(limpio["fecha"].dropna().unique())
+        cortes = dias[np.linspace(0, len(dias) - 1, ejecuciones + 1).astype(int)[1:]]
+        cortes[-1] = limpio["fecha"].max()
+        contador, vocabulario = _Contador(), EmployeeVocabulary()
+        features.history_features = contador
+        try:
+            procesadas = []
+            for corte in cortes:
+                antes = contador.filas
+                df = _ejecucion(limpio[limpio["fecha"] <= corte], tmp, vocabulario)
+                procesadas.append(contador.filas - antes)
+            hasta = [int((limpio["fecha"] <= c).sum()) for c in cortes]
+            nuevas = [hasta[0]] + list(np.diff(hasta))
+            comprobar(f"{ejecuciones} ejecuciones de build_features: solo pasan por el estado los fichajes nuevos",
+                      procesadas == nuevas, (procesadas, nuevas))
+            comprobar("historial incremental de build_features igual al cálculo completo",
+                      df[COLUMNAS_HISTORIAL].equals(completo), _diferencias(df, completo))
+
+            # Un fichaje nuevo en un día ya procesado: se recalcula todo
+            atrasado = limpio.iloc[[0]].copy()
+            atrasado["fila_id"] = limpio["fila_id"].max() + 1
+            con_atrasado = pd.concat([limpio, atrasado], ignore_index=True)
+            df = _ejecucion(con_atrasado, tmp, vocabulario)
+            recalculado = contador.ultima == len(con_atrasado)
+            completo_atrasado = features.build_features(con_atrasado.copy(), verbose=False, historial=True,
+                                                        vocabulario=EmployeeVocabulary())[COLUMNAS_HISTORIAL]
+            comprobar("un fichaje atrasado recalcula desde cero con el resultado completo",
+                      recalculado and df[COLUMNAS_HISTORIAL].equals(completo_atrasado),
+                      _diferencias(df, completo_atrasado))
+        finally:
+            features.history_features = contador.original
+
+        # features_dia frente a update() con el siguiente fichaje de cada empleado
+        estado = HistoryState()
+        features.history_features(limpio, estado)
+        siguiente = limpio.groupby("empleado_id", as_index=False).tail(1).copy()
+        siguiente["fecha"] = siguiente["fecha"] + timedelta(days=1)
+        consultas = pd.DataFrame([estado.features_dia(e, f.date())
+                                  for e, f in zip(siguiente["empleado_id"], siguiente["fecha"])],
+                                 index=siguiente.index)[COLUMNAS_HISTORIAL]
+        actualizadas = features.history_features(siguiente, estado)[COLUMNAS_HISTORIAL]
+        comprobar(f"features_dia igual a update() para {len(siguiente)} empleados",
+                  np.allclose(consultas.to_numpy(float), actualizadas.to_numpy(float), rtol=0, atol=1e-12),
+                  _diferencias(consultas, actualizadas))
+    return fallos
+
+
+def _diferencias(df: pd.DataFrame, esperado: pd.DataFrame) -> str:
+    """Columnas de historial que no coinciden (para el mensaje de error)."""
+    if len(df) != len(esperado):
+        return f"({len(df)} filas frente a {len(esperado)})"
+    distintas = [c for c in COLUMNAS_HISTORIAL
+                 if not np.allclose(df[c].to_numpy(float), esperado[c].to_numpy(float), rtol=0, atol=1e-12)]
+    return f"(columnas distintas: {', '.join(distintas)})" if distintas else ""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Historial incremental frente al cálculo completo")
+    parser.add_argument("--filas", type=int, default=20_000)
+    parser.add_argument("--empleados", type=int, default=100)
+    parser.add_argument("--ejecuciones", type=int, default=4, help="ejecuciones incrementales (días completos)")
+    args = parser.parse_args()
+
+    print(f"🗓️  Historial incremental ({args.filas:,} fichajes sintéticos, {args.empleados} empleados)")
+    fallos = check_history(args.filas, args.empleados, args.ejecuciones)
+    if fallos:
+        raise SystemExit("❌ " + "\n❌ ".join(fallos))
+    print("✅ El historial incremental es idéntico al cálculo completo")
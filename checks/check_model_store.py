@@ -0,0 +1,110 @@
+# check_model_store.py
+#
+# Paridad del formato compacto (model_store.py) con el estimador de sklearn:
+# ajusta un bosque pequeño sobre datos sintéticos con las columnas de
+# features, lo guarda y exporta en un directorio temporal (no toca models/)
+# y compara probabilidades y clases con verificar_paridad, tanto del
+# CompactForest recién exportado como del que devuelve scoring.load_model.
+# Con --features usa la tabla de features del pipeline (empleados_features)
+# en lugar de los datos sintéticos.
+# Con hojas float64 las probabilidades tienen que ser idénticas bit a bit;
+# con float32, las mismas clases. Termina con código 1 si algo no coincide.
+# Uso (desde la raíz del repo):
+#   python checks/check_model_store.py [--filas 20000] [--arboles 30] [--features data/processed/empleados_features.parquet]
+
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+
+from encoding import matriz_features  # noqa: E402
+from model_store import CompactForest, export_compact, load_compact, ruta_compacta, verificar_paridad  # noqa: E402
+from scoring import load_model, model_fingerprint, model_stamp  # noqa: E402
+from storage import load_table  # noqa: E402
+
+COLUMNAS = ["empleado_id", "dia_semana", "tardanza_min", "mes", "dia_mes", "es_lunes", "es_viernes", "tarde"]
+
+
+def datos_sinteticos(filas: int, semilla: int = 42) -> tuple[pd.DataFrame, np.ndarray]:
+    """Features con los rangos de las reales y un objetivo que depende de ellas (con ruido)."""
+    rng = np.random.default_rng(semilla)
+    X = pd.DataFrame({
+        "empleado_id": rng.integers(0, 500, filas),
+        "dia_semana": rng.integers(0, 5, filas),
+        "tardanza_min": rng.gamma(1.5, 8.0, filas).round(1),
+        "mes": rng.integers(1, 13, filas),
+        "dia_mes": rng.integers(1, 29, filas),
+    })
+    X["es_lunes"] = (X["dia_semana"] == 0).astype(int)
+    X["es_viernes"] = (X["dia_semana"] == 4).astype(int)
+    X["tarde"] = (X["tardanza_min"] > 15).astype(int)
+    riesgo = 0.1 + 0.3 * X["tarde"] + 0.1 * X["es_lunes"] + 0.2 * (X["empleado_id"] % 7 == 0)
+    y = (rng.random(filas) < riesgo).astype(int).to_numpy()
+    return X[COLUMNAS], y
+
+
+def check_model_store(filas: int, arboles: int, ruta_features: str | None = None) -> list[str]:
+    if ruta_features:
+        df = load_table(ruta_features)
+        X, y = matriz_features(df), df["ausencia"].to_numpy()
+        X_prueba = X
+        X, y = X.iloc[:filas], y[:filas]
+    else:
+        X, y = datos_sinteticos(filas)
+        X_prueba, _ = datos_sinteticos(filas // 4, semilla=7)
+    model = RandomForestClassifier(n_estimators=arboles, random_state=42, class_weight="balanced", n_jobs=1)
+    model.fit(X, y)
+
+    fallos = []
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "random_forest.pkl")
+        with open(ruta, "wb") as f:
+            pickle.dump(model, f)
+
+        casos = {}
+        for precision in ("float64", "float32"):
+            directorio = os.path.join(tmp, f"compacto_{precision}")
+            export_compact(model, directorio, fuente=model_fingerprint(ruta), precision_hojas=precision)
+            casos[f"exportado ({precision})"] = (load_compact(directorio), precision)
+
+        # El camino de inferencia: load_model tiene que elegir la copia compacta junto al .pkl
+        export_compact(model, ruta_compacta(ruta), fuente=model_fingerprint(ruta), sello_fuente=model_stamp(ruta))
+        cargado = load_model(ruta)
+        if not isinstance(cargado, CompactForest):
+            fallos.append(f"load_model devolvió {type(cargado).__name__} en lugar del modelo compacto")
+        else:
+            casos["load_model"] = (cargado, "float64")
+
+        for nombre, (compacto, precision) in casos.items():
+            r = verificar_paridad(model, compacto, X_prueba)
+            print(f"   {nombre:22s} {r['filas']:,} filas | máx. diferencia {r['max_diferencia_proba']:.2e} | "
+                  f"proba idénticas: {r['probabilidades_identicas']} | clases distintas: {r['clases_distintas']}")
+            if r["clases_distintas"]:
+                fallos.append(f"{nombre}: {r['clases_distintas']} clases distintas de sklearn")
+            if precision == "float64" and not r["probabilidades_identicas"]:
+                fallos.append(f"{nombre}: probabilidades distintas de sklearn "
+                              f"(máx. {r['max_diferencia_proba']:.2e})")
+            if list(compacto.feature_names_in_) != list(model.feature_names_in_):
+                fallos.append(f"{nombre}: features en otro orden que el estimador")
+    return fallos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paridad del modelo compacto con sklearn")
+    parser.add_argument("--filas", type=int, default=20_000)
+    parser.add_argument("--arboles", type=int, default=30)
+    parser.add_argument("--features", default=None, help="tabla de features real (por defecto, datos sintéticos)")
+    args = parser.parse_args()
+
+    print(f"🌲 Paridad del formato compacto ({args.arboles} árboles, {args.filas:,} filas de entrenamiento)")
+    fallos = check_model_store(args.filas, args.arboles, args.features)
+    if fallos:
+        raise SystemExit("❌ " + "\n❌ ".join(fallos))
+    print("✅ El modelo compacto da las mismas predicciones que sklearn")
@@ -0,0 +1,171 @@
+# check_service.py
+#
+# Rutas del servicio de predicción (service.py) con el cliente de prueba
+# ClienteLocal: /health, /predict correcta, parámetros
+# que faltan o no se entienden (400), fechas sin historial (400), rutas y
+# métodos desconocidos (404/405) y un fallo interno del predictor (500 en
+# JSON). Comprueba además que el micro-batcher y el servidor HTTP real
+# responden lo mismo que el servicio directo y que sus probabilidades son
+# las del bosque sobre las features de build_features.
+#
+# Todo se monta en un directorio temporal a partir de un fichajes.csv
+# sintético (generate_fichajes.py): features con historial, un bosque
+# pequeño, su copia compacta, el vocabulario y el estado del historial.
+# Termina con código 1 si alguna comprobación falla.
+# Uso (desde la raíz del repo):
+#   python checks/check_service.py [--filas 6000] [--empleados 60]
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+
+from encoding import EmployeeVocabulary, matriz_features  # noqa: E402
+from features import build_features  # noqa: E402
+from generate_fichajes import generate_fichajes  # noqa: E402
+from history import HistoryState  # noqa: E402
+from ingestion import read_fichajes  # noqa: E402
+from model_store import export_compact, ruta_compacta  # noqa: E402
+from preprocess import clean_data  # noqa: E402
+from scoring import model_fingerprint, model_stamp  # noqa: E402
+from service import ClienteLocal, MicroBatcher, PredictionService, atender, crear_servidor  # noqa: E402
+
+
+def montar_servicio(tmp: str, filas: int, empleados: int) -> tuple[PredictionService, pd.DataFrame]:
+    """Modelo, vocabulario y estado del historial en `tmp`; devuelve el servicio y los fichajes limpios."""
+    fichajes = generate_fichajes(filas, empleados, os.path.join(tmp, "fichajes.csv"))
+    limpio = clean_data(read_fichajes(fichajes, verbose=False), verbose=False)
+
+    vocabulario, estado = EmployeeVocabulary(), HistoryState()
+    df = build_features(limpio.copy(), verbose=False, historial=estado, vocabulario=vocabulario)
+    model = RandomForestClassifier(n_estimators=20, max_depth=8, random_state=42, class_weight="balanced")
+    model.fit(matriz_features(df), df["ausencia"])
+
+    rutas = {nombre: os.path.join(tmp, archivo) for nombre, archivo in
+             (("modelo", "random_forest.pkl"), ("vocabulario", "vocabulario.json"), ("historial", "historial.npz"))}
+    with open(rutas["modelo"], "wb") as f:
+        pickle.dump(model, f)
+    export_compact(model, ruta_compacta(rutas["modelo"]), fuente=model_fingerprint(rutas["modelo"]),
+                   sello_fuente=model_stamp(rutas["modelo"]))
+    vocabulario.save(rutas["vocabulario"])
+    estado.save(rutas["historial"])
+    return PredictionService(rutas["modelo"], rutas["vocabulario"], rutas["historial"]), limpio
+
+
+class _PredictorRoto:
+    """Predictor que falla por dentro: el servicio tiene que responder 500 en JSON."""
+
+    def predict(self, empleado_id, fecha=None, tardanza_min: float = 0.0) -> dict:
+        raise RuntimeError("fallo simulado del modelo")
+
+
+def _get_http(url: str) -> tuple[int, dict]:
+    try:
+        with urllib.request.urlopen(url, timeout=10) as respuesta:
+            return respuesta.status, json.loads(respuesta.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def check_service(filas: int, empleados: int) -> list[str]:
+    fallos = []
+
+    def comprobar(nombre: str, condicion: bool, detalle=""):
+        print(f"   {'✅' if condicion else '❌'} {nombre}")
+        if not condicion:
+            fallos.append(f"{nombre} {detalle}".strip())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        servicio, limpio = montar_servicio(tmp, filas, empleados)
+        cliente = ClienteLocal(servicio)
+        empleado = str(limpio["empleado_id"].iloc[0])
+        ultimo = limpio.loc[limpio["empleado_id"] == empleado, "fecha"].max().date()
+        manana = ultimo + timedelta(days=1)
+        consulta = f"/predict?empleado_id={empleado}&fecha={manana:%Y-%m-%d}&tardanza_min=20"
+
+        estado, cuerpo = cliente.get("/health")
+        comprobar("/health responde 200", (estado, cuerpo) == (200, {"estado": "ok"}), (estado, cuerpo))
+
+        estado, cuerpo = cliente.get(consulta)
+        comprobar("/predict responde 200 con la predicción", estado == 200 and set(cuerpo) == {
+            "empleado_id", "fecha", "prediccion", "prob_presente", "prob_tardanza"}, (estado, cuerpo))
+        if estado == 200:
+            comprobar("la fecha dd/mm/aaaa equivale a AAAA-MM-DD",
+                      cliente.get(f"/predict?empleado_id={empleado}&fecha={manana:%d/%m/%Y}&tardanza_min=20")
+                      == (estado, cuerpo))
+
+            # Misma predicción que el bosque sobre la fila de build_features con ese fichaje añadido
+            # (prob_presente y prob_tardanza son las dos primeras columnas, como en scoring.score_dataset)
+            nueva = limpio[limpio["empleado_id"] == empleado].iloc[[-1]].copy()
+            nueva["fila_id"] = limpio["fila_id"].max() + 1
+            nueva["fecha"] = pd.Timestamp(manana)
+            nueva["tardanza_min"] = 20.0
+            por_lotes = build_features(pd.concat([limpio, nueva], ignore_index=True), verbose=False,
+                                       historial=True, vocabulario=servicio.vocabulario).iloc[[-1]]
+            proba = servicio.forest.predict_proba(por_lotes[servicio.features])[0]
+            prediccion = servicio.forest.classes_[np.argmax(proba)]
+            comprobar("misma predicción que build_features + el bosque",
+                      cuerpo["prediccion"] == prediccion
+                      and np.allclose(proba[:2], [cuerpo["prob_presente"], cuerpo["prob_tardanza"]]),
+                      (proba, cuerpo))
+
+        estado, cuerpo = cliente.get(f"/predict?empleado_id=NO-EXISTE&fecha={manana:%Y-%m-%d}")
+        comprobar("un empleado desconocido también recibe predicción", estado == 200, (estado, cuerpo))
+
+        for nombre, url, esperado in (
+                ("sin empleado_id responde 400", f"/predict?fecha={manana:%Y-%m-%d}", 400),
+                ("fecha ilegible responde 400", f"/predict?empleado_id={empleado}&fecha=mañana", 400),
+                ("fecha ya procesada en el historial responde 400",
+                 f"/predict?empleado_id={empleado}&fecha={ultimo:%Y-%m-%d}", 400),
+                ("ruta desconocida responde 404", "/otra", 404)):
+            estado, cuerpo = cliente.get(url)
+            comprobar(nombre, estado == esperado and "error" in cuerpo, (estado, cuerpo))
+
+        estado, cuerpo = atender(servicio, "POST", consulta)
+        comprobar("POST responde 405", estado == 405 and "error" in cuerpo, (estado, cuerpo))
+
+        estado, cuerpo = ClienteLocal(_PredictorRoto()).get(consulta)
+        comprobar("un fallo del predictor responde 500 en JSON",
+                  estado == 500 and "fallo simulado" in cuerpo.get("error", ""), (estado, cuerpo))
+
+        directo = cliente.get(consulta)
+        with MicroBatcher(servicio) as lotes:
+            comprobar("el micro-batcher responde lo mismo que el servicio",
+                      ClienteLocal(lotes).get(consulta) == directo)
+            servidor = crear_servidor(lotes, "127.0.0.1", 0)
+            hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+            hilo.start()
+            try:
+                base = f"http://127.0.0.1:{servidor.server_address[1]}"
+                comprobar("el servidor HTTP responde lo mismo que ClienteLocal",
+                          _get_http(base + consulta) == directo and _get_http(base + "/otra")[0] == 404)
+            finally:
+                servidor.shutdown()
+                servidor.server_close()
+    return fallos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rutas del servicio de predicción con el cliente de prueba")
+    parser.add_argument("--filas", type=int, default=6_000)
+    parser.add_argument("--empleados", type=int, default=60)
+    args = parser.parse_args()
+
+    print(f"🚀 Servicio de predicción ({args.filas:,} fichajes sintéticos, {args.empleados} empleados)")
+    fallos = check_service(args.filas, args.empleados)
+    if fallos:
+        raise SystemExit("❌ " + "\n❌ ".join(fallos))
+    print("✅ Todas las rutas responden como se espera")
@@ -0,0 +1,103 @@
+# aggregation.py
+
+import numpy as np
+import pandas as pd
+
+from scoring import load_scored, meses_map
+from storage import ruta_datos, save_table
+
+CLAVE_EMPLEADO = ['empleado_id', 'nombre_empleado']
+CLAVE_MENSUAL = CLAVE_EMPLEADO + ['mes', 'anio']
+
+RUTA_MENSUAL_CSV = "data/processed/probabilidad_mensual_empleados.csv"
+
+
+def _tabla(sumas: pd.DataFrame) -> pd.DataFrame:
+    """Promedios a partir de las sumas por grupo."""
+    total = sumas['total_dias'].to_numpy()
+    dias_tardanza = sumas['dias_tardanza'].to_numpy()
+    return pd.DataFrame({
+        'total_dias': total.astype(np.int64),
+        'dias_presente': sumas['dias_presente'].to_numpy().astype(np.int64),
+        'dias_tardanza': dias_tardanza.astype(np.int64),
+        'prob_tardanza_promedio': sumas['prob_tardanza'].to_numpy() / total,
+        'prob_asistencia_promedio': sumas['prob_presente'].to_numpy() / total,
+        'tardanza_promedio': np.divide(sumas['minutos_tarde'].to_numpy(), dias_tardanza,
+                                       out=np.zeros(len(total)), where=dias_tardanza > 0),
+    }, index=sumas.index).reset_index()
+
+
+def aggregate_scored(reporte: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Estadísticas por empleado y por empleado-mes del dataset puntuado, en
+    una sola pasada vectorizada:
+
+    - total_dias, dias_presente (predicción 0), dias_tardanza (predicción 1)
+    - prob_tardanza_promedio, prob_asistencia_promedio (fracción 0-1)
+    - tardanza_promedio: minutos medios en los días con tardanza predicha
+      (0 si no hay ninguno)
+
+    Todo se reduce a sumas de columnas precalculadas en un único groupby
+    (sin lambdas, que se ejecutan en Python grupo a grupo); los promedios
+    son suma / días, igual que mean() de pandas. El nivel empleado se
+    obtiene sumando los grupos mensuales, sin volver a recorrer las filas.
+
+    Devuelve (por_empleado, mensual), ordenados como groupby(sort=True)
+    por CLAVE_EMPLEADO y CLAVE_MENSUAL; mensual incluye mes_nombre.
+    """
+    prediccion = reporte['prediccion'].to_numpy()
+    tarde = prediccion == 1
+    columnas = pd.DataFrame({
+        **{clave: reporte[clave] for clave in CLAVE_MENSUAL},
+        'total_dias': np.ones(len(reporte), dtype=np.int64),
+        'dias_presente': (prediccion == 0).astype(np.int64),
+        'dias_tardanza': tarde.astype(np.int64),
+        'prob_tardanza': reporte['prob_tardanza'].to_numpy(dtype=np.float64),
+        'prob_presente': reporte['prob_presente'].to_numpy(dtype=np.float64),
+        'minutos_tarde': np.where(tarde, reporte['tardanza_min'].to_numpy(dtype=np.float64), 0.0),
+    })
+    sumas = columnas.groupby(CLAVE_MENSUAL, observed=True, sort=True).sum()
+    sumas_empleado = sumas.groupby(level=CLAVE_EMPLEADO, observed=True, sort=True).sum()
+
+    mensual = _tabla(sumas)
+    mensual.insert(4, 'mes_nombre', mensual['mes'].map(meses_map))
+    return _tabla(sumas_empleado), mensual
+
+
+def probabilidad_mensual(mensual: pd.DataFrame) -> pd.DataFrame:
+    """
+    probabilidad_mensual_empleados.csv: probabilidades en porcentaje,
+    ordenado de mayor a menor probabilidad de tardanza.
+    """
+    tabla = pd.DataFrame({
+        'empleado_id': mensual['empleado_id'],
+        'nombre_empleado': mensual['nombre_empleado'],
+        'mes': mensual['mes'],
+        'anio': mensual['anio'],
+        'prob_tardanza_promedio': mensual['prob_tardanza_promedio'] * 100,
+        'prob_asistencia_promedio': mensual['prob_asistencia_promedio'] * 100,
+        'total_dias': mensual['total_dias'],
+        'dias_tardanza_predichos': mensual['dias_tardanza'],
+    })
+    tabla = tabla.sort_values('prob_tardanza_promedio', ascending=False)
+    tabla['mes_nombre'] = tabla['mes'].map(meses_map)
+    return tabla
+
+
+def build_aggregates(scored_path: str | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Etapa completa: lee el dataset puntuado y guarda los agregados y el CSV mensual."""
+    por_empleado, mensual = aggregate_scored(load_scored(scored_path))
+    save_table(por_empleado, ruta_datos("agregados_empleados"))
+    save_table(mensual, ruta_datos("agregados_mensuales"))
+    probabilidad_mensual(mensual).to_csv(RUTA_MENSUAL_CSV, index=False)
+    return por_empleado, mensual
+
+
+if __name__ == "__main__":
+    import time
+
+    inicio = time.perf_counter()
+    por_empleado, mensual = build_aggregates()
+    print(f"✅ Agregados: {len(por_empleado):,} empleados, {len(mensual):,} empleado-mes "
+          f"({time.perf_counter() - inicio:.2f} s)")
+    print(f"   {ruta_datos('agregados_empleados')}, {ruta_datos('agregados_mensuales')}, {RUTA_MENSUAL_CSV}")
@@ -0,0 +1,218 @@
+# calendar_table.py
+#
+# (No se llama calendar.py para no tapar el módulo calendar de la biblioteca
+# estándar, que importa pandas, al ejecutar los scripts desde src/.)
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# País cuyos feriados marca el calendario
+PAIS = "PE"
+
+# Feriados de fecha fija: (mes, día, nombre, primer año en que es feriado)
+FERIADOS_FIJOS = {
+    "PE": [
+        (1, 1, "Año Nuevo", None),
+        (5, 1, "Día del Trabajo", None),
+        (6, 7, "Batalla de Arica y Día de la Bandera", 2024),
+        (6, 29, "San Pedro y San Pablo", None),
+        (7, 23, "Día de la Fuerza Aérea del Perú", 2023),
+        (7, 28, "Fiestas Patrias", None),
+        (7, 29, "Fiestas Patrias", None),
+        (8, 6, "Batalla de Junín", 2022),
+        (8, 30, "Santa Rosa de Lima", None),
+        (10, 8, "Combate de Angamos", None),
+        (11, 1, "Todos los Santos", None),
+        (12, 8, "Inmaculada Concepción", None),
+        (12, 9, "Batalla de Ayacucho", 2022),
+        (12, 25, "Navidad", None),
+    ],
+}
+
+# Feriados móviles: días respecto al domingo de Pascua
+FERIADOS_PASCUA = {
+    "PE": [(-3, "Jueves Santo"), (-2, "Viernes Santo")],
+}
+
+# Columnas del calendario que build_features toma por fila
+COLUMNAS_CALENDARIO = ['mes', 'anio', 'dia_mes', 'semana_anio', 'es_feriado', 'es_puente']
+
+_EPOCA = date(1970, 1, 1)
+
+
+def _pascua(anio: int) -> date:
+    """Domingo de Pascua (calendario gregoriano, algoritmo de Meeus/Jones/Butcher)."""
+    a, b, c = anio % 19, anio // 100, anio % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(anio, mes, dia + 1)
+
+
+@lru_cache(maxsize=None)
+def feriados(anio: int, pais: str = PAIS) -> dict[date, str]:
+    """Feriados de `pais` en `anio`: fecha -> nombre."""
+    if pais not in FERIADOS_FIJOS:
+        raise ValueError(f"País sin calendario de feriados: '{pais}' (disponibles: {', '.join(FERIADOS_FIJOS)})")
+    resultado = {date(anio, mes, dia): nombre
+                 for mes, dia, nombre, desde in FERIADOS_FIJOS[pais] if desde is None or anio >= desde}
+    pascua = _pascua(anio)
+    for desplazamiento, nombre in FERIADOS_PASCUA.get(pais, []):
+        resultado.setdefault(pascua + timedelta(days=desplazamiento), nombre)
+    return resultado
+
+
+def _no_laborable(dia: date, pais: str) -> bool:
+    return dia.weekday() >= 5 or dia in feriados(dia.year, pais)
+
+
+@lru_cache(maxsize=None)
+def puentes(anio: int, pais: str = PAIS) -> frozenset[date]:
+    """
+    Días puente de `anio`: laborables (lunes a viernes, no feriado) entre dos
+    días no laborables, p. ej. el lunes antes de un martes feriado o el
+    viernes después de un jueves feriado. Se miran también los feriados de
+    los años vecinos (el 31/12 antes de un 1/1 en martes es puente).
+    """
+    resultado = set()
+    vecinos = [f for a in (anio - 1, anio, anio + 1) for f in feriados(a, pais)]
+    for feriado in vecinos:
+        for candidato in (feriado - timedelta(days=1), feriado + timedelta(days=1)):
+            if (candidato.year == anio and not _no_laborable(candidato, pais)
+                    and _no_laborable(candidato - timedelta(days=1), pais)
+                    and _no_laborable(candidato + timedelta(days=1), pais)):
+                resultado.add(candidato)
+    return frozenset(resultado)
+
+
+@lru_cache(maxsize=None)
+def _calendario_anio(anio: int, pais: str) -> pd.DataFrame:
+    fechas = pd.date_range(f"{anio}-01-01", f"{anio}-12-31", freq="D")
+    dias = fechas.date
+    del_anio = feriados(anio, pais)
+    puentes_anio = puentes(anio, pais)
+    dia_semana = fechas.dayofweek.to_numpy()
+    return pd.DataFrame({
+        'dia_id': (fechas.to_numpy().astype("datetime64[D]").astype(np.int64)).astype(np.int32),
+        'fecha': fechas,
+        'fecha_id': (fechas.year * 10_000 + fechas.month * 100 + fechas.day).to_numpy().astype(np.int32),
+        'dia_semana': dia_semana.astype(np.int8),
+        'mes': fechas.month.to_numpy().astype(np.int16),
+        'anio': fechas.year.to_numpy().astype(np.int16),
+        'dia_mes': fechas.day.to_numpy().astype(np.int16),
+        'semana_anio': fechas.isocalendar().week.to_numpy().astype(np.int16),
+        'es_viernes': (dia_semana == 4).astype(np.int8),
+        'es_lunes': (dia_semana == 0).astype(np.int8),
+        'es_fin_semana': (dia_semana >= 5).astype(np.int8),
+        'es_feriado': np.array([d in del_anio for d in dias], dtype=np.int8),
+        'es_puente': np.array([d in puentes_anio for d in dias], dtype=np.int8),
+        'feriado': [del_anio.get(d) for d in dias],
+    })
+
+
+@lru_cache(maxsize=32)
+def calendar_table(desde: int, hasta: int, pais: str = PAIS) -> pd.DataFrame:
+    """
+    Dimensión calendario: una fila por día de los años `desde`..`hasta`
+    (ambos incluidos), con clave entera dia_id (días desde 1970-01-01) y
+    todas las features de fecha. Se calcula una sola vez por proceso y
+    rango (no modificar la tabla devuelta); es contigua, así que la fila
+    de un día es dia_id - primer dia_id.
+    """
+    return pd.concat([_calendario_anio(anio, pais) for anio in range(desde, hasta + 1)], ignore_index=True)
+
+
+def parse_fechas(serie: pd.Series, formato: str | None = None, dayfirst: bool = True) -> pd.Series:
+    """
+    pd.to_datetime(serie, errors='coerce', dayfirst=dayfirst, format=formato)
+    interpretando solo los valores distintos (unos cientos frente a cientos
+    de miles de filas). Sin formato, pandas lo infiere del primer valor no
+    vacío, que también es el primero de los valores distintos.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    codigos, unicos = pd.factorize(serie)
+    fechas = pd.to_datetime(pd.Series(unicos, dtype=object), errors='coerce', dayfirst=dayfirst, format=formato)
+    return fechas_por_codigo(codigos, fechas, serie)
+
+
+def fechas_por_codigo(codigos: np.ndarray, fechas: pd.Series, serie: pd.Series) -> pd.Series:
+    """Expande las fechas de los valores distintos (pd.factorize) a todas las filas de `serie`."""
+    # La posición -1 (valor vacío) cae en el NaT añadido al final
+    valores = np.append(fechas.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))
+    return pd.Series(valores[codigos], index=serie.index, name=serie.name)
+
+
+def dia_id(fechas: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Clave entera de cada fecha (días desde 1970-01-01) y máscara de fechas válidas."""
+    dias = fechas.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    validas = ~np.isnat(dias)
+    return np.where(validas, dias.astype(np.int64), 0), validas
+
+
+def join_calendar(fechas: pd.Series, columnas: list[str] = COLUMNAS_CALENDARIO,
+                  pais: str = PAIS) -> pd.DataFrame:
+    """
+    Columnas del calendario para cada fila (mismo índice), unidas por dia_id.
+    Como la tabla es contigua el cruce es una indexación por posición, sin
+    hash ni ordenación. Las filas sin fecha quedan en 0.
+    """
+    dias, validas = dia_id(fechas)
+    resultado = pd.DataFrame(index=fechas.index)
+    if not validas.any():
+        tabla = _calendario_anio(1970, pais)
+        for col in columnas:
+            resultado[col] = np.zeros(len(fechas), dtype=tabla[col].dtype)
+        return resultado
+
+    desde, hasta = dias[validas].min(), dias[validas].max()
+    tabla = calendar_table((_EPOCA + timedelta(days=int(desde))).year,
+                           (_EPOCA + timedelta(days=int(hasta))).year, pais)
+    posiciones = np.where(validas, dias - tabla['dia_id'].iat[0], 0)
+    for col in columnas:
+        valores = tabla[col].to_numpy()[posiciones]
+        if valores.dtype == object:
+            vacio = None
+        elif valores.dtype.kind == "M":
+            vacio = np.datetime64("NaT", "ns")
+        else:
+            vacio = np.zeros(1, dtype=valores.dtype)
+        resultado[col] = np.where(validas, valores, vacio)
+    return resultado
+
+
+def calendar_row(fecha: date, pais: str = PAIS) -> dict:
+    """Las mismas columnas del calendario para una sola fecha, sin DataFrames."""
+    iso = fecha.isocalendar()
+    return {
+        'dia_semana': fecha.weekday(),
+        'mes': fecha.month,
+        'anio': fecha.year,
+        'dia_mes': fecha.day,
+        'semana_anio': iso[1],
+        'es_feriado': int(fecha in feriados(fecha.year, pais)),
+        'es_puente': int(fecha in puentes(fecha.year, pais)),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Feriados y días puente del calendario")
+    parser.add_argument("anio", type=int, nargs="?", default=date.today().year)
+    parser.add_argument("--pais", default=PAIS)
+    args = parser.parse_args()
+
+    tabla = calendar_table(args.anio, args.anio, args.pais)
+    print(f"📅 Feriados {args.pais} {args.anio}:")
+    for _, fila in tabla[tabla['es_feriado'] == 1].iterrows():
+        print(f"   {fila['fecha']:%d/%m/%Y} ({fila['fecha']:%a})  {fila['feriado']}")
+    print(f"\n🌉 Días puente: {', '.join(f'{f:%d/%m/%Y}' for f in tabla.loc[tabla['es_puente'] == 1, 'fecha'])}")
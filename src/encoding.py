@@ -0,0 +1,131 @@
+# encoding.py
+
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from storage import DIRECTORIO_PROCESADOS
+
+RUTA_VOCABULARIO = os.path.join(DIRECTORIO_PROCESADOS, "vocabulario_empleados.json")
+
+# Código de los empleados sin ID o que no están en el vocabulario (servicio)
+SIN_CODIGO = -1
+
+# Clave estable de cada fichaje: su número de fila de datos en fichajes.csv
+# (0 = la primera). La asigna preprocess y viaja con las features y el
+# dataset puntuado, que se cruzan con los fichajes por ella y no por
+# posición. No es una feature del modelo.
+COLUMNA_FILA = 'fila_id'
+
+# Columnas de la tabla de features que no entran al modelo
+COLUMNAS_NO_FEATURES = ['ausencia', COLUMNA_FILA]
+
+# Tipos fijos de la matriz de features: no dependen del rango de los datos,
+# así todos los bloques de streaming.py se escriben con el mismo esquema
+TIPOS_FEATURES = {
+    COLUMNA_FILA: np.int64,
+    'empleado_id': np.int32,
+    'ausencia': np.int8,
+    'dia_semana': np.int8,
+    'tardanza_min': np.float32,
+    'mes': np.int16,
+    'anio': np.int16,
+    'dia_mes': np.int16,
+    'semana_anio': np.int16,
+    'es_viernes': np.int8,
+    'es_lunes': np.int8,
+    'es_fin_semana': np.int8,
+    'tarde': np.int8,
+    'muy_tarde': np.int8,
+    'es_feriado': np.int8,
+    'es_puente': np.int8,
+    # history.COLUMNAS_HISTORIAL (build_features con historial)
+    'tasa_tardanza_7d': np.float32,
+    'tasa_tardanza_30d': np.float32,
+    'tasa_ausencia_30d': np.float32,
+    'racha_ausencias': np.int16,
+}
+
+
+class EmployeeVocabulary:
+    """
+    empleado_id (UUID u otro texto) -> código entero denso, en el orden en
+    que aparece cada empleado por primera vez. Solo se añaden empleados,
+    nunca se renumeran, así que los códigos con los que se entrenó el modelo
+    siguen valiendo para los datos nuevos.
+    """
+
+    def __init__(self, empleados: list[str] | None = None):
+        self.empleados = list(empleados or [])
+        self._codigos = {empleado: i for i, empleado in enumerate(self.empleados)}
+        self.modificado = False
+
+    def __len__(self) -> int:
+        return len(self.empleados)
+
+    @classmethod
+    def load(cls, ruta: str = RUTA_VOCABULARIO) -> "EmployeeVocabulary":
+        """Vocabulario guardado con save(); vacío si todavía no existe."""
+        if not os.path.exists(ruta):
+            return cls()
+        with open(ruta, encoding="utf-8") as f:
+            return cls(json.load(f)["empleados"])
+
+    def save(self, ruta: str = RUTA_VOCABULARIO):
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({"empleados": self.empleados}, f, ensure_ascii=False)
+        self.modificado = False
+
+    def codigo(self, empleado_id) -> int:
+        """Código de un solo empleado, sin ampliar el vocabulario."""
+        if empleado_id is None or empleado_id != empleado_id:
+            return SIN_CODIGO
+        return self._codigos.get(str(empleado_id).strip(), SIN_CODIGO)
+
+    def encode(self, empleado_id: pd.Series, ampliar: bool = True) -> np.ndarray:
+        """
+        Códigos int32 de una columna de IDs. Se factoriza primero, así solo se
+        buscan en el vocabulario los IDs distintos (unos cientos), no cada fila.
+        Con ampliar=True los empleados nuevos reciben el siguiente código.
+        """
+        posiciones, unicos = pd.factorize(empleado_id)
+        unicos = pd.Index(unicos).astype(str).str.strip()
+        if ampliar:
+            nuevos = [e for e in pd.unique(unicos) if e not in self._codigos]
+            for empleado in nuevos:
+                self._codigos[empleado] = len(self.empleados)
+                self.empleados.append(empleado)
+            self.modificado = self.modificado or bool(nuevos)
+        por_unico = np.array([self._codigos.get(e, SIN_CODIGO) for e in unicos], dtype=np.int32)
+        return np.where(posiciones >= 0, por_unico[posiciones] if len(unicos) else SIN_CODIGO,
+                        SIN_CODIGO).astype(np.int32)
+
+
+def matriz_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Matriz X del modelo: la tabla de features sin el objetivo ni la clave de fila."""
+    return df.drop(columns=COLUMNAS_NO_FEATURES, errors='ignore')
+
+
+@lru_cache(maxsize=1)
+def vocabulario_por_defecto() -> EmployeeVocabulary:
+    """Vocabulario de RUTA_VOCABULARIO, leído una sola vez por proceso (features por fila)."""
+    return EmployeeVocabulary.load()
+
+
+def encode_features(df: pd.DataFrame, vocabulario: EmployeeVocabulary) -> pd.DataFrame:
+    """
+    Etapa de codificación de build_features: empleado_id pasa a su código del
+    vocabulario (ampliándolo con los empleados nuevos) y las columnas
+    conocidas a sus tipos compactos (TIPOS_FEATURES). Los valores ausentes
+    quedan en 0 como en el resto de features.
+    """
+    if 'empleado_id' in df.columns:
+        df['empleado_id'] = vocabulario.encode(df['empleado_id'])
+    for col, tipo in TIPOS_FEATURES.items():
+        if col in df.columns and col != 'empleado_id':
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy().astype(tipo)
+    return df
@@ -1,16 +1,131 @@
 #features.py
 
+import math
+import os
+import re
+from datetime import date
+
+import numpy as np
 import pandas as pd
 
-def build_features(df: pd.DataFrame) -> pd.DataFrame:
+from calendar_table import COLUMNAS_CALENDARIO, calendar_row, fechas_por_codigo, join_calendar
+from encoding import COLUMNA_FILA, TIPOS_FEATURES, EmployeeVocabulary, encode_features, vocabulario_por_defecto
+from history import COLUMNAS_HISTORIAL, RUTA_ESTADO, HistoryState, history_features
+from instrumentation import stage
+from storage import load_table, ruta_datos, save_table
+
+
+def _parse_fecha(serie: pd.Series) -> pd.Series:
+    """
+    Convierte 'fecha' a datetime venga del CSV limpio o de un bloque en memoria.
+
+    El CSV limpio guarda las fechas en ISO (AAAA-MM-DD); interpretarlas con
+    dayfirst=True intercambia día y mes, por eso el ISO se lee como tal.
+    En memoria la columna puede traer Timestamps mezclados con el 0 que
+    preprocess pone en las fechas inválidas; ese 0 queda como NaT. Solo se
+    convierten los valores distintos (calendar_table.fechas_por_codigo).
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+
+    codigos, unicos = pd.factorize(serie)
+    texto = pd.Series(unicos, dtype=object).astype(str)
+    if len(texto) > 0 and re.match(r'^\d{4}-\d{2}-\d{2}', texto.iloc[0]):
+        fechas = pd.to_datetime(texto, errors='coerce', format='ISO8601')
+    else:
+        fechas = pd.to_datetime(texto, errors='coerce', dayfirst=True)
+    return fechas_por_codigo(codigos, fechas, serie)
+
+
+# Columnas de las features anteriores con las que se comprueba que una fila
+# sigue siendo el mismo fichaje antes de reutilizar su historial
+COLUMNAS_CONTROL_HISTORIAL = ['empleado_id', 'ausencia', 'tardanza_min', 'anio', 'mes', 'dia_mes']
+
+
+def load_history(ruta_estado: str = RUTA_ESTADO,
+                 ruta_features: str | None = None) -> tuple[HistoryState, pd.DataFrame | None]:
+    """
+    Estado del historial guardado y las features de la misma ejecución
+    (solo la clave de fila, el historial y las columnas de control), para
+    continuar con build_features(historial=estado, anteriores=...). Si
+    falta alguno de los dos o no se puede leer, estado vacío y None: el
+    historial se calcula desde cero.
+    """
+    ruta_features = ruta_features or ruta_datos("empleados_features")
+    if not (os.path.exists(ruta_estado) and os.path.exists(ruta_features)):
+        return HistoryState(), None
+    try:
+        estado = HistoryState.load(ruta_estado)
+        anteriores = load_table(ruta_features, columns=[COLUMNA_FILA] + COLUMNAS_CONTROL_HISTORIAL
+                                + COLUMNAS_HISTORIAL)
+    except (ValueError, KeyError) as error:
+        print(f"   ⚠️  No se puede continuar el historial guardado ({error}): se recalcula")
+        return HistoryState(), None
+    return estado, anteriores
+
+
+def _historial_incremental(df: pd.DataFrame, estado: HistoryState, anteriores: pd.DataFrame,
+                           vocabulario: EmployeeVocabulary, verbose: bool = True) -> pd.DataFrame | None:
+    """
+    Historial de `df` continuando `estado`: las filas que ya estaban en
+    `anteriores` (por COLUMNA_FILA) conservan su historial y solo las nuevas
+    pasan por estado.update(). None si no se puede continuar (filas que ya
+    no son el mismo fichaje o fichajes nuevos con días ya procesados):
+    entonces hay que recalcular desde cero.
+    """
+    if COLUMNA_FILA not in df.columns:
+        return None
+    posicion = pd.Index(anteriores[COLUMNA_FILA]).get_indexer(df[COLUMNA_FILA])
+    ya = posicion >= 0
+    actuales, previas = df[ya], anteriores.iloc[posicion[ya]]
+
+    # Solo se añaden fichajes: los que ya estaban tienen que coincidir
+    for col in COLUMNAS_CONTROL_HISTORIAL:
+        if col == 'empleado_id':
+            valores = vocabulario.encode(actuales[col], ampliar=False)
+        else:
+            valores = pd.to_numeric(actuales[col], errors='coerce').fillna(0).to_numpy().astype(TIPOS_FEATURES[col])
+        if not np.array_equal(valores, previas[col].to_numpy()):
+            return None
+
+    try:
+        nuevas = history_features(df[~ya], estado)
+    except ValueError:
+        return None
+    if verbose:
+        print(f"   ⏩ Historial incremental: {(~ya).sum():,} fichajes nuevos, {ya.sum():,} ya procesados")
+    conservadas = previas[COLUMNAS_HISTORIAL].set_axis(actuales.index)
+    return pd.concat([conservadas, nuevas]).loc[df.index]
+
+
+@stage("build_features")
+def build_features(df: pd.DataFrame, verbose: bool = True,
+                   historial: bool | HistoryState = False,
+                   vocabulario: EmployeeVocabulary | None = None,
+                   anteriores: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Con historial=True se añaden las features de historial por empleado
+    (history.COLUMNAS_HISTORIAL) calculadas desde cero; con un HistoryState
+    se continúa desde ese estado (fichajes nuevos) y queda actualizado para
+    guardarlo con estado.save(). Si además se pasan `anteriores` (las
+    features con las que se guardó el estado, ver load_history), `df` puede
+    traer todos los fichajes: los que ya estaban conservan su historial y
+    solo los nuevos actualizan el estado. Si eso no es posible, el estado
+    se vacía y se recalcula desde cero.
+
+    empleado_id se codifica con `vocabulario` (encoding.EmployeeVocabulary),
+    que queda ampliado con los empleados nuevos para guardarlo con
+    vocabulario.save(). Sin vocabulario se usa el de
+    encoding.RUTA_VOCABULARIO y se guarda aquí mismo si cambia.
+    """
     # Asegurar que 'fecha' sea datetime
-    df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce', dayfirst=True)
+    df['fecha'] = _parse_fecha(df['fecha'])
 
-    # Crear features temporales
-    df['mes'] = df['fecha'].dt.month
-    df['anio'] = df['fecha'].dt.year
-    df['dia_mes'] = df['fecha'].dt.day
-    df['semana_anio'] = df['fecha'].dt.isocalendar().week
+    # Crear features temporales: cruce con la dimensión calendario por fecha
+    # (mes, año, día, semana ISO, feriado y puente se calculan una vez por día, no por fila)
+    calendario = join_calendar(df['fecha'])
+    for col in COLUMNAS_CALENDARIO:
+        df[col] = calendario[col]
     
     # Features de días
     df['es_viernes'] = (df['dia_semana'] == 4).astype(int)
@@ -20,6 +135,21 @@ def build_features(df: pd.DataFrame) -> pd.DataFrame:
     # Features de tardanzas
     df['tarde'] = (df['tardanza_min'] > 15).astype(int)
     df['muy_tarde'] = (df['tardanza_min'] > 30).astype(int)
+
+    guardar_vocabulario = vocabulario is None
+    if guardar_vocabulario:
+        vocabulario = EmployeeVocabulary.load()
+
+    # Features de historial (necesitan empleado_id y fecha antes de pasarlos a número)
+    if historial is not False:
+        estado = historial if isinstance(historial, HistoryState) else None
+        historia = None
+        if estado is not None and anteriores is not None:
+            historia = _historial_incremental(df, estado, anteriores, vocabulario, verbose)
+            if historia is None:
+                print("   ♻️  El historial guardado no corresponde a estos fichajes: se recalcula desde cero")
+                estado.vaciar()
+        df = df.join(historia if historia is not None else history_features(df, estado))
     
     # ✅ ELIMINAR TODAS LAS COLUMNAS NO NUMÉRICAS
     columnas_a_eliminar = [
@@ -34,25 +164,77 @@ def build_features(df: pd.DataFrame) -> pd.DataFrame:
     df = df.drop(columns=columnas_a_eliminar, errors='ignore')
     
     # ✅ VERIFICAR QUE SOLO QUEDEN COLUMNAS NUMÉRICAS
-    print("\n🔍 Columnas finales en el dataset:")
-    print(df.columns.tolist())
-    print(f"\n📊 Tipos de datos:")
-    print(df.dtypes)
+    if verbose:
+        print("\n🔍 Columnas finales en el dataset:")
+        print(df.columns.tolist())
+        print(f"\n📊 Tipos de datos:")
+        print(df.dtypes)
     
-    # ✅ CONVERTIR TODO A NUMÉRICO
+    # ✅ CODIFICAR: empleado_id a código del vocabulario y tipos compactos
+    df = encode_features(df, vocabulario)
+    if guardar_vocabulario and vocabulario.modificado:
+        vocabulario.save()
+
+    # ✅ CONVERTIR TODO A NUMÉRICO (columnas que no conoce la codificación)
     for col in df.columns:
-        if df[col].dtype == 'object':
-            print(f"⚠️  ADVERTENCIA: La columna '{col}' es de tipo texto, intentando convertir...")
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        if df[col].dtype == 'object' or isinstance(df[col].dtype, pd.CategoricalDtype):
+            if verbose:
+                print(f"⚠️  ADVERTENCIA: La columna '{col}' es de tipo texto, intentando convertir...")
+            df[col] = pd.to_numeric(df[col].astype(object), errors='coerce')
     
     # Rellenar NaN con 0
     df = df.fillna(0)
     
     return df
 
+def _a_numero(valor) -> float:
+    """pd.to_numeric(errors='coerce') + fillna(0) para un solo valor."""
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(numero) else numero
+
+
+def build_features_row(empleado_id, fecha: date, tardanza_min: float = 0.0,
+                       vocabulario: EmployeeVocabulary | None = None) -> dict:
+    """
+    Features de un único fichaje (empleado_id, fecha) sin pasar por pandas,
+    con los mismos valores que build_features daría para esa fila. El
+    código del empleado sale de `vocabulario` (por defecto el guardado);
+    un empleado que no está en él recibe encoding.SIN_CODIGO.
+
+    Para predecir un día futuro la tardanza todavía no se conoce; 0 es lo
+    mismo que reciben en el proceso por lotes los fichajes sin hora.
+    """
+    tardanza_min = _a_numero(tardanza_min)
+    vocabulario = vocabulario if vocabulario is not None else vocabulario_por_defecto()
+    calendario = calendar_row(fecha)
+    dia_semana = calendario['dia_semana']
+    return {
+        'empleado_id': vocabulario.codigo(empleado_id),
+        'dia_semana': dia_semana,
+        'tardanza_min': tardanza_min,
+        **{col: calendario[col] for col in COLUMNAS_CALENDARIO},
+        'es_viernes': int(dia_semana == 4),
+        'es_lunes': int(dia_semana == 0),
+        'es_fin_semana': int(dia_semana >= 5),
+        'tarde': int(tardanza_min > 15),
+        'muy_tarde': int(tardanza_min > 30),
+    }
+
+
 if __name__ == "__main__":
-    df = pd.read_csv("data/processed/empleados_clean.csv")
-    df = build_features(df)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Construcción de features")
+    parser.add_argument("--historial", action="store_true",
+                        help=f"añadir las features de historial por empleado y guardar su estado en {RUTA_ESTADO}")
+    args = parser.parse_args()
+
+    df = load_table(ruta_datos("empleados_clean"))
+    estado, anteriores = load_history() if args.historial else (False, None)
+    df = build_features(df, historial=estado, anteriores=anteriores)
     
     # ✅ VALIDACIÓN FINAL
     print("\n✅ Validación final:")
@@ -66,5 +248,10 @@ if __name__ == "__main__":
     else:
         print("\n✅ PERFECTO: Solo columnas numéricas")
     
-    df.to_csv("data/processed/empleados_features.csv", index=False)
-    print("\n✅ Archivo generado: data/processed/empleados_features.csv")
\ No newline at end of file
+    # El estado antes que las features (ver pipeline._features)
+    if args.historial:
+        estado.save()
+        print(f"✅ Estado del historial guardado: {RUTA_ESTADO}")
+    ruta_salida = ruta_datos("empleados_features")
+    save_table(df, ruta_salida)
+    print(f"\n✅ Archivo generado: {ruta_salida}")
\ No newline at end of file
@@ -1,8 +1,28 @@
 import pandas as pd
-import pickle
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+import hashlib
+import json
 import os
 import re
+import sys
+import time
+
+from aggregation import CLAVE_EMPLEADO, aggregate_scored
+from encoding import COLUMNA_FILA
+from instrumentation import registrar_filas, stage
+from render import ARCHIVO_CSS, enlace_estilos, huella_plantillas, publicar_estilos, render_reporte_individual
+from scoring import RUTA_MODELO, load_scored, stamped_fingerprint
+from storage import ruta_datos
+
+DIRECTORIO_REPORTES = "reports/individuales"
+
+# Huella de cada reporte generado, para la regeneración incremental
+ARCHIVO_MANIFIESTO = "manifest.json"
+
+# Lotes por proceso: más lotes reparten mejor la carga y actualizan el progreso más a menudo
+LOTES_POR_PROCESO = 8
+
 
 def sanitizar_nombre_archivo(nombre: str) -> str:
     """
@@ -28,307 +48,254 @@ def sanitizar_nombre_archivo(nombre: str) -> str:
     return nombre
 
 
-def generate_individual_reports(input_path: str, original_csv_path: str = "data/raw/fichajes.csv"):
-    print("📊 Iniciando generación de reportes individuales...")
-    
-    # Cargar modelo y datos (similar a generate_report.py)
-    with open("models/random_forest.pkl", "rb") as f:
-        model = pickle.load(f)
+class Progreso:
+    """Contador en una sola línea (se reescribe con \\r), como mucho ~10 veces por segundo."""
 
-    df_original = pd.read_csv(original_csv_path)
-    df_original.columns = [c.strip().lower() for c in df_original.columns]
-    df_original['fecha'] = pd.to_datetime(df_original['fecha'], errors='coerce', dayfirst=True)
-    
-    df = pd.read_csv(input_path)
-    X = df.drop(columns=["ausencia"]) if "ausencia" in df.columns else df
-    
-    predictions = model.predict(X)
-    probabilities = model.predict_proba(X)
+    def __init__(self, total: int, etiqueta: str = "Reportes"):
+        self.total = total
+        self.etiqueta = etiqueta
+        self.hechos = 0
+        self._ultimo = 0.0
+
+    def avanzar(self, n: int = 1):
+        self.hechos += n
+        ahora = time.perf_counter()
+        if self.hechos >= self.total or ahora - self._ultimo >= 0.1:
+            self._ultimo = ahora
+            sys.stdout.write(f"\r   {self.etiqueta}: {self.hechos}/{self.total} "
+                             f"({self.hechos / max(self.total, 1):.0%})")
+            sys.stdout.flush()
+            if self.hechos >= self.total:
+                sys.stdout.write("\n")
+
+
+def _directorio_estaticos(directorio: str) -> str:
+    """reports/individuales -> reports/static, compartido con el reporte general."""
+    return os.path.join(os.path.dirname(os.path.normpath(directorio)), "static")
+
+
+def archivo_reporte(nombre: str) -> str:
+    return f"reporte_{sanitizar_nombre_archivo(nombre)}.html"
+
+
+def _agrupar_por_archivo(grupos: list[tuple]) -> dict[str, list[tuple]]:
+    """
+    Junta los empleados que acabarían en el mismo archivo (mismo nombre
+    sanitizado) en el orden del groupby. Así cada archivo lo escribe un solo
+    proceso y el resultado es el mismo que en secuencial, donde gana el último.
+    """
+    por_archivo = {}
+    for grupo in grupos:
+        por_archivo.setdefault(archivo_reporte(grupo[1]), []).append(grupo)
+    return por_archivo
+
+
+def _huellas_archivos(reporte: pd.DataFrame, archivos: dict[str, list[tuple]]) -> dict[str, str]:
+    """
+    SHA-256 de las filas puntuadas de los empleados de cada archivo, en su
+    orden. Sin fila_id: que cambie el número de fila de un fichaje no cambia el reporte.
+    """
+    por_fila = pd.util.hash_pandas_object(reporte.drop(columns=[COLUMNA_FILA], errors='ignore'),
+                                          index=False).to_numpy()
+    huellas = {}
+    for archivo, grupos in archivos.items():
+        h = hashlib.sha256()
+        for empleado_id, nombre, datos, _ in grupos:
+            h.update(f"{empleado_id}\0{nombre}\0".encode("utf-8"))
+            h.update(por_fila[reporte.index.get_indexer(datos.index)].tobytes())
+        huellas[archivo] = h.hexdigest()
+    return huellas
+
+
+def _cargar_manifiesto(directorio: str) -> dict:
+    ruta = os.path.join(directorio, ARCHIVO_MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _guardar_manifiesto(directorio: str, manifiesto: dict):
+    with open(os.path.join(directorio, ARCHIVO_MANIFIESTO), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+
+def _repartir(archivos: list[list[tuple]], n_lotes: int) -> list[list[tuple]]:
+    """Lotes contiguos con un número de filas parecido."""
+    total_filas = sum(len(datos) for grupos in archivos for _, _, datos, _ in grupos)
+    objetivo = total_filas / max(n_lotes, 1)
+    lotes, actual, filas = [], [], 0
+    for grupos in archivos:
+        actual.extend(grupos)
+        filas += sum(len(datos) for _, _, datos, _ in grupos)
+        if filas >= objetivo:
+            lotes.append(actual)
+            actual, filas = [], 0
+    if actual:
+        lotes.append(actual)
+    return lotes
+
+
+def _generar_lote(lote: list[tuple], directorio: str, generado: datetime, css: str) -> int:
+    """Trabajo de cada proceso: su porción de empleados, con sus filas y agregados ya separados."""
+    for empleado_id, nombre, datos, mensual in lote:
+        generar_reporte_html_empleado(empleado_id, nombre, datos, generado=generado,
+                                      directorio=directorio, css=css, mensual=mensual)
+    return len(lote)
+
+
+@stage("generate_individual_reports")
+def generate_individual_reports(scored_path: str | None = None, n_procesos: int = 1,
+                                generado: datetime | None = None,
+                                directorio: str = DIRECTORIO_REPORTES,
+                                incremental: bool = False, model_path: str = RUTA_MODELO):
+    """
+    Un HTML por empleado. Con n_procesos > 1 los empleados se reparten en
+    lotes entre procesos (-1 = todos los núcleos), cada uno con solo las
+    filas de sus empleados.
+
+    `generado` es la fecha que aparece en los reportes; fijarla hace que
+    dos ejecuciones con los mismos datos produzcan archivos idénticos, con
+    cualquier número de procesos.
+
+    Cada ejecución deja en manifest.json la huella de las filas de cada
+    reporte, la versión del modelo (solo con incremental=True) y la de las
+    plantillas. Con incremental=True solo se regeneran los reportes cuya
+    huella cambió (o todos si cambió el modelo o las plantillas, o si la
+    ejecución anterior no era incremental) y se borran los de empleados
+    que ya no aparecen.
+    """
+    print("📊 Iniciando generación de reportes individuales...")
+    generado = generado or datetime.now()
+    if n_procesos == -1:
+        n_procesos = os.cpu_count() or 1
     
-    # Crear DataFrame con resultados
-    dias_map = {0: 'Lun', 1: 'Mar', 2: 'Mié', 3: 'Jue', 4: 'Vie', 5: 'Sáb', 6: 'Dom'}
-    meses_map = {1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril', 5: 'Mayo', 6: 'Junio',
-                 7: 'Julio', 8: 'Agosto', 9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'}
+    # Cargar el dataset puntuado (la inferencia se hace una sola vez en scoring.py)
+    reporte = load_scored(scored_path)
+    registrar_filas(len(reporte))
     
-    # Extraer mes y año de la columna fecha en df_original
-    reporte = pd.DataFrame({
-        'empleado_id': df_original['empleado_id'].fillna('Sin ID').astype(str),
-        'nombre_empleado': df_original['nombre_empleado'].fillna('Sin nombre'),
-        'fecha': df_original['fecha'],
-        'fecha_str': df_original['fecha'].dt.strftime('%d/%m/%Y'),
-        'dia_semana': df['dia_semana'].fillna(0).astype(int).map(dias_map),
-        'mes': df_original['fecha'].dt.month.fillna(0).astype(int),  # CORREGIDO: usar fecha de df_original
-        'mes_nombre': df_original['fecha'].dt.month.fillna(0).astype(int).map(meses_map),  # CORREGIDO
-        'anio': df_original['fecha'].dt.year.fillna(0).astype(int),  # CORREGIDO
-        'tardanza_min': df['tardanza_min'].fillna(0),
-        'prediccion': predictions,
-        'prob_presente': probabilities[:, 0],
-        'prob_tardanza': probabilities[:, 1]
-    })
+    # Crear carpeta para reportes individuales y la hoja de estilos que enlazan
+    os.makedirs(directorio, exist_ok=True)
+    css = enlace_estilos(publicar_estilos(_directorio_estaticos(directorio)), directorio)
     
-    # Crear carpeta para reportes individuales
-    os.makedirs("reports/individuales", exist_ok=True)
+    # Estadísticas mensuales de todos los empleados en una sola pasada (aggregation.py)
+    _, mensual = aggregate_scored(reporte)
+    mensual_por_empleado = dict(iter(mensual.groupby(CLAVE_EMPLEADO, observed=True, sort=False)))
     
-    # Agrupar por empleado
-    empleados_unicos = reporte.groupby(['empleado_id', 'nombre_empleado'])
+    # Agrupar por empleado (y por archivo de salida)
+    empleados_unicos = reporte.groupby(CLAVE_EMPLEADO, observed=True)
     total_empleados = len(empleados_unicos)
+    grupos = [(empleado_id, nombre, datos, mensual_por_empleado[(empleado_id, nombre)])
+              for (empleado_id, nombre), datos in empleados_unicos]
+    archivos = _agrupar_por_archivo(grupos)
     
     print(f"   Generando reportes para {total_empleados} empleados...")
     print(f"   Total de registros en reporte: {len(reporte)}")
     
-    for i, ((empleado_id, nombre), datos_empleado) in enumerate(empleados_unicos, 1):
-        num_registros = len(datos_empleado)
-        print(f"   [{i}/{total_empleados}] Generando reporte para: {nombre} ({num_registros} registros)")
-        generar_reporte_html_empleado(empleado_id, nombre, datos_empleado)
+    huellas = _huellas_archivos(reporte, archivos)
+    manifiesto = {
+        "modelo": stamped_fingerprint(model_path) if incremental and os.path.exists(model_path) else None,
+        "plantillas": huella_plantillas(),
+        "archivos": {
+            archivo: {"empleados": [str(g[0]) for g in grupos_archivo], "huella": huellas[archivo]}
+            for archivo, grupos_archivo in archivos.items()
+        },
+    }
     
-    print(f"\n✅ {total_empleados} reportes individuales generados en: reports/individuales/")
-    print("   Formato: reports/individuales/reporte_[nombre_empleado].html")
-
-
-def generar_reporte_html_empleado(empleado_id: str, nombre: str, datos: pd.DataFrame):
-    # Calcular estadísticas
-    total_dias = len(datos)
-    dias_presente = (datos['prediccion'] == 0).sum()
-    dias_tardanza = (datos['prediccion'] == 1).sum()
-    prob_tardanza_promedio = datos['prob_tardanza'].mean() * 100
-    prob_presente_promedio = datos['prob_presente'].mean() * 100
-    tardanza_promedio = datos['tardanza_min'].mean()
+    pendientes = archivos
+    if incremental:
+        anterior = _cargar_manifiesto(directorio)
+        mismas_versiones = (anterior.get("modelo") == manifiesto["modelo"]
+                            and anterior.get("plantillas") == manifiesto["plantillas"])
+        if anterior and not mismas_versiones:
+            print("   ♻️  Cambió el modelo o las plantillas: se regeneran todos los reportes")
+        previos = anterior.get("archivos", {}) if mismas_versiones else {}
+        pendientes = {
+            archivo: grupos_archivo for archivo, grupos_archivo in archivos.items()
+            if previos.get(archivo, {}).get("huella") != manifiesto["archivos"][archivo]["huella"]
+            or not os.path.exists(os.path.join(directorio, archivo))
+        }
+        
+        # Reportes de empleados que ya no están en los datos
+        eliminados = [archivo for archivo in anterior.get("archivos", {}) if archivo not in archivos]
+        for archivo in eliminados:
+            ruta = os.path.join(directorio, archivo)
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        print(f"   ♻️  Reportes a regenerar: {len(pendientes)} | sin cambios: "
+              f"{len(archivos) - len(pendientes)} | eliminados: {len(eliminados)}")
     
-    # Estadísticas mensuales
-    stats_mensuales = datos.groupby(['mes', 'mes_nombre', 'anio']).agg({
-        'prediccion': ['count', lambda x: (x == 1).sum()],
-        'prob_tardanza': 'mean',
-        'tardanza_min': lambda x: x[datos.loc[x.index, 'prediccion'] == 1].mean() if (datos.loc[x.index, 'prediccion'] == 1).any() else 0
-    }).reset_index()
+    a_generar = [grupo for grupos_archivo in pendientes.values() for grupo in grupos_archivo]
+    progreso = Progreso(len(a_generar))
+    if n_procesos <= 1 or not a_generar:
+        for empleado_id, nombre, datos_empleado, mensual_empleado in a_generar:
+            generar_reporte_html_empleado(empleado_id, nombre, datos_empleado,
+                                          generado=generado, directorio=directorio, css=css,
+                                          mensual=mensual_empleado)
+            progreso.avanzar()
+    else:
+        lotes = _repartir(list(pendientes.values()), n_procesos * LOTES_POR_PROCESO)
+        print(f"   {n_procesos} procesos, {len(lotes)} lotes")
+        with ProcessPoolExecutor(max_workers=n_procesos) as pool:
+            futuros = [pool.submit(_generar_lote, lote, directorio, generado, css) for lote in lotes]
+            for futuro in as_completed(futuros):
+                progreso.avanzar(futuro.result())
     
-    stats_mensuales.columns = ['mes', 'mes_nombre', 'anio', 'total_dias', 'dias_tardanza', 'prob_tardanza_pct', 'tardanza_promedio']
-    stats_mensuales['prob_tardanza_pct'] *= 100
+    # El manifiesto se escribe al final: si algo falla antes, la próxima
+    # ejecución incremental vuelve a generar lo que faltó
+    _guardar_manifiesto(directorio, manifiesto)
+    
+    print(f"\n✅ {len(a_generar)} reportes individuales generados en: {directorio}/")
+    print(f"   Formato: {directorio}/reporte_[nombre_empleado].html")
+
+
+def generar_reporte_html_empleado(empleado_id: str, nombre: str, datos: pd.DataFrame,
+                                  generado: datetime | None = None,
+                                  directorio: str = DIRECTORIO_REPORTES,
+                                  css: str | None = None,
+                                  mensual: pd.DataFrame | None = None):
+    # Estadísticas mensuales del empleado: las filas de aggregate_scored que
+    # le corresponden (si no vienen ya calculadas, se agregan sus datos)
+    if mensual is None:
+        _, mensual = aggregate_scored(datos)
+    # (los días sin fecha válida, mes 0, cuentan en los totales pero no tienen fila mensual)
+    stats_mensuales = mensual[mensual['mes_nombre'].notna()]
+    stats_mensuales = stats_mensuales.assign(prob_tardanza_pct=stats_mensuales['prob_tardanza_promedio'] * 100)
+    total_dias = int(mensual['total_dias'].sum())
+    dias_presente = int(mensual['dias_presente'].sum())
+    dias_tardanza = int(mensual['dias_tardanza'].sum())
     
     # Ordenar datos por fecha descendente
     datos_ordenados = datos.sort_values('fecha', ascending=False)
     
-    # Generar HTML
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Reporte Individual - {nombre}</title>
-        <style>
-            * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-            body {{
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                padding: 20px;
-                min-height: 100vh;
-            }}
-            .container {{
-                max-width: 1200px;
-                margin: 0 auto;
-                background: white;
-                border-radius: 15px;
-                box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-                overflow: hidden;
-            }}
-            .header {{
-                background: linear-gradient(135deg, #2c3e50 0%, #34495e 100%);
-                color: white;
-                padding: 40px;
-                text-align: center;
-            }}
-            .header h1 {{ font-size: 32px; margin-bottom: 10px; }}
-            .header h2 {{ font-size: 24px; opacity: 0.9; margin-bottom: 5px; }}
-            .header p {{ opacity: 0.7; font-size: 14px; }}
-            .summary {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-                gap: 20px;
-                padding: 30px;
-                background: #f8f9fa;
-            }}
-            .card {{
-                background: white;
-                padding: 20px;
-                border-radius: 10px;
-                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                text-align: center;
-            }}
-            .card h3 {{
-                font-size: 12px;
-                color: #7f8c8d;
-                margin-bottom: 10px;
-                text-transform: uppercase;
-            }}
-            .card .value {{
-                font-size: 32px;
-                font-weight: bold;
-                margin-bottom: 5px;
-            }}
-            .card .percentage {{ font-size: 14px; color: #95a5a6; }}
-            .content {{ padding: 30px; }}
-            h2 {{
-                color: #2c3e50;
-                margin: 30px 0 20px 0;
-                padding-bottom: 10px;
-                border-bottom: 3px solid #3498db;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin: 20px 0;
-                background: white;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                border-radius: 8px;
-                overflow: hidden;
-            }}
-            th {{
-                background: linear-gradient(135deg, #34495e 0%, #2c3e50 100%);
-                color: white;
-                padding: 12px;
-                text-align: left;
-                font-weight: 600;
-                text-transform: uppercase;
-                font-size: 11px;
-            }}
-            td {{ padding: 10px 12px; border-bottom: 1px solid #ecf0f1; }}
-            tr:hover {{ background-color: #f8f9fa; }}
-            .badge {{
-                padding: 5px 10px;
-                border-radius: 15px;
-                font-weight: bold;
-                font-size: 10px;
-                text-transform: uppercase;
-            }}
-            .badge-presente {{ background: #d4edda; color: #155724; }}
-            .badge-tardanza {{ background: #fff3cd; color: #856404; }}
-            .prob-bar {{
-                height: 6px;
-                background: #ecf0f1;
-                border-radius: 3px;
-                overflow: hidden;
-                margin-top: 5px;
-            }}
-            .prob-fill {{ height: 100%; }}
-            .prob-fill-yellow {{ background: linear-gradient(90deg, #f39c12, #e67e22); }}
-            .prob-fill-green {{ background: linear-gradient(90deg, #2ecc71, #27ae60); }}
-            .high-risk {{ background-color: #fff5f5 !important; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>📊 Reporte Individual de Asistencia</h1>
-                <h2>{nombre}</h2>
-                <p>ID: {empleado_id} | Generado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
-            </div>
-
-            <div class="summary">
-                <div class="card">
-                    <h3>Total Días</h3>
-                    <div class="value" style="color: #3498db;">{total_dias}</div>
-                </div>
-                <div class="card">
-                    <h3>🟢 Días Presente</h3>
-                    <div class="value" style="color: #27ae60;">{dias_presente}</div>
-                    <div class="percentage">{dias_presente/total_dias*100:.1f}%</div>
-                </div>
-                <div class="card">
-                    <h3>🟡 Días Tardanza</h3>
-                    <div class="value" style="color: #f39c12;">{dias_tardanza}</div>
-                    <div class="percentage">{dias_tardanza/total_dias*100:.1f}%</div>
-                </div>
-            </div>
-
-            <div class="content">
-                <h2>📅 Estadísticas Mensuales</h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Mes</th>
-                            <th>Año</th>
-                            <th>Días Laborados</th>
-                            <th>Tardanzas</th>
-                            <th>Prob. Tardanza</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-    """
-    
-    for _, row in stats_mensuales.iterrows():
-        row_class = "high-risk" if row['prob_tardanza_pct'] >= 50 else ""
-        tardanza_display = f"{row['tardanza_promedio']:.0f} min" if row['dias_tardanza'] > 0 else "N/A"
-        html += f"""
-                        <tr class="{row_class}">
-                            <td><strong>{row['mes_nombre']}</strong></td>
-                            <td>{int(row['anio'])}</td>
-                            <td>{int(row['total_dias'])} días</td>
-                            <td><strong style="color: #f39c12;">{int(row['dias_tardanza'])}</strong> días</td>
-                            <td>
-                                <strong>{row['prob_tardanza_pct']:.1f}%</strong>
-                                <div class="prob-bar">
-                                    <div class="prob-fill prob-fill-yellow" style="width: {min(row['prob_tardanza_pct'], 100)}%"></div>
-                                </div>
-                            </td>
-                        </tr>
-        """
-    
-    html += f"""
-                    </tbody>
-                </table>
-
-                <h2>📋 Historial Detallado (Últimos 100 días)</h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Fecha</th>
-                            <th>Día</th>
-                            <th>Mes</th>
-                            <th>Predicción</th>
-                            <th>Prob. Tardanza</th>
-                            <th>Tardanza (min)</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-    """
-    
-    for _, row in datos_ordenados.head(100).iterrows():
-        pred = int(row['prediccion'])
-        badge_class = 'badge-presente' if pred == 0 else 'badge-tardanza'
-        badge_text = 'PRESENTE' if pred == 0 else 'TARDANZA'
-        prob_pct = row['prob_tardanza'] * 100
-        
-        html += f"""
-                        <tr>
-                            <td><strong>{row['fecha_str']}</strong></td>
-                            <td>{row['dia_semana']}</td>
-                            <td>{row['mes_nombre']}</td>
-                            <td><span class="badge {badge_class}">{badge_text}</span></td>
-                            <td>
-                                <strong>{prob_pct:.1f}%</strong>
-                                <div class="prob-bar">
-                                    <div class="prob-fill prob-fill-yellow" style="width: {prob_pct}%"></div>
-                                </div>
-                            </td>
-                            <td><strong>{row['tardanza_min']:.0f}</strong> min</td>
-                        </tr>
-        """
-    
-    html += """
-                    </tbody>
-                </table>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+    # Generar HTML (plantillas de render.py; la hoja de estilos va aparte)
+    html = render_reporte_individual(
+        css or enlace_estilos(os.path.join(_directorio_estaticos(directorio), ARCHIVO_CSS), directorio),
+        empleado_id, nombre, (generado or datetime.now()).strftime('%d/%m/%Y %H:%M:%S'),
+        total_dias, dias_presente, dias_tardanza,
+        stats_mensuales, datos_ordenados.head(100),
+    )
     
     # Sanitizar nombre del empleado para el archivo
-    nombre_archivo = sanitizar_nombre_archivo(nombre)
-    ruta_archivo = f"reports/individuales/reporte_{nombre_archivo}.html"
+    ruta_archivo = os.path.join(directorio, archivo_reporte(nombre))
     
     with open(ruta_archivo, "w", encoding="utf-8") as f:
         f.write(html)
 
 
 if __name__ == "__main__":
-    generate_individual_reports("data/processed/empleados_features.csv", "data/raw/fichajes.csv")
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reportes HTML individuales por empleado")
+    parser.add_argument("--procesos", type=int, default=1, help="procesos en paralelo (-1 = todos los núcleos)")
+    parser.add_argument("--generado", default=None,
+                        help="fecha fija de generación 'AAAA-MM-DD HH:MM:SS' (salida reproducible)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="regenerar solo los empleados cuyos datos cambiaron (ver manifest.json)")
+    args = parser.parse_args()
+    generate_individual_reports(
+        ruta_datos("predicciones_detalladas"),
+        n_procesos=args.procesos,
+        generado=datetime.fromisoformat(args.generado) if args.generado else None,
+        incremental=args.incremental,
+    )
\ No newline at end of file
@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from aggregation import CLAVE_EMPLEADO, aggregate_scored, probabilidad_mensual
+from render import enlace_estilos, publicar_estilos, render_reporte_interactivo
+from scoring import dias_map, load_scored, meses_map
+from storage import ruta_datos
+
+DIRECTORIO_INTERACTIVO = "reports/interactivo"
+
+# Fragmentos de ~50.000 filas (unos cientos de KB de JSON cada uno)
+FILAS_POR_FRAGMENTO = 50_000
+FILAS_POR_PAGINA = 100
+
+# Por encima de estas filas, ordenar sin filtrar por empleado solo ordena lo ya cargado
+LIMITE_ORDEN = 2_000_000
+
+
+def _fecha_entera(fecha: pd.Series) -> np.ndarray:
+    """AAAAMMDD como entero (0 si no hay fecha): ocupa poco en JSON y se ordena igual que la fecha."""
+    return (fecha.dt.year * 10_000 + fecha.dt.month * 100 + fecha.dt.day).fillna(0).astype(np.int64).to_numpy()
+
+
+def _porcentaje(valores) -> np.ndarray:
+    """Probabilidad 0-1 en porcentaje con un decimal, como se muestra."""
+    return np.round(np.asarray(valores, dtype=np.float64) * 100, 1)
+
+
+def _cortes(n_filas: int, filas_por_fragmento: int, fronteras: np.ndarray | None = None) -> list[int]:
+    """
+    Posiciones de corte entre fragmentos. Con `fronteras` (inicios de grupo,
+    p. ej. de cada empleado) solo se corta en ellas, así un empleado nunca
+    queda repartido entre dos fragmentos.
+    """
+    if fronteras is None:
+        return list(range(0, n_filas, filas_por_fragmento)) + [n_filas]
+    fronteras = np.append(fronteras, n_filas)
+    cortes = [0]
+    while cortes[-1] < n_filas:
+        i = np.searchsorted(fronteras, cortes[-1] + filas_por_fragmento, side="right") - 1
+        if fronteras[i] <= cortes[-1]:      # un solo grupo más grande que el fragmento
+            i = np.searchsorted(fronteras, cortes[-1], side="right")
+        cortes.append(int(fronteras[i]))
+    return cortes
+
+
+def _escribir_tabla(directorio: str, nombre: str, columnas: dict[str, np.ndarray],
+                    filas_por_fragmento: int, agrupada: bool = False) -> dict:
+    """
+    Escribe la tabla en fragmentos JSON por columnas ({"e": [...], "prob": [...]})
+    y devuelve su entrada del índice. Cada fragmento anota el rango de códigos
+    de empleado que contiene para cargar solo los necesarios al filtrar.
+    """
+    e = columnas["e"]
+    n_filas = len(e)
+    fronteras = np.flatnonzero(np.r_[True, e[1:] != e[:-1]]) if agrupada and n_filas else None
+    cortes = _cortes(n_filas, filas_por_fragmento, fronteras)
+
+    fragmentos = []
+    for k, (desde, hasta) in enumerate(zip(cortes[:-1], cortes[1:])):
+        archivo = f"{nombre}_{k:04d}.json"
+        # json.dumps usa el codificador en C; json.dump a archivo es Python puro y ~5x más lento
+        with open(os.path.join(directorio, archivo), "w", encoding="utf-8") as f:
+            f.write(json.dumps({c: v[desde:hasta].tolist() for c, v in columnas.items()}, separators=(",", ":")))
+        fragmentos.append({"archivo": archivo, "desde": desde, "filas": hasta - desde,
+                           "e_min": int(e[desde:hasta].min()), "e_max": int(e[desde:hasta].max())})
+    return {"columnas": list(columnas), "filas": n_filas, "fragmentos": fragmentos}
+
+
+def generate_interactive_report(scored_path: str | None = None,
+                                directorio: str = DIRECTORIO_INTERACTIVO,
+                                filas_por_fragmento: int = FILAS_POR_FRAGMENTO,
+                                generado: datetime | None = None):
+    """
+    Reporte completo sin recortes: todas las filas mensuales, todos los días
+    de riesgo (>50%), el historial de todos los empleados y su resumen, en
+    fragmentos JSON dentro de `directorio`/datos, más un index.html que los
+    carga bajo demanda y ordena y filtra en el navegador.
+
+    Los empleados se guardan una sola vez en el índice y las tablas los
+    referencian por código (columna "e"); el historial se ordena por empleado
+    y fecha y se corta por empleado, así filtrar uno solo trae su fragmento.
+    """
+    print("📊 Iniciando generación de reporte interactivo...")
+    reporte = load_scored(scored_path)
+    por_empleado, mensual = aggregate_scored(reporte)
+
+    datos = os.path.join(directorio, "datos")
+    shutil.rmtree(datos, ignore_errors=True)      # sin fragmentos de ejecuciones anteriores
+    os.makedirs(datos)
+
+    # Código de empleado: su posición en por_empleado (mismo orden de groupby)
+    codigo = reporte.groupby(CLAVE_EMPLEADO, observed=True, sort=True).ngroup().to_numpy()
+    dia = pd.Categorical(reporte['dia_semana'], categories=list(dias_map.values())).codes.astype(np.int64)
+    prediccion = reporte['prediccion'].to_numpy().astype(np.int64)
+    prob = _porcentaje(reporte['prob_tardanza'])
+    minutos = np.round(reporte['tardanza_min'].to_numpy(dtype=np.float64), 1)
+    fecha = _fecha_entera(reporte['fecha'])
+
+    tablas = {}
+    print("   Escribiendo fragmentos...")
+    tablas["empleados"] = _escribir_tabla(datos, "empleados", {
+        "e": np.arange(len(por_empleado)),
+        "dias": por_empleado['total_dias'].to_numpy(),
+        "dias_tardanza": por_empleado['dias_tardanza'].to_numpy(),
+        "asistencia": _porcentaje(por_empleado['prob_asistencia_promedio']),
+        "tardanza": _porcentaje(por_empleado['prob_tardanza_promedio']),
+    }, filas_por_fragmento)
+
+    # Mismo orden que probabilidad_mensual_empleados.csv (mayor probabilidad primero)
+    codigo_mensual = mensual.groupby(CLAVE_EMPLEADO, observed=True, sort=True).ngroup().to_numpy()
+    ordenado = probabilidad_mensual(mensual)
+    tablas["mensual"] = _escribir_tabla(datos, "mensual", {
+        "e": codigo_mensual[ordenado.index],
+        "mes": ordenado['mes'].to_numpy(),
+        "anio": ordenado['anio'].to_numpy(),
+        "asistencia": np.round(ordenado['prob_asistencia_promedio'].to_numpy(), 1),
+        "tardanza": np.round(ordenado['prob_tardanza_promedio'].to_numpy(), 1),
+        "dias": ordenado['total_dias'].to_numpy(),
+        "dias_tardanza": ordenado['dias_tardanza_predichos'].to_numpy(),
+    }, filas_por_fragmento)
+
+    riesgo = reporte.index.get_indexer(
+        reporte[reporte['prob_tardanza'] > 0.5].sort_values('prob_tardanza', ascending=False).index)
+    tablas["riesgo"] = _escribir_tabla(datos, "riesgo", {
+        "e": codigo[riesgo], "fecha": fecha[riesgo], "dia": dia[riesgo],
+        "prediccion": prediccion[riesgo], "prob": prob[riesgo], "minutos": minutos[riesgo],
+    }, filas_por_fragmento)
+
+    # Historial: por empleado y del día más reciente al más antiguo
+    orden = np.lexsort((-fecha, codigo))
+    tablas["historial"] = _escribir_tabla(datos, "historial", {
+        "e": codigo[orden], "fecha": fecha[orden], "dia": dia[orden],
+        "mes": reporte['mes'].to_numpy().astype(np.int64)[orden],
+        "prediccion": prediccion[orden], "prob": prob[orden], "minutos": minutos[orden],
+    }, filas_por_fragmento, agrupada=True)
+
+    indice = {
+        "resumen": {"total": len(reporte), "presentes": int((prediccion == 0).sum()),
+                    "tardanzas": int((prediccion == 1).sum())},
+        "empleados": {"id": por_empleado['empleado_id'].astype(str).tolist(),
+                      "nombre": por_empleado['nombre_empleado'].astype(str).tolist()},
+        "meses": [""] + [meses_map[m] for m in range(1, 13)],
+        "dias": list(dias_map.values()),
+        "tablas": tablas,
+    }
+    with open(os.path.join(datos, "indice.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(indice, ensure_ascii=False, separators=(",", ":")))
+
+    css = enlace_estilos(publicar_estilos(os.path.join(os.path.dirname(os.path.normpath(directorio)), "static")),
+                         directorio)
+    html = render_reporte_interactivo(css, (generado or datetime.now()).strftime('%d/%m/%Y %H:%M:%S'),
+                                      "datos", FILAS_POR_PAGINA, LIMITE_ORDEN)
+    ruta_html = os.path.join(directorio, "index.html")
+    with open(ruta_html, "w", encoding="utf-8") as f:
+        f.write(html)
+
+    n_fragmentos = sum(len(t["fragmentos"]) for t in tablas.values())
+    print(f"\n✅ Reporte interactivo generado: {ruta_html}")
+    print(f"   {n_fragmentos} fragmentos JSON en {datos}/ "
+          + ", ".join(f"{nombre}: {t['filas']:,} filas" for nombre, t in tablas.items()))
+    print(f"💡 Los fragmentos se cargan con fetch: sírvelo con  python -m http.server -d {directorio}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reporte HTML interactivo con los datos completos en fragmentos JSON")
+    parser.add_argument("--directorio", default=DIRECTORIO_INTERACTIVO)
+    parser.add_argument("--filas-por-fragmento", type=int, default=FILAS_POR_FRAGMENTO)
+    args = parser.parse_args()
+    generate_interactive_report(ruta_datos("predicciones_detalladas"), directorio=args.directorio,
+                                filas_por_fragmento=args.filas_por_fragmento)
@@ -0,0 +1,277 @@
+# history.py
+
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from storage import DIRECTORIO_PROCESADOS
+
+# Ventanas (días naturales anteriores al fichaje) de las tasas por empleado
+VENTANAS_TARDANZA = (7, 30)
+VENTANAS_AUSENCIA = (30,)
+VENTANA_MAX = max(VENTANAS_TARDANZA + VENTANAS_AUSENCIA)
+
+COLUMNAS_HISTORIAL = ([f"tasa_tardanza_{w}d" for w in VENTANAS_TARDANZA]
+                      + [f"tasa_ausencia_{w}d" for w in VENTANAS_AUSENCIA]
+                      + ["racha_ausencias"])
+
+# Clases de 'ausencia' (preprocess.clean_data)
+AUSENTE = 1
+TARDANZA = 2
+
+RUTA_ESTADO = os.path.join(DIRECTORIO_PROCESADOS, "historial_estado.npz")
+
+# Versión del archivo de estado; cambia si cambian los campos o las ventanas
+VERSION_ESTADO = 1
+
+_EPOCA = date(1970, 1, 1)
+
+# Clave (empleado, día) en un solo int64: código << 32 | día desplazado a positivo
+_DESPLAZAMIENTO_DIA = 1 << 31
+
+
+def _clave(codigo: np.ndarray, dia: np.ndarray) -> np.ndarray:
+    return (codigo.astype(np.int64) << 32) | (dia.astype(np.int64) + _DESPLAZAMIENTO_DIA)
+
+
+class HistoryState:
+    """
+    Estado compacto del historial de fichajes por empleado, suficiente para
+    calcular las features de los días siguientes sin releer el histórico:
+
+    - empleados: vocabulario empleado_id -> código (posición)
+    - ultimo: último día procesado de cada empleado (días desde 1970, -1 = ninguno)
+    - racha: días con fichaje consecutivos en ausencia hasta `ultimo`
+    - ventana: conteos por (empleado, día) de los últimos VENTANA_MAX días
+      de cada empleado (fichajes, tardanzas, ausencias); hace de buffer
+      circular, los días más antiguos se descartan en cada actualización
+
+    update() calcula las features de un lote y avanza el estado. Procesar
+    el histórico de una vez o en lotes cronológicos da exactamente las
+    mismas features: las tasas salen de conteos enteros y la racha se
+    encadena con la del estado. features_dia() da las de un solo fichaje
+    futuro sin modificar el estado (service.py).
+    """
+
+    def __init__(self):
+        self.vaciar()
+
+    def vaciar(self):
+        """Vuelve al estado inicial, para recalcular el historial desde cero."""
+        self.empleados = np.array([], dtype=object)
+        self.ultimo = np.array([], dtype=np.int64)
+        self.racha = np.array([], dtype=np.int64)
+        self.ventana = {campo: np.array([], dtype=np.int64)
+                        for campo in ("codigo", "dia", "fichajes", "tardanzas", "ausencias")}
+        self._consulta = None
+
+    @classmethod
+    def load(cls, ruta: str = RUTA_ESTADO) -> "HistoryState":
+        """Estado guardado con save(); vacío si todavía no existe."""
+        estado = cls()
+        if not os.path.exists(ruta):
+            return estado
+        with np.load(ruta) as datos:
+            if int(datos["version"]) != VERSION_ESTADO or tuple(datos["ventanas"]) != (VENTANA_MAX,):
+                raise ValueError(f"Estado de historial incompatible en {ruta}: recalcula con historial=True")
+            estado.empleados = datos["empleados"].astype(object)
+            estado.ultimo = datos["ultimo"]
+            estado.racha = datos["racha"]
+            estado.ventana = {campo: datos[f"ventana_{campo}"] for campo in estado.ventana}
+        return estado
+
+    def features_dia(self, empleado_id, fecha: date) -> dict:
+        """
+        Features de historial de un fichaje de `empleado_id` en `fecha`, con
+        los mismos valores que daría update() si ese fuera su siguiente
+        fichaje, sin modificar el estado. Un empleado sin historial vale 0.
+        Solo sirve para días posteriores al último procesado del empleado:
+        de los anteriores el estado ya no guarda la ventana completa.
+        """
+        if self._consulta is None:
+            # Índices de solo lectura; update() los invalida
+            self._consulta = ({e: i for i, e in enumerate(self.empleados)},
+                              _clave(self.ventana["codigo"], self.ventana["dia"]))
+        codigos, claves = self._consulta
+        resultado = dict.fromkeys(COLUMNAS_HISTORIAL, 0.0)
+        resultado["racha_ausencias"] = 0
+        codigo = codigos.get(str(empleado_id))
+        if codigo is None:
+            return resultado
+        dia = (fecha - _EPOCA).days
+        if dia <= self.ultimo[codigo]:
+            ultimo = _EPOCA + timedelta(days=int(self.ultimo[codigo]))
+            raise ValueError(f"Solo hay historial para fechas posteriores al {ultimo:%d/%m/%Y} "
+                             f"(último fichaje procesado de {empleado_id})")
+
+        hasta = np.searchsorted(claves, _clave(np.array([codigo]), np.array([dia])))[0]
+        for campo, ventanas in (("tardanzas", VENTANAS_TARDANZA), ("ausencias", VENTANAS_AUSENCIA)):
+            for w in ventanas:
+                desde = np.searchsorted(claves, _clave(np.array([codigo]), np.array([dia - w])))[0]
+                n = self.ventana["fichajes"][desde:hasta].sum()
+                k = self.ventana[campo][desde:hasta].sum()
+                resultado[f"tasa_{campo[:-1]}_{w}d"] = k / n if n > 0 else 0.0
+        resultado["racha_ausencias"] = int(self.racha[codigo])
+        return resultado
+
+    def save(self, ruta: str = RUTA_ESTADO):
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        np.savez_compressed(
+            ruta, version=VERSION_ESTADO, ventanas=np.array([VENTANA_MAX]),
+            empleados=self.empleados.astype(str), ultimo=self.ultimo, racha=self.racha,
+            **{f"ventana_{campo}": valores for campo, valores in self.ventana.items()},
+        )
+
+    def _codigos(self, empleado_id: np.ndarray) -> np.ndarray:
+        """Código de cada empleado; los nuevos se añaden al vocabulario."""
+        codigos = pd.Index(self.empleados).get_indexer(empleado_id)
+        nuevos = pd.unique(empleado_id[codigos < 0])
+        if len(nuevos):
+            self.empleados = np.concatenate([self.empleados, nuevos])
+            self.ultimo = np.concatenate([self.ultimo, np.full(len(nuevos), -1, dtype=np.int64)])
+            self.racha = np.concatenate([self.racha, np.zeros(len(nuevos), dtype=np.int64)])
+            codigos = pd.Index(self.empleados).get_indexer(empleado_id)
+        return codigos
+
+    def update(self, empleado_id: pd.Series, fecha: pd.Series, ausencia: pd.Series) -> pd.DataFrame:
+        """
+        Features de historial de cada fila (mismo índice y orden que la entrada),
+        usando solo los días anteriores a su fecha:
+
+        - tasa_tardanza_7d / _30d: tardanzas / fichajes en los 7 / 30 días previos
+        - tasa_ausencia_30d: ausencias / fichajes en los 30 días previos
+        - racha_ausencias: días con fichaje consecutivos en ausencia justo antes
+
+        Las filas sin fecha valen 0 y no cuentan en el historial. Cada
+        empleado solo puede recibir días posteriores a su último día
+        procesado; si no, hay que recalcular desde cero.
+        """
+        indice = empleado_id.index
+        ids = empleado_id.astype(str).to_numpy(dtype=object)
+        dia_fila = fecha.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        validas = ~np.isnat(dia_fila)
+        dia_fila = dia_fila.astype(np.int64)
+        ausencia = ausencia.to_numpy()
+
+        codigo_fila = self._codigos(ids)
+        self._consulta = None
+        resultado = pd.DataFrame(0.0, index=indice, columns=COLUMNAS_HISTORIAL)
+        resultado["racha_ausencias"] = 0
+        if not validas.any():
+            return resultado
+
+        # Conteos del lote por (empleado, día), ordenados por clave
+        claves, por_fila = np.unique(_clave(codigo_fila[validas], dia_fila[validas]), return_inverse=True)
+        fichajes = np.bincount(por_fila, minlength=len(claves)).astype(np.int64)
+        tardanzas = np.bincount(por_fila, weights=ausencia[validas] == TARDANZA, minlength=len(claves)).astype(np.int64)
+        ausencias = np.bincount(por_fila, weights=ausencia[validas] == AUSENTE, minlength=len(claves)).astype(np.int64)
+        codigo = claves >> 32
+        dia = (claves & 0xFFFFFFFF) - _DESPLAZAMIENTO_DIA
+
+        atrasados = dia <= self.ultimo[codigo]
+        if atrasados.any():
+            raise ValueError(f"{atrasados.sum()} días de fichajes no son posteriores a lo ya procesado "
+                             f"para su empleado: recalcula el historial completo")
+
+        # Ventanas: sumas acumuladas sobre estado + lote, ordenados por clave;
+        # los días [d - w, d - 1] de un empleado son un tramo contiguo
+        todas = np.concatenate([_clave(self.ventana["codigo"], self.ventana["dia"]), claves])
+        orden = np.argsort(todas, kind="stable")
+        todas = todas[orden]
+
+        def acumulada(estado: np.ndarray, lote: np.ndarray) -> np.ndarray:
+            return np.concatenate([[0], np.cumsum(np.concatenate([estado, lote])[orden])])
+
+        acumuladas = {campo: acumulada(self.ventana[campo], valores)
+                      for campo, valores in (("fichajes", fichajes), ("tardanzas", tardanzas),
+                                             ("ausencias", ausencias))}
+        hasta = np.searchsorted(todas, claves, side="left")
+        por_dia = {}
+        for campo, ventanas in (("tardanzas", VENTANAS_TARDANZA), ("ausencias", VENTANAS_AUSENCIA)):
+            for w in ventanas:
+                desde = np.searchsorted(todas, claves - w, side="left")
+                n = acumuladas["fichajes"][hasta] - acumuladas["fichajes"][desde]
+                k = acumuladas[campo][hasta] - acumuladas[campo][desde]
+                nombre = f"tasa_{campo[:-1]}_{w}d"
+                por_dia[nombre] = np.divide(k, n, out=np.zeros(len(claves)), where=n > 0)
+
+        # Racha: días seguidos en ausencia (todos sus fichajes), encadenada con la del estado
+        j = np.arange(len(claves))
+        en_ausencia = ausencias == fichajes
+        inicio = np.r_[True, codigo[1:] != codigo[:-1]]
+        primero = np.maximum.accumulate(np.where(inicio, j, 0))
+        ruptura = np.maximum.accumulate(np.where(~en_ausencia, j, -1))
+        racha_hasta = np.where(ruptura >= primero, j - ruptura, j - primero + 1 + self.racha[codigo])
+        por_dia["racha_ausencias"] = np.where(inicio, self.racha[codigo], np.r_[0, racha_hasta[:-1]])
+
+        for nombre, valores in por_dia.items():
+            resultado.loc[validas, nombre] = valores[por_fila]
+
+        # Avanzar el estado: último día y racha de cada empleado del lote...
+        fin = np.r_[codigo[1:] != codigo[:-1], True]
+        self.ultimo[codigo[fin]] = dia[fin]
+        self.racha[codigo[fin]] = racha_hasta[fin]
+
+        # ... y solo los días que aún pueden caer en la ventana de un día futuro
+        combinados = {campo: np.concatenate([self.ventana[campo], valores])[orden]
+                      for campo, valores in (("codigo", codigo), ("dia", dia), ("fichajes", fichajes),
+                                             ("tardanzas", tardanzas), ("ausencias", ausencias))}
+        vigentes = combinados["dia"] > self.ultimo[combinados["codigo"]] - VENTANA_MAX
+        self.ventana = {campo: valores[vigentes] for campo, valores in combinados.items()}
+        return resultado
+
+
+def history_features(df: pd.DataFrame, estado: HistoryState | None = None) -> pd.DataFrame:
+    """Features de historial de `df` (empleado_id, fecha, ausencia) desde `estado` o desde cero."""
+    estado = estado if estado is not None else HistoryState()
+    return estado.update(df["empleado_id"], pd.to_datetime(df["fecha"], errors="coerce"), df["ausencia"])
+
+
+def verificar_incremental(df: pd.DataFrame, n_lotes: int = 4) -> bool:
+    """
+    Compara el cálculo completo con el incremental en `n_lotes` lotes
+    cronológicos (con el estado guardado y recargado entre lotes).
+    """
+    import tempfile
+
+    completo = history_features(df)
+    fecha = pd.to_datetime(df["fecha"], errors="coerce")
+    cortes = fecha.dropna().quantile(np.linspace(0, 1, n_lotes + 1)[1:-1]).to_numpy()
+    lote = np.searchsorted(cortes, fecha.to_numpy(), side="left")
+    lote[fecha.isna().to_numpy()] = 0
+
+    partes = []
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "estado.npz")
+        HistoryState().save(ruta)
+        for i in range(n_lotes):
+            estado = HistoryState.load(ruta)
+            partes.append(history_features(df[lote == i], estado))
+            estado.save(ruta)
+    incremental = pd.concat(partes).loc[df.index]
+    return completo.equals(incremental)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from storage import load_table, ruta_datos
+
+    parser = argparse.ArgumentParser(description="Features de historial por empleado con estado incremental")
+    parser.add_argument("--lotes", type=int, default=4, help="lotes cronológicos para la verificación")
+    args = parser.parse_args()
+
+    df = load_table(ruta_datos("empleados_clean"))
+    inicio = time.perf_counter()
+    estado = HistoryState()
+    features = history_features(df, estado)
+    print(f"✅ Historial de {len(estado.empleados):,} empleados, {len(df):,} filas "
+          f"({time.perf_counter() - inicio:.2f} s); días en ventana: {len(estado.ventana['dia']):,}")
+    print(features.describe().T[["mean", "max"]])
+
+    iguales = verificar_incremental(df, args.lotes)
+    print(f"\n{'✅' if iguales else '❌'} Incremental en {args.lotes} lotes "
+          f"{'idéntico' if iguales else 'distinto'} al cálculo completo")
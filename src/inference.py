@@ -0,0 +1,225 @@
+# inference.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_store import ARRAYS, CompactForest, pack_forest
+
+try:
+    import numba
+    NUMBA_DISPONIBLE = True
+except ImportError:
+    NUMBA_DISPONIBLE = False
+
+# Filas por bloque: los nodos de un árbol se reutilizan para todas las filas
+# del bloque antes de pasar al siguiente árbol. Los bloques son la unidad de
+# reparto entre hilos
+TAMANO_BLOQUE = 32_768
+
+# Filas que bajan a la vez por el mismo árbol. Recorrer un árbol es una
+# cadena de lecturas dependientes; intercalar varias filas permite que los
+# fallos de caché de unas se solapen con el trabajo de las otras
+FILAS_INTERCALADAS = 8
+
+# Versión NumPy: pares (fila, árbol) por bloque y cada cuántos pasos se podan
+# los que ya llegaron a una hoja (ahí las hojas apuntan a sí mismas, así que
+# avanzar una hoja no la mueve)
+PARES_POR_BLOQUE = 1 << 18
+PASOS_ENTRE_PODAS = 4
+
+
+if NUMBA_DISPONIBLE:
+    @numba.njit(parallel=True, cache=True, nogil=True)
+    def _proba_compilada(X, nodos, umbrales, raices, valores, salida, tamano_bloque):
+        n, n_arboles, n_clases = X.shape[0], raices.shape[0], valores.shape[1]
+        n_bloques = (n + tamano_bloque - 1) // tamano_bloque
+        for b in numba.prange(n_bloques):
+            inicio = b * tamano_bloque
+            fin = min(inicio + tamano_bloque, n)
+            actual = np.empty(FILAS_INTERCALADAS, dtype=np.int32)
+            for i in range(inicio, fin):
+                for c in range(n_clases):
+                    salida[i, c] = 0.0
+            # Árbol a árbol dentro del bloque: mismo orden de suma que sklearn
+            for t in range(n_arboles):
+                for grupo in range(inicio, fin, FILAS_INTERCALADAS):
+                    m = min(FILAS_INTERCALADAS, fin - grupo)
+                    for j in range(m):
+                        actual[j] = raices[t]
+                    pendientes = m
+                    while pendientes > 0:
+                        pendientes = 0
+                        for j in range(m):
+                            nodo = actual[j]
+                            columna = nodos[nodo, 0]
+                            if columna >= 0:
+                                if X[grupo + j, columna] <= umbrales[nodo, 1]:
+                                    actual[j] = nodos[nodo, 2]
+                                else:
+                                    actual[j] = nodos[nodo, 3]
+                                pendientes += 1
+                    for j in range(m):
+                        hoja = nodos[actual[j], 2]
+                        for c in range(n_clases):
+                            salida[grupo + j, c] += valores[hoja, c]
+            for i in range(inicio, fin):
+                for c in range(n_clases):
+                    salida[i, c] /= n_arboles
+
+
+class FlatForest:
+    """
+    Motor de inferencia alternativo para el bosque de train_model.
+
+    Todos los árboles están empaquetados en una sola tabla de nodos int32
+    de 16 bytes por nodo, [feature, umbral, izquierdo, derecho], de modo que
+    visitar un nodo es leer una sola línea de caché (el umbral float32 se
+    guarda con sus bits y se lee a través de una vista float32). En las
+    hojas feature = -1 e izquierdo es la fila de `valores`.
+
+    Las filas se procesan por bloques de TAMANO_BLOQUE; dentro de cada
+    bloque se recorre un árbol entero antes de pasar al siguiente, de
+    FILAS_INTERCALADAS en FILAS_INTERCALADAS filas.
+
+    Con numba el recorrido está compilado y los bloques se reparten entre
+    n_hilos; sin numba se usa una versión NumPy que avanza todos los pares
+    (fila, árbol) del bloque a la vez, con los bloques en un ThreadPool.
+
+    Las probabilidades se suman árbol a árbol en el mismo orden que
+    RandomForestClassifier, así que coinciden bit a bit con sklearn.
+
+    No siempre es más rápido que predict_proba: gana con bosques pequeños
+    y con varios núcleos, pero con el modelo que deja train_model (200
+    árboles de profundidad 20) en un solo núcleo es más lento que sklearn
+    (la versión NumPy, bastante más). Por eso scoring.py lo usa solo con
+    motor="plano"; antes de activarlo, mide con benchmarks/bench_inference.py
+    sobre el modelo real.
+    """
+
+    def __init__(self, arrays: dict, manifest: dict, compilado: bool = NUMBA_DISPONIBLE,
+                 n_hilos: int = 1):
+        if compilado and not NUMBA_DISPONIBLE:
+            raise ImportError("El motor compilado necesita numba (pip install numba)")
+        self.compilado = compilado
+        self.n_hilos = n_hilos
+        self.classes_ = np.asarray(manifest["clases"])
+        self.feature_names_in_ = np.asarray(manifest["features"], dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.n_estimators = manifest["n_estimators"]
+
+        es_hoja = np.asarray(arrays["hoja"]) >= 0
+        nodos = np.empty((len(es_hoja), 4), dtype=np.int32)
+        nodos[:, 0] = np.where(es_hoja, -1, arrays["feature"])
+        nodos[:, 1] = np.asarray(arrays["threshold"], dtype=np.float32).view(np.int32)
+        nodos[:, 2] = np.where(es_hoja, arrays["hoja"], arrays["izquierdo"])
+        nodos[:, 3] = arrays["derecho"]
+        self.nodos = nodos
+        self.umbrales = nodos.view(np.float32)
+        self.raices = np.ascontiguousarray(arrays["raices"], dtype=np.int32)
+        self.valores = np.ascontiguousarray(arrays["valores"], dtype=np.float64)
+
+        if not compilado:
+            # La versión NumPy avanza pares en bloque con gathers por columna,
+            # que van mejor con un array por campo y hojas apuntando a sí mismas
+            propios = np.arange(len(es_hoja))
+            self._feature = np.where(es_hoja, 0, arrays["feature"]).astype(np.intp)
+            self._threshold = np.ascontiguousarray(arrays["threshold"], dtype=np.float32)
+            self._hijos = np.column_stack([
+                np.where(es_hoja, propios, arrays["izquierdo"]),
+                np.where(es_hoja, propios, arrays["derecho"]),
+            ]).ravel().astype(np.intp)
+            self._hoja = np.asarray(arrays["hoja"], dtype=np.intp)
+
+    @classmethod
+    def from_model(cls, model, compilado: bool = NUMBA_DISPONIBLE, n_hilos: int = 1) -> "FlatForest":
+        """Desde un RandomForestClassifier o un CompactForest ya exportado."""
+        if isinstance(model, CompactForest):
+            arrays, manifest = {nombre: getattr(model, nombre) for nombre in ARRAYS}, model.manifest
+        else:
+            arrays, manifest = pack_forest(model)
+        return cls(arrays, manifest, compilado=compilado, n_hilos=n_hilos)
+
+    def _matriz(self, X) -> np.ndarray:
+        """Features en el orden del entrenamiento y en float32, como las ve sklearn."""
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)]
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Se esperaban {self.n_features_in_} features, llegaron {X.shape}")
+        if np.isnan(X).any():
+            raise ValueError("El motor plano no admite valores NaN")
+        return X
+
+    def _bloque_numpy(self, X: np.ndarray, salida: np.ndarray) -> None:
+        """Probabilidades de un bloque de filas sin numba, escritas en `salida`."""
+        n, n_arboles = len(X), self.n_estimators
+        plano = X.ravel()
+        feature, threshold, hijos, hoja = self._feature, self._threshold, self._hijos, self._hoja
+
+        # Estado compactado de los pares activos: par = fila * n_arboles + árbol
+        par = np.arange(n * n_arboles)
+        nodo = np.tile(self.raices.astype(np.intp), n)
+        desplazamiento = np.repeat(np.arange(n, dtype=np.intp) * X.shape[1], n_arboles)
+        final = np.empty(n * n_arboles, dtype=np.intp)
+
+        paso = 0
+        while par.size:
+            va_derecha = plano[desplazamiento + feature[nodo]] > threshold[nodo]
+            nodo = hijos[2 * nodo + va_derecha]
+            paso += 1
+            if paso % PASOS_ENTRE_PODAS == 0:
+                sigue = hoja[nodo] < 0
+                terminado = ~sigue
+                final[par[terminado]] = nodo[terminado]
+                par, nodo, desplazamiento = par[sigue], nodo[sigue], desplazamiento[sigue]
+
+        hojas = hoja[final].reshape(n, n_arboles)
+        salida[:] = 0.0
+        for t in range(n_arboles):
+            salida += self.valores[hojas[:, t]]
+        salida /= n_arboles
+
+    def predict_proba(self, X, n_hilos: int | None = None, tamano_bloque: int | None = None) -> np.ndarray:
+        """
+        Misma salida que RandomForestClassifier.predict_proba. n_hilos=None
+        usa el valor del constructor; -1 usa todos los núcleos.
+        """
+        X = self._matriz(X)
+        proba = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        n_hilos = n_hilos or self.n_hilos
+        if n_hilos == -1:
+            n_hilos = os.cpu_count() or 1
+
+        if self.compilado:
+            anteriores = numba.get_num_threads()
+            numba.set_num_threads(max(1, min(n_hilos, numba.config.NUMBA_NUM_THREADS)))
+            try:
+                # Al menos un bloque por hilo aunque haya pocas filas
+                tamano_bloque = tamano_bloque or min(TAMANO_BLOQUE, max(-(-len(X) // n_hilos), 64))
+                _proba_compilada(X, self.nodos, self.umbrales, self.raices, self.valores,
+                                 proba, tamano_bloque)
+            finally:
+                numba.set_num_threads(anteriores)
+            return proba
+
+        tamano_bloque = tamano_bloque or max(PARES_POR_BLOQUE // self.n_estimators, 64)
+        inicios = range(0, len(X), tamano_bloque)
+
+        def trabajo(inicio):
+            fin = inicio + tamano_bloque
+            self._bloque_numpy(X[inicio:fin], proba[inicio:fin])
+
+        if n_hilos > 1 and len(inicios) > 1:
+            with ThreadPoolExecutor(max_workers=n_hilos) as pool:
+                list(pool.map(trabajo, inicios))
+        else:
+            for inicio in inicios:
+                trabajo(inicio)
+        return proba
+
+    def predict(self, X, n_hilos: int | None = None, tamano_bloque: int | None = None) -> np.ndarray:
+        proba = self.predict_proba(X, n_hilos=n_hilos, tamano_bloque=tamano_bloque)
+        return self.classes_.take(np.argmax(proba, axis=1))
@@ -0,0 +1,330 @@
+# ingestion.py
+
+import json
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from calendar_table import fechas_por_codigo
+from encoding import COLUMNA_FILA
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+# Motor de lectura por defecto: el lector CSV de Arrow (multihilo) si está
+# instalado; si no, el de pandas en C. El modo por bloques siempre usa el de C.
+MOTORES = ("pyarrow", "c")
+MOTOR_POR_DEFECTO = "pyarrow" if PYARROW_DISPONIBLE else "c"
+
+DIRECTORIO_CUARENTENA = "data/cuarentena"
+
+# Fechas aceptadas, en orden: la exportación usa dd/mm/aaaa; ISO por si el
+# archivo pasó por otra herramienta
+FORMATOS_FECHA = ("%d/%m/%Y", "%Y-%m-%d")
+
+# Horas aceptadas: H:MM o HH:MM, con segundos opcionales y AM/PM opcional
+PATRON_HORA_VALIDA = r'^\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([AaPp]\.?\s*[Mm]\.?)?\s*$'
+
+# Vocabulario de 'ausencia': un valor se acepta si está vacío (Presente) o
+# contiene uno de estos términos; la clase es la que asigna preprocess
+TERMINOS_AUSENCIA = {'ausente': 1, 'tardanza': 2, 'tarde': 2, 'presente': 0}
+
+
+@dataclass(frozen=True)
+class Columna:
+    tipo: str                  # "texto", "fecha", "hora" o "ausencia"
+    obligatoria: bool = False  # vacía -> fila en cuarentena
+
+
+# Esquema de fichajes.csv con los nombres normalizados (strip + minúsculas).
+# Todas se leen como texto: nada de inferir tipos fila a fila.
+ESQUEMA_FICHAJES = {
+    'empleado_id': Columna("texto", obligatoria=True),
+    'nombre_empleado': Columna("texto"),
+    'fecha': Columna("fecha", obligatoria=True),
+    'hora_entrada_teorica': Columna("hora"),
+    'hora_entrada_real': Columna("hora"),
+    'hora_salida_teorica': Columna("hora"),
+    'hora_salida_real': Columna("hora"),
+    'ausencia': Columna("ausencia"),
+}
+
+
+def ruta_cuarentena(csv_path: str) -> str:
+    """data/raw/fichajes.csv -> data/cuarentena/fichajes_cuarentena.csv"""
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(DIRECTORIO_CUARENTENA, f"{base}_cuarentena.csv")
+
+
+def _ruta_validacion(ruta: str) -> str:
+    """Estadísticas de validación junto al archivo de cuarentena."""
+    return os.path.splitext(ruta)[0].removesuffix("_cuarentena") + "_validacion.json"
+
+
+def _columnas_archivo(csv_path: str, columnas: list[str] | None) -> tuple[dict[str, str], list[str], list[str]]:
+    """
+    Lee solo la cabecera y devuelve {nombre normalizado: nombre en el
+    archivo} de las columnas a leer, las del archivo que no están en el
+    esquema (no se leen) y las del esquema que no trae el archivo. Falla
+    si falta una columna pedida en `columnas` o, sin `columnas`, una
+    obligatoria.
+    """
+    cabecera = pd.read_csv(csv_path, nrows=0).columns
+    en_archivo = {c.strip().lower(): c for c in cabecera}
+    if columnas is None:
+        pedidas = [c for c in ESQUEMA_FICHAJES if c in en_archivo or ESQUEMA_FICHAJES[c].obligatoria]
+    else:
+        pedidas = list(columnas)
+    desconocidas = [c for c in pedidas if c not in ESQUEMA_FICHAJES]
+    if desconocidas:
+        raise ValueError(f"Columnas fuera del esquema de fichajes: {', '.join(desconocidas)}")
+    faltan = [c for c in pedidas if c not in en_archivo]
+    if faltan:
+        raise ValueError(f"Faltan columnas en {csv_path}: {', '.join(faltan)} "
+                         f"(cabecera: {', '.join(cabecera)})")
+    ignoradas = [en_archivo[c] for c in en_archivo if c not in ESQUEMA_FICHAJES]
+    ausentes = [c for c in ESQUEMA_FICHAJES if c not in en_archivo]
+    return {c: en_archivo[c] for c in pedidas}, ignoradas, ausentes
+
+
+def _leer(csv_path: str, nombres: dict[str, str], motor: str) -> pd.DataFrame:
+    """
+    Columnas `nombres` del CSV como texto (vacío -> nulo), ya con los nombres
+    normalizados. Se leen como categoría (diccionario en Arrow): cada
+    columna llega ya factorizada y la validación trabaja con sus valores
+    distintos sin volver a recorrer las filas.
+    """
+    if motor == "pyarrow":
+        if not PYARROW_DISPONIBLE:
+            raise ImportError("El motor 'pyarrow' necesita pyarrow (pip install pyarrow)")
+        opciones = pa_csv.ConvertOptions(
+            include_columns=list(nombres.values()),
+            column_types={original: pa.dictionary(pa.int32(), pa.string()) for original in nombres.values()},
+            strings_can_be_null=True,
+        )
+        df = pa_csv.read_csv(csv_path, convert_options=opciones).to_pandas()
+    elif motor == "c":
+        df = pd.read_csv(csv_path, usecols=list(nombres.values()),
+                         dtype={original: "category" for original in nombres.values()}, engine="c")
+    else:
+        raise ValueError(f"Motor desconocido: '{motor}' (usar {', '.join(MOTORES)})")
+    return df.rename(columns={original: nombre for nombre, original in nombres.items()})[list(nombres)]
+
+
+def _fechas_esquema(texto: pd.Series) -> pd.Series:
+    """Fechas de los valores distintos con el primer formato de FORMATOS_FECHA que encaje."""
+    fechas = pd.Series(pd.NaT, index=texto.index, dtype="datetime64[ns]")
+    for formato in FORMATOS_FECHA:
+        pendientes = fechas.isna()
+        if not pendientes.any():
+            break
+        fechas[pendientes] = pd.to_datetime(texto[pendientes], format=formato, errors='coerce')
+    return fechas
+
+
+def _horas_validas(texto: pd.Series) -> pd.Series:
+    """Valores que cumplen PATRON_HORA_VALIDA con horas, minutos y segundos en rango."""
+    partes = texto.str.extract(PATRON_HORA_VALIDA)
+    horas = pd.to_numeric(partes[0], errors='coerce')
+    limite = np.where(partes[3].notna(), 12, 23)
+    return ((horas <= limite) & (pd.to_numeric(partes[1], errors='coerce') < 60)
+            & (pd.to_numeric(partes[2], errors='coerce').fillna(0) < 60))
+
+
+def _ausencias_validas(texto: pd.Series) -> pd.Series:
+    """Valores que contienen algún término de TERMINOS_AUSENCIA."""
+    return texto.str.lower().str.contains("|".join(TERMINOS_AUSENCIA), regex=True)
+
+
+def _codigos(serie: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Código de cada fila y valores distintos; gratis si la columna ya es categoría."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    return pd.factorize(serie)
+
+
+def validate_fichajes(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Valida un DataFrame leído con el esquema (archivo completo o bloque).
+    Las comprobaciones se hacen sobre los valores distintos de cada columna.
+    Devuelve las filas válidas (con 'fecha' ya convertida a datetime y el
+    resto de columnas como texto), las filas en cuarentena (valores originales
+    más una columna 'motivo') y el recuento de filas por motivo y de
+    valores vacíos por columna.
+    """
+    motivos, vacios_columna, convertidas = {}, {}, {}
+    for nombre in df.columns:
+        columna = ESQUEMA_FICHAJES.get(nombre)
+        if columna is None:
+            continue
+        codigos, unicos = _codigos(df[nombre])
+        texto = pd.Series(unicos, dtype=object).str.strip()
+        # El código -1 (nulo) cae en la última posición
+        vacios = np.append((texto == "").to_numpy(dtype=bool), True)
+        vacias = vacios[codigos]
+        vacios_columna[nombre] = int(vacias.sum())
+        if columna.obligatoria:
+            motivos[f"{nombre}_vacia"] = vacias
+
+        if columna.tipo == "fecha":
+            fechas = _fechas_esquema(texto)
+            convertidas[nombre] = fechas_por_codigo(codigos, fechas, df[nombre])
+            validos = fechas.notna()
+        elif columna.tipo == "hora":
+            validos = _horas_validas(texto)
+        elif columna.tipo == "ausencia":
+            validos = _ausencias_validas(texto)
+        else:
+            continue
+        invalidos = np.append(~validos.to_numpy(dtype=bool), False) & ~vacios
+        motivo = "ausencia_desconocida" if columna.tipo == "ausencia" else f"{nombre}_invalida"
+        motivos[motivo] = invalidos[codigos]
+
+    malas = np.zeros(len(df), dtype=bool)
+    for mascara in motivos.values():
+        malas |= mascara
+
+    # Texto, no categoría, para el resto del pipeline (fillna, astype(str)...):
+    # las filas solo guardan referencias a los valores distintos
+    categoricas = {c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)}
+    cuarentena = df[malas].astype(categoricas)
+    if len(cuarentena):
+        # Solo se arma el texto del motivo para las filas malas (pocas)
+        etiquetas = [np.where(mascara[malas], motivo, "") for motivo, mascara in motivos.items()]
+        cuarentena['motivo'] = [";".join(e for e in fila if e) for fila in zip(*etiquetas)]
+    else:
+        cuarentena['motivo'] = pd.Series(dtype=object)
+
+    for nombre, serie in convertidas.items():
+        df[nombre] = serie
+        categoricas.pop(nombre, None)
+    recuento = {
+        "motivos": {motivo: int(mascara.sum()) for motivo, mascara in motivos.items() if mascara.any()},
+        "vacios": vacios_columna,
+    }
+    return df[~malas].astype(categoricas), cuarentena, recuento
+
+
+def _escribir_cuarentena(cuarentena: pd.DataFrame, ruta: str, anadir: bool):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    cuarentena.to_csv(ruta, mode="a" if anadir else "w", header=not anadir, index=False)
+
+
+def _estadisticas(csv_path: str, motor: str, nombres: dict, ignoradas: list[str], ausentes: list[str]) -> dict:
+    return {
+        "archivo": csv_path,
+        "motor": motor,
+        "columnas": list(nombres),
+        "columnas_ignoradas": ignoradas,
+        "columnas_ausentes": ausentes,
+        "filas": 0,
+        "validas": 0,
+        "cuarentena": 0,
+        "motivos": {},
+        "vacios": {nombre: 0 for nombre in nombres},
+        "segundos": 0.0,
+    }
+
+
+def _acumular(estadisticas: dict, df: pd.DataFrame, validas: pd.DataFrame, recuento: dict):
+    estadisticas["filas"] += len(df)
+    estadisticas["validas"] += len(validas)
+    estadisticas["cuarentena"] += len(df) - len(validas)
+    for motivo, n in recuento["motivos"].items():
+        estadisticas["motivos"][motivo] = estadisticas["motivos"].get(motivo, 0) + n
+    for nombre, n in recuento["vacios"].items():
+        estadisticas["vacios"][nombre] += n
+
+
+def _cerrar(estadisticas: dict, inicio: float, cuarentena: str | None, verbose: bool):
+    estadisticas["segundos"] = round(time.perf_counter() - inicio, 3)
+    if cuarentena:
+        estadisticas["archivo_cuarentena"] = cuarentena
+        with open(_ruta_validacion(cuarentena), "w", encoding="utf-8") as f:
+            json.dump(estadisticas, f, indent=2, ensure_ascii=False)
+    if verbose:
+        print(f"📥 {estadisticas['archivo']}: {estadisticas['filas']:,} filas leídas "
+              f"({estadisticas['motor']}, {estadisticas['segundos']:.2f} s), {estadisticas['validas']:,} válidas")
+        if estadisticas["cuarentena"]:
+            destino = f" -> {cuarentena}" if cuarentena else ""
+            print(f"⚠️  {estadisticas['cuarentena']:,} filas en cuarentena{destino}:")
+            for motivo, n in estadisticas["motivos"].items():
+                print(f"   - {motivo}: {n:,}")
+
+
+def read_fichajes(csv_path: str, columnas: list[str] | None = None, cuarentena: str | None = None,
+                  motor: str = MOTOR_POR_DEFECTO, verbose: bool = True) -> pd.DataFrame:
+    """
+    Lee fichajes.csv según ESQUEMA_FICHAJES: solo las columnas del esquema
+    que trae el archivo (o `columnas`), todas como texto, con los nombres normalizados y
+    COLUMNA_FILA (número de fila en el archivo) como primera columna.
+
+    Las filas que no cumplen el esquema (obligatorias vacías, fechas u
+    horas fuera de formato, ausencia fuera del vocabulario) se descartan;
+    con `cuarentena` se guardan en ese CSV con su motivo y las estadísticas
+    de validación en un JSON al lado (<archivo>_validacion.json). Las
+    estadísticas quedan también en df.attrs['validacion'].
+    """
+    inicio = time.perf_counter()
+    nombres, ignoradas, ausentes = _columnas_archivo(csv_path, columnas)
+    df = _leer(csv_path, nombres, motor)
+    df.insert(0, COLUMNA_FILA, np.arange(len(df), dtype=np.int64))
+
+    validas, malas, recuento = validate_fichajes(df)
+    estadisticas = _estadisticas(csv_path, motor, nombres, ignoradas, ausentes)
+    _acumular(estadisticas, df, validas, recuento)
+    if cuarentena:
+        _escribir_cuarentena(malas, cuarentena, anadir=False)
+    _cerrar(estadisticas, inicio, cuarentena, verbose)
+
+    validas = validas.reset_index(drop=True)
+    validas.attrs['validacion'] = estadisticas
+    return validas
+
+
+def iter_fichajes(csv_path: str, chunksize: int, columnas: list[str] | None = None,
+                  cuarentena: str | None = None, verbose: bool = True):
+    """
+    read_fichajes por bloques de `chunksize` filas (motor C de pandas).
+    COLUMNA_FILA sigue la numeración del archivo completo y la cuarentena
+    se va añadiendo bloque a bloque; las estadísticas de cada bloque son
+    las acumuladas hasta él.
+    """
+    inicio = time.perf_counter()
+    nombres, ignoradas, ausentes = _columnas_archivo(csv_path, columnas)
+    estadisticas = _estadisticas(csv_path, "c", nombres, ignoradas, ausentes)
+    lector = pd.read_csv(csv_path, usecols=list(nombres.values()),
+                         dtype={original: "category" for original in nombres.values()}, chunksize=chunksize)
+    for bloque in lector:
+        bloque = bloque.rename(columns={original: nombre for nombre, original in nombres.items()})[list(nombres)]
+        bloque.insert(0, COLUMNA_FILA, np.arange(estadisticas["filas"], estadisticas["filas"] + len(bloque),
+                                                 dtype=np.int64))
+        validas, malas, recuento = validate_fichajes(bloque)
+        if cuarentena:
+            _escribir_cuarentena(malas, cuarentena, anadir=estadisticas["filas"] > 0)
+        _acumular(estadisticas, bloque, validas, recuento)
+        validas = validas.reset_index(drop=True)
+        validas.attrs['validacion'] = estadisticas
+        yield validas
+    _cerrar(estadisticas, inicio, cuarentena, verbose)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Valida fichajes.csv contra el esquema y muestra las estadísticas")
+    parser.add_argument("csv", nargs="?", default="data/raw/fichajes.csv")
+    parser.add_argument("--motor", choices=MOTORES, default=MOTOR_POR_DEFECTO)
+    parser.add_argument("--cuarentena", default=None,
+                        help="CSV de filas rechazadas (por defecto data/cuarentena/<archivo>_cuarentena.csv)")
+    args = parser.parse_args()
+
+    df = read_fichajes(args.csv, cuarentena=args.cuarentena or ruta_cuarentena(args.csv), motor=args.motor)
+    print(json.dumps(df.attrs['validacion'], indent=2, ensure_ascii=False))
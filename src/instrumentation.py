@@ -0,0 +1,235 @@
+# instrumentation.py
+
+import cProfile
+import functools
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+    RESOURCE_DISPONIBLE = True
+except ImportError:            # Windows: sin ru_maxrss ni CPU de los hijos
+    RESOURCE_DISPONIBLE = False
+
+# Variables de entorno que activan la instrumentación sin tocar los scripts:
+#   AUSENCIAS_METRICAS=logs/metricas.jsonl  -> una línea JSON por etapa ejecutada
+#   AUSENCIAS_PERFIL=logs/perfiles          -> además, un volcado cProfile (.prof) por etapa
+#   AUSENCIAS_EJECUCION=<id>                -> identificador común a todas las etapas de una ejecución
+VARIABLE_METRICAS = "AUSENCIAS_METRICAS"
+VARIABLE_PERFIL = "AUSENCIAS_PERFIL"
+VARIABLE_EJECUCION = "AUSENCIAS_EJECUCION"
+
+# Cada cuánto se muestrea el RSS durante una etapa (para su pico propio)
+INTERVALO_MUESTREO_S = 0.02
+
+_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_config = {
+    "metricas": os.environ.get(VARIABLE_METRICAS) or None,
+    "perfil": os.environ.get(VARIABLE_PERFIL) or None,
+    "ejecucion": os.environ.get(VARIABLE_EJECUCION) or f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}",
+}
+_local = threading.local()
+_escritura = threading.Lock()
+
+
+def configure(metricas: str | None = None, perfil: str | None = None, ejecucion: str | None = None):
+    """
+    Activa (o con metricas=None desactiva) la instrumentación desde código,
+    con el mismo efecto que las variables de entorno.
+    """
+    _config["metricas"] = metricas
+    _config["perfil"] = perfil
+    if ejecucion:
+        _config["ejecucion"] = ejecucion
+
+
+def activa() -> bool:
+    return _config["metricas"] is not None
+
+
+def _rss_actual() -> int | None:
+    """RSS actual del proceso en bytes (Linux, /proc); None si no se puede leer."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGINA
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _rss_maximo() -> int:
+    """Máximo RSS del proceso desde que empezó, en bytes (ru_maxrss está en KB en Linux)."""
+    if not RESOURCE_DISPONIBLE:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _cpu_hijos() -> float:
+    """CPU de los procesos hijos ya terminados (p. ej. los del ProcessPoolExecutor de los reportes)."""
+    if not RESOURCE_DISPONIBLE:
+        return 0.0
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return uso.ru_utime + uso.ru_stime
+
+
+class _Muestreador(threading.Thread):
+    """Hilo que anota el mayor RSS visto mientras dura la etapa."""
+
+    def __init__(self):
+        super().__init__(name="muestreo-rss", daemon=True)
+        self.pico = _rss_actual() or 0
+        self._fin = threading.Event()
+
+    def run(self):
+        while not self._fin.wait(INTERVALO_MUESTREO_S):
+            self.pico = max(self.pico, _rss_actual() or 0)
+
+    def detener(self) -> int:
+        self._fin.set()
+        self.join()
+        return max(self.pico, _rss_actual() or 0)
+
+
+def registrar_filas(n: int):
+    """Filas procesadas por la etapa en curso (si la función no devuelve un DataFrame)."""
+    pila = getattr(_local, "pila", None)
+    if pila:
+        pila[-1]["filas"] = int(n)
+
+
+def _mb(valor: int | None) -> float | None:
+    return round(valor / 2**20, 1) if valor is not None else None
+
+
+def _escribir(registro: dict):
+    ruta = _config["metricas"]
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with _escritura, open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+def stage(nombre: str):
+    """
+    Decorador de etapa del pipeline. Con la instrumentación activa mide
+    tiempo real y de CPU, filas (len del DataFrame devuelto o
+    registrar_filas), filas/s y memoria (RSS al empezar, al terminar y pico
+    de la etapa), y añade una línea JSON al registro de métricas. Con
+    AUSENCIAS_PERFIL también vuelca un perfil cProfile de la etapa.
+
+    Desactivada, la llamada pasa directamente a la función: una sola
+    comprobación por llamada a la etapa, no por fila.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _config["metricas"] is None:
+                return funcion(*args, **kwargs)
+            return _medir(nombre, funcion, args, kwargs)
+        return envoltura
+    return decorador
+
+
+def _medir(nombre: str, funcion, args, kwargs):
+    pila = _local.__dict__.setdefault("pila", [])
+    padre = pila[-1]["etapa"] if pila else None
+    actual = {"etapa": nombre, "filas": None}
+    pila.append(actual)
+
+    # Un solo perfil a la vez: las etapas anidadas quedan dentro del de la exterior
+    perfil = None
+    if _config["perfil"] and not any(e.get("perfilando") for e in pila[:-1]):
+        perfil = cProfile.Profile()
+        actual["perfilando"] = True
+
+    muestreador = _Muestreador()
+    muestreador.start()
+    maximo_inicio = _rss_maximo()
+    rss_inicio = _rss_actual()
+    hijos_inicio = _cpu_hijos()
+    inicio_cpu = time.process_time()
+    inicio = time.perf_counter()
+    marca = datetime.now()
+    error = None
+    try:
+        if perfil is not None:
+            perfil.enable()
+        resultado = funcion(*args, **kwargs)
+        return resultado
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if perfil is not None:
+            perfil.disable()
+        segundos = time.perf_counter() - inicio
+        cpu = time.process_time() - inicio_cpu
+        cpu_hijos = _cpu_hijos() - hijos_inicio
+        pico_muestreado = muestreador.detener()
+        maximo_fin = _rss_maximo()
+        rss_fin = _rss_actual()
+        pila.pop()
+
+        filas = actual["filas"]
+        if filas is None and error is None and isinstance(resultado, pd.DataFrame):
+            filas = len(resultado)
+        registro = {
+            "ejecucion": _config["ejecucion"],
+            "etapa": nombre,
+            "padre": padre,
+            "inicio": marca.isoformat(timespec="milliseconds"),
+            "segundos": round(segundos, 4),
+            "cpu_segundos": round(cpu, 4),
+            "cpu_hijos_segundos": round(cpu_hijos, 4),
+            "filas": filas,
+            "filas_por_segundo": round(filas / segundos, 1) if filas and segundos > 0 else None,
+            "rss_inicio_mb": _mb(rss_inicio),
+            "rss_fin_mb": _mb(rss_fin),
+            # Si el máximo del proceso subió, ese es el pico de la etapa; si no, el muestreado.
+            # ru_maxrss (KB) y statm (páginas) no redondean igual: el pico nunca queda bajo el RSS final
+            "pico_rss_mb": _mb(max(maximo_fin if maximo_fin > maximo_inicio else pico_muestreado, rss_fin or 0)),
+            "pid": os.getpid(),
+            "maquina": socket.gethostname(),
+            "error": error,
+            "perfil": None,
+        }
+        if perfil is not None:
+            os.makedirs(_config["perfil"], exist_ok=True)
+            registro["perfil"] = os.path.join(_config["perfil"], f"{nombre}_{marca:%Y%m%d_%H%M%S}_{os.getpid()}.prof")
+            perfil.dump_stats(registro["perfil"])
+        _escribir(registro)
+
+
+def load_metrics(ruta: str) -> pd.DataFrame:
+    """Registro de métricas (JSON por línea) como DataFrame, para graficar su evolución."""
+    with open(ruta, encoding="utf-8") as f:
+        return pd.DataFrame([json.loads(linea) for linea in f if linea.strip()])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resumen del registro de métricas por etapa")
+    parser.add_argument("registro", nargs="?", default=os.environ.get(VARIABLE_METRICAS))
+    parser.add_argument("--ejecuciones", type=int, default=1, help="últimas ejecuciones a mostrar")
+    args = parser.parse_args()
+    if not args.registro:
+        parser.error(f"indica el registro o define {VARIABLE_METRICAS}")
+
+    metricas = load_metrics(args.registro)
+    ultimas = list(dict.fromkeys(metricas["ejecucion"]))[-args.ejecuciones:]
+    for ejecucion in ultimas:
+        etapas = metricas[metricas["ejecucion"] == ejecucion]
+        print(f"\n⏱️  Ejecución {ejecucion}")
+        print(f"   {'Etapa':<32s} {'Segundos':>9s} {'CPU':>9s} {'Filas':>12s} {'Filas/s':>12s} {'Pico MB':>9s}")
+        for _, e in etapas.iterrows():
+            nombre = ("  " if e["padre"] else "") + e["etapa"] + (" ❌" if e["error"] else "")
+            filas = f"{int(e['filas']):,}" if pd.notna(e["filas"]) else "-"
+            por_segundo = f"{e['filas_por_segundo']:,.0f}" if pd.notna(e["filas_por_segundo"]) else "-"
+            print(f"   {nombre:<32s} {e['segundos']:9.2f} {e['cpu_segundos']:9.2f} {filas:>12s} "
+                  f"{por_segundo:>12s} {e['pico_rss_mb']:9.1f}")
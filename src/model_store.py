@@ -0,0 +1,253 @@
+# model_store.py
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Versión del formato en disco; cambia si cambian los arrays o su significado
+VERSION_FORMATO = 1
+
+ARRAYS = ("raices", "profundidad", "feature", "threshold", "izquierdo", "derecho", "hoja", "valores")
+
+
+def ruta_compacta(model_path: str) -> str:
+    """models/random_forest.pkl -> models/random_forest_compacto/"""
+    return os.path.splitext(model_path)[0] + "_compacto"
+
+
+def _umbral_float32(threshold: np.ndarray) -> np.ndarray:
+    """
+    Redondea los umbrales a float32 hacia abajo. sklearn compara X en float32
+    con el umbral en float64; para cualquier x float32, x <= t equivale a
+    x <= (mayor float32 <= t), así que la reducción no cambia ninguna decisión.
+    """
+    t32 = threshold.astype(np.float32)
+    por_encima = t32.astype(np.float64) > threshold
+    t32[por_encima] = np.nextafter(t32[por_encima], np.float32(-np.inf))
+    return t32
+
+
+def pack_forest(model, precision_hojas: str = "float64") -> tuple[dict, dict]:
+    """
+    Empaqueta un RandomForestClassifier en arrays planos (todos los árboles
+    concatenados) y devuelve (arrays, manifest) sin escribir nada a disco.
+
+    - feature: int16, threshold: float32 (exacto, ver _umbral_float32)
+    - izquierdo/derecho: int32 con índices globales; las hojas apuntan a sí
+      mismas para poder recorrer todos los árboles con el mismo número de pasos
+    - valores: probabilidades de clase solo de las hojas, las mismas que
+      devuelve DecisionTreeClassifier.predict_proba. En float64 son exactas;
+      precision_hojas="float32" reduce el archivo a cambio de diferencias
+      del orden de 1e-8 en las probabilidades.
+    """
+    n_clases = len(model.classes_)
+
+    raices, profundidad = [], []
+    features, umbrales, izquierdos, derechos, hojas, valores = [], [], [], [], [], []
+    desplazamiento = 0
+    n_hojas = 0
+    for estimador in model.estimators_:
+        arbol = estimador.tree_
+        n = arbol.node_count
+        es_hoja = arbol.children_left == -1
+        propios = np.arange(n) + desplazamiento
+
+        raices.append(desplazamiento)
+        profundidad.append(arbol.max_depth)
+        features.append(np.where(es_hoja, 0, arbol.feature).astype(np.int16))
+        umbrales.append(_umbral_float32(np.where(es_hoja, 0.0, arbol.threshold)))
+        izquierdos.append(np.where(es_hoja, propios, arbol.children_left + desplazamiento).astype(np.int32))
+        derechos.append(np.where(es_hoja, propios, arbol.children_right + desplazamiento).astype(np.int32))
+
+        hoja = np.full(n, -1, dtype=np.int32)
+        hoja[es_hoja] = np.arange(es_hoja.sum(), dtype=np.int32) + n_hojas
+        hojas.append(hoja)
+
+        # Desde sklearn 1.4 tree_.value ya guarda fracciones y predict_proba
+        # las devuelve tal cual: se copian sin volver a normalizar
+        valores.append(arbol.value[es_hoja, 0, :n_clases])
+
+        desplazamiento += n
+        n_hojas += int(es_hoja.sum())
+
+    arrays = {
+        "raices": np.asarray(raices, dtype=np.int32),
+        "profundidad": np.asarray(profundidad, dtype=np.int16),
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(umbrales),
+        "izquierdo": np.concatenate(izquierdos),
+        "derecho": np.concatenate(derechos),
+        "hoja": np.concatenate(hojas),
+        "valores": np.concatenate(valores).astype(precision_hojas),
+    }
+    manifest = {
+        "version": VERSION_FORMATO,
+        "n_estimators": len(model.estimators_),
+        "n_nodos": int(desplazamiento),
+        "n_hojas": int(n_hojas),
+        "clases": np.asarray(model.classes_).tolist(),
+        "features": [str(c) for c in getattr(model, "feature_names_in_", range(model.n_features_in_))],
+        "max_profundidad": int(max(profundidad)),
+        "precision_hojas": precision_hojas,
+    }
+    return arrays, manifest
+
+
+def export_compact(model, output_dir: str, fuente: str | None = None,
+                   precision_hojas: str = "float64", sello_fuente: dict | None = None) -> dict:
+    """
+    Exporta un RandomForestClassifier como arrays planos .npy (uno por campo,
+    ver pack_forest) más un manifest.json. `fuente` es la huella del .pkl
+    del que sale, para que scoring.load_model detecte exportaciones viejas;
+    `sello_fuente` (tamaño y mtime del .pkl) le evita recalcularla al cargar.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    arrays, manifest = pack_forest(model, precision_hojas)
+    for nombre, array in arrays.items():
+        np.save(os.path.join(output_dir, f"{nombre}.npy"), np.ascontiguousarray(array))
+
+    manifest["fuente"] = fuente
+    manifest["sello_fuente"] = sello_fuente
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class CompactForest:
+    """
+    Bosque cargado desde el formato compacto. Los arrays se abren como memmap
+    la primera vez que se usan, así que cargar el modelo solo lee el manifest.
+
+    Expone classes_, feature_names_in_, predict_proba y predict con la misma
+    semántica que el RandomForestClassifier original.
+    """
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        with open(os.path.join(directorio, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest["version"] != VERSION_FORMATO:
+            raise ValueError(f"Formato de modelo compacto no soportado: versión {self.manifest['version']}")
+        self.classes_ = np.asarray(self.manifest["clases"])
+        self.feature_names_in_ = np.asarray(self.manifest["features"], dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.n_estimators = self.manifest["n_estimators"]
+        self._arrays = {}
+
+    def __getattr__(self, nombre):
+        # Carga perezosa: raices, feature, threshold... se mapean al primer acceso
+        if nombre in ARRAYS and "_arrays" in self.__dict__:
+            if nombre not in self._arrays:
+                self._arrays[nombre] = np.load(os.path.join(self.directorio, f"{nombre}.npy"), mmap_mode="r")
+            return self._arrays[nombre]
+        raise AttributeError(nombre)
+
+    def _matriz(self, X) -> np.ndarray:
+        """Features en el orden del entrenamiento y en float32, como las ve sklearn."""
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)]
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Se esperaban {self.n_features_in_} features, llegaron {X.shape}")
+        if np.isnan(X).any():
+            raise ValueError("El modelo compacto no admite valores NaN")
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """Índice global de la hoja alcanzada en cada árbol, forma (n_filas, n_arboles)."""
+        X = self._matriz(X)
+        n = len(X)
+        plano = X.ravel()
+        base = np.arange(n, dtype=np.int64) * X.shape[1]
+        feature, threshold = self.feature, self.threshold
+        izquierdo, derecho = self.izquierdo, self.derecho
+
+        resultado = np.empty((n, self.n_estimators), dtype=np.int32)
+        for t, (raiz, profundidad) in enumerate(zip(self.raices, self.profundidad)):
+            nodo = np.full(n, raiz, dtype=np.int32)
+            for _ in range(int(profundidad)):
+                va_izquierda = plano[base + feature[nodo]] <= threshold[nodo]
+                nodo = np.where(va_izquierda, izquierdo[nodo], derecho[nodo])
+            resultado[:, t] = nodo
+        return resultado
+
+    def predict_proba(self, X) -> np.ndarray:
+        hojas = self.hoja[self.apply(X)]
+        valores = self.valores
+        proba = np.zeros((hojas.shape[0], len(self.classes_)), dtype=np.float64)
+        # Suma árbol a árbol en el mismo orden que sklearn para obtener los mismos bits
+        for t in range(hojas.shape[1]):
+            proba += valores[hojas[:, t]]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def load_compact(directorio: str) -> CompactForest:
+    return CompactForest(directorio)
+
+
+def tamano_directorio(directorio: str) -> int:
+    return sum(os.path.getsize(os.path.join(directorio, f)) for f in os.listdir(directorio))
+
+
+def verificar_paridad(model, compacto: CompactForest, X: pd.DataFrame) -> dict:
+    """Compara probabilidades y clases del modelo compacto con el estimador de sklearn."""
+    proba_sklearn = model.predict_proba(X)
+    proba_compacta = compacto.predict_proba(X)
+    clases_sklearn = model.classes_.take(np.argmax(proba_sklearn, axis=1))
+    clases_compactas = compacto.classes_.take(np.argmax(proba_compacta, axis=1))
+    return {
+        "filas": len(X),
+        "max_diferencia_proba": float(np.abs(proba_sklearn - proba_compacta).max()),
+        "probabilidades_identicas": bool(np.array_equal(proba_sklearn, proba_compacta)),
+        "clases_distintas": int((clases_sklearn != clases_compactas).sum()),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import pickle
+
+    from encoding import matriz_features
+    from storage import load_table, ruta_datos
+
+    parser = argparse.ArgumentParser(description="Exporta el modelo al formato compacto y verifica la paridad")
+    parser.add_argument("--modelo", default="models/random_forest.pkl")
+    parser.add_argument("--precision-hojas", choices=["float64", "float32"], default="float64")
+    args = parser.parse_args()
+
+    from scoring import model_fingerprint, model_stamp
+
+    inicio = time.perf_counter()
+    with open(args.modelo, "rb") as f:
+        model = pickle.load(f)
+    carga_pickle = time.perf_counter() - inicio
+
+    directorio = ruta_compacta(args.modelo)
+    export_compact(model, directorio, fuente=model_fingerprint(args.modelo),
+                   precision_hojas=args.precision_hojas, sello_fuente=model_stamp(args.modelo))
+
+    inicio = time.perf_counter()
+    compacto = load_compact(directorio)
+    carga_compacta = time.perf_counter() - inicio
+
+    print(f"✅ Modelo compacto guardado en {directorio}/")
+    print(f"   Tamaño: {os.path.getsize(args.modelo) / 1e6:.2f} MB (pickle) -> "
+          f"{tamano_directorio(directorio) / 1e6:.2f} MB (compacto)")
+    print(f"   Carga:  {carga_pickle * 1000:.1f} ms (pickle) -> {carga_compacta * 1000:.1f} ms (compacto)")
+
+    df = load_table(ruta_datos("empleados_features"))
+    X = matriz_features(df)
+    paridad = verificar_paridad(model, compacto, X)
+    print(f"\n🔍 Paridad sobre {paridad['filas']:,} filas:")
+    print(f"   Diferencia máxima de probabilidad: {paridad['max_diferencia_proba']:.3e}")
+    print(f"   Probabilidades idénticas: {paridad['probabilidades_identicas']}")
+    print(f"   Clases distintas: {paridad['clases_distintas']}")
+    if paridad["clases_distintas"] > 0:
+        raise SystemExit("❌ El modelo compacto no coincide con el original")
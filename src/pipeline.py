@@ -0,0 +1,559 @@
+# pipeline.py
+#
+# Orquestador del pipeline completo: preprocess → features → train_model →
+# predict → (generate_report ∥ generate_individual_reports).
+#
+# Cada etapa declara qué rutas de la configuración lee y cuáles escribe; de
+# ahí salen las dependencias (el DAG). Antes de ejecutar una etapa se calcula
+# su clave: huella SHA-256 del contenido de sus entradas, de sus parámetros y
+# del código de sus módulos. Si la clave es la de la última ejecución y sus
+# salidas siguen intactas, la etapa se omite. Como las huellas son de
+# contenido, una etapa que se vuelve a ejecutar y produce exactamente lo
+# mismo no obliga a repetir las siguientes.
+#
+# Las etapas sin dependencias entre sí (los dos reportes) se ejecutan a la
+# vez, cada una en su propio proceso.
+#
+# Con parametros.train_model.modo=incremental el modelo se actualiza con
+# train_incremental.py en lugar de reentrenarse desde cero. Un modelo
+# actualizado aparte con train_incremental.py tampoco obliga a reentrenar:
+# su registro de entrenamiento lo identifica como salida válida.
+#
+# Uso (desde la raíz del repo):
+#   python src/pipeline.py [--config pipeline.json] [--param parametros.train_model.max_fits=50]
+#                          [--hasta predict] [--forzar [etapa ...]] [--plan]
+#   python src/pipeline.py --mostrar-config > pipeline.json
+
+import argparse
+import copy
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from aggregation import RUTA_MENSUAL_CSV
+from encoding import RUTA_VOCABULARIO, EmployeeVocabulary
+from features import build_features, load_history
+from generate_individual_reports import DIRECTORIO_REPORTES, generate_individual_reports
+from generate_report import RUTA_REPORTE, generate_html_report
+from history import RUTA_ESTADO
+from ingestion import ruta_cuarentena
+from model_store import ruta_compacta
+from instrumentation import VARIABLE_EJECUCION, VARIABLE_METRICAS, VARIABLE_PERFIL, configure
+from predict import predict_absences
+from preprocess import load_and_clean_data
+from scoring import RUTA_MODELO
+from sharding import DIRECTORIO_PARTICIONES
+from storage import DIRECTORIO_PROCESADOS, load_table, ruta_datos, save_table
+from train_incremental import VENTANA_EVALUACION_DIAS, cargar_entrenamiento, ruta_entrenamiento, train_incremental
+from train_model import MAX_AJUSTES_HALVING, train_model
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+
+TAMANO_LECTURA = 1 << 20
+
+# "completo": train_model (búsqueda de hiperparámetros); "incremental": train_incremental
+MODOS_ENTRENAMIENTO = ("completo", "incremental")
+
+# Rutas y parámetros por defecto: los mismos que usan los scripts sueltos
+CONFIG_POR_DEFECTO = {
+    "rutas": {
+        "fichajes": "data/raw/fichajes.csv",
+        # Filas de fichajes que no cumplen el esquema (ingestion.py)
+        "cuarentena": ruta_cuarentena("data/raw/fichajes.csv"),
+        "limpio": ruta_datos("empleados_clean"),
+        "features": ruta_datos("empleados_features"),
+        "vocabulario": RUTA_VOCABULARIO,
+        "historial": RUTA_ESTADO,
+        "modelo": RUTA_MODELO,
+        # Modelos por partición (sharding.py), para parametros.predict.particionado
+        "particiones": DIRECTORIO_PARTICIONES,
+        "puntuado": ruta_datos("predicciones_detalladas"),
+        "predicciones": ruta_datos("predicciones"),
+        "reporte": RUTA_REPORTE,
+        "mensual_csv": RUTA_MENSUAL_CSV,
+        "individuales": DIRECTORIO_REPORTES,
+        # Claves y huellas de la última ejecución de cada etapa
+        "estado": os.path.join(DIRECTORIO_PROCESADOS, "pipeline_estado.json"),
+    },
+    "parametros": {
+        "preprocess": {"incluir_salida": False},
+        "features": {"historial": False},
+        # modo="incremental": actualiza el modelo con train_incremental (completo si aún no hay modelo)
+        "train_model": {"modo": "completo", "busqueda": "halving", "max_fits": MAX_AJUSTES_HALVING,
+                        "max_seconds": None, "recurso": "n_samples", "memoria_compartida": False,
+                        "arboles_nuevos": None, "max_arboles": None, "ventana_dias": VENTANA_EVALUACION_DIAS,
+                        "solo_si_mejora": False},
+        "predict": {"incremental": False, "motor": "estandar", "particionado": False},
+        "generate_report": {},
+        "generate_individual_reports": {"procesos": 1, "incremental": False, "generado": None},
+    },
+    # Etapas ejecutándose a la vez como máximo
+    "concurrencia": 2,
+    # Instrumentación (instrumentation.py) de todas las etapas; None = desactivada
+    "metricas": None,
+    "perfil": None,
+}
+
+
+# ---------------------------------------------------------------------------
+# Etapas: cada una recibe la configuración completa y escribe sus salidas
+# ---------------------------------------------------------------------------
+
+def _preprocess(config: dict):
+    rutas, p = config["rutas"], config["parametros"]["preprocess"]
+    df = load_and_clean_data(rutas["fichajes"], incluir_salida=p["incluir_salida"], cuarentena=rutas["cuarentena"])
+    save_table(df, rutas["limpio"])
+
+
+def _features(config: dict):
+    rutas, p = config["rutas"], config["parametros"]["features"]
+    vocabulario = EmployeeVocabulary.load(rutas["vocabulario"])
+    # Con historial se continúa desde el estado y las features de la ejecución anterior
+    estado, anteriores = load_history(rutas["historial"], rutas["features"]) if p["historial"] else (False, None)
+    df = build_features(load_table(rutas["limpio"]), historial=estado, vocabulario=vocabulario,
+                        anteriores=anteriores)
+    # El estado antes que las features: si se corta entre ambos, el estado va por delante
+    # y la siguiente ejecución lo detecta (días ya procesados) y recalcula
+    if p["historial"]:
+        estado.save(rutas["historial"])
+    save_table(df, rutas["features"])
+    vocabulario.save(rutas["vocabulario"])
+
+
+def _train_model(config: dict):
+    rutas, p = config["rutas"], config["parametros"]["train_model"]
+    if p["modo"] not in MODOS_ENTRENAMIENTO:
+        raise ValueError(f"parametros.train_model.modo debe ser uno de {MODOS_ENTRENAMIENTO}")
+    if (p["modo"] == "incremental" and os.path.exists(rutas["modelo"])
+            and cargar_entrenamiento(rutas["modelo"]).get("marca_agua")):
+        train_incremental(rutas["features"], model_path=rutas["modelo"], arboles_nuevos=p["arboles_nuevos"],
+                          max_arboles=p["max_arboles"], ventana_dias=p["ventana_dias"],
+                          solo_si_mejora=p["solo_si_mejora"])
+        return
+    train_model(rutas["features"], busqueda=p["busqueda"], max_fits=p["max_fits"] or None,
+                max_seconds=p["max_seconds"], recurso=p["recurso"],
+                memoria_compartida=p["memoria_compartida"], model_path=rutas["modelo"])
+
+
+def _predict(config: dict):
+    rutas, p = config["rutas"], config["parametros"]["predict"]
+    predict_absences(rutas["features"], rutas["fichajes"], incremental=p["incremental"], motor=p["motor"],
+                     particionado=p["particionado"], model_path=rutas["modelo"],
+                     scored_path=rutas["puntuado"], output_path=rutas["predicciones"],
+                     particiones_path=rutas["particiones"])
+
+
+def _generate_report(config: dict):
+    rutas = config["rutas"]
+    generate_html_report(rutas["puntuado"], html_path=rutas["reporte"], csv_path=rutas["mensual_csv"])
+
+
+def _generate_individual_reports(config: dict):
+    rutas, p = config["rutas"], config["parametros"]["generate_individual_reports"]
+    generate_individual_reports(
+        rutas["puntuado"],
+        n_procesos=p["procesos"],
+        generado=datetime.fromisoformat(p["generado"]) if p["generado"] else None,
+        directorio=rutas["individuales"],
+        incremental=p["incremental"],
+        model_path=rutas["modelo"],
+    )
+
+
+@dataclass(frozen=True)
+class Etapa:
+    nombre: str
+    funcion: Callable[[dict], None]
+    entradas: tuple[str, ...]   # claves de config["rutas"]
+    salidas: tuple[str, ...]
+    modulos: tuple[str, ...]    # código de src/ del que depende el resultado
+    # Marca de la última actualización de sus salidas registrada por otra
+    # herramienta (train_incremental.py), si las salidas actuales son suyas
+    externa: Callable[[dict, dict], str | None] | None = None
+    # Entradas que solo se leen con ciertos parámetros (no las produce ninguna etapa)
+    opcionales: Callable[[dict], tuple[str, ...]] | None = None
+
+
+def _actualizacion_modelo(config: dict, cache: dict) -> str | None:
+    """
+    Huella del modelo que dejó la última actualización de train_incremental
+    (la guarda en su registro), si el modelo actual sigue siendo ese y la
+    copia compacta corresponde a él; None si no.
+    """
+    modelo = config["rutas"]["modelo"]
+    huella = cargar_entrenamiento(modelo).get("modelo")
+    if huella is None or huella != huella_archivo(modelo, cache):
+        return None
+    try:
+        with open(os.path.join(ruta_compacta(modelo), "manifest.json"), encoding="utf-8") as f:
+            fuente = json.load(f).get("fuente")
+    except (OSError, ValueError):
+        return None
+    return huella if fuente == huella else None
+
+
+def _particiones_predict(config: dict) -> tuple[str, ...]:
+    """Los modelos por partición solo son entrada de predict con particionado=True."""
+    return ("particiones",) if config["parametros"]["predict"]["particionado"] else ()
+
+
+ETAPAS = [
+    Etapa("preprocess", _preprocess, ("fichajes",), ("limpio", "cuarentena"),
+          ("preprocess", "ingestion", "calendar_table", "encoding", "storage")),
+    Etapa("features", _features, ("limpio",), ("features", "vocabulario", "historial"),
+          ("features", "calendar_table", "encoding", "history", "storage")),
+    Etapa("train_model", _train_model, ("features",), ("modelo", "modelo_compacto", "entrenamiento"),
+          ("train_model", "search", "shared_dataset", "model_store", "train_incremental", "encoding",
+           "storage"),
+          externa=_actualizacion_modelo),
+    Etapa("predict", _predict, ("features", "fichajes", "modelo"), ("puntuado", "predicciones"),
+          ("predict", "scoring", "sharding", "ingestion", "inference", "model_store", "calendar_table",
+           "encoding", "storage"),
+          opcionales=_particiones_predict),
+    Etapa("generate_report", _generate_report, ("puntuado",), ("reporte", "mensual_csv"),
+          ("generate_report", "aggregation", "render", "storage")),
+    Etapa("generate_individual_reports", _generate_individual_reports, ("puntuado", "modelo"),
+          ("individuales",),
+          ("generate_individual_reports", "aggregation", "render", "storage")),
+]
+
+
+def dependencias(etapas: list[Etapa]) -> dict[str, set[str]]:
+    """Etapa -> etapas que producen alguna de sus entradas. Falla si dos etapas escriben la misma salida."""
+    productor = {}
+    for etapa in etapas:
+        for salida in etapa.salidas:
+            if salida in productor:
+                raise ValueError(f"'{salida}' la escriben {productor[salida]} y {etapa.nombre}")
+            productor[salida] = etapa.nombre
+    return {etapa.nombre: {productor[e] for e in etapa.entradas if e in productor} for etapa in etapas}
+
+
+def seleccionar(etapas: list[Etapa], hasta: str | None = None) -> list[Etapa]:
+    """Con hasta=<etapa>, solo esa etapa y las que necesita (en orden)."""
+    if hasta is None:
+        return etapas
+    previas = dependencias(etapas)
+    necesarias, pendientes = set(), [hasta]
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in necesarias:
+            necesarias.add(nombre)
+            pendientes.extend(previas[nombre])
+    return [etapa for etapa in etapas if etapa.nombre in necesarias]
+
+
+# ---------------------------------------------------------------------------
+# Configuración
+# ---------------------------------------------------------------------------
+
+# Salidas que no se configuran porque las escribe la etapa junto a otra ruta:
+# la copia compacta del modelo y su registro de entrenamiento
+RUTAS_DERIVADAS = {
+    "modelo_compacto": lambda rutas: ruta_compacta(rutas["modelo"]),
+    "entrenamiento": lambda rutas: ruta_entrenamiento(rutas["modelo"]),
+}
+
+
+def entradas_de(etapa: Etapa, config: dict) -> tuple[str, ...]:
+    """Entradas de la etapa con esta configuración (las fijas más las opcionales que apliquen)."""
+    return etapa.entradas + (etapa.opcionales(config) if etapa.opcionales else ())
+
+
+def ruta_de(config: dict, nombre: str) -> str:
+    """Ruta de una entrada o salida de etapa (configurada o derivada)."""
+    rutas = config["rutas"]
+    return RUTAS_DERIVADAS[nombre](rutas) if nombre in RUTAS_DERIVADAS else rutas[nombre]
+
+
+def _fusionar(base: dict, cambios: dict, prefijo: str = "") -> dict:
+    """Aplica `cambios` sobre `base`; una clave que no existe en base es un error (erratas)."""
+    for clave, valor in cambios.items():
+        if clave not in base:
+            raise ValueError(f"Clave de configuración desconocida: '{prefijo}{clave}'")
+        if isinstance(base[clave], dict) and isinstance(valor, dict):
+            _fusionar(base[clave], valor, f"{prefijo}{clave}.")
+        else:
+            base[clave] = valor
+    return base
+
+
+def load_config(ruta: str | None = None, ajustes: list[str] = ()) -> dict:
+    """
+    CONFIG_POR_DEFECTO con lo que indique el JSON de `ruta` y los ajustes
+    'a.b.c=valor' (el valor se lee como JSON; si no lo es, como texto).
+    """
+    config = copy.deepcopy(CONFIG_POR_DEFECTO)
+    if ruta:
+        with open(ruta, encoding="utf-8") as f:
+            _fusionar(config, json.load(f))
+    for ajuste in ajustes:
+        clave, separador, texto = ajuste.partition("=")
+        if not separador:
+            raise ValueError(f"Ajuste sin '=': '{ajuste}' (usar seccion.clave=valor)")
+        try:
+            valor = json.loads(texto)
+        except json.JSONDecodeError:
+            valor = texto
+        cambio = valor
+        for parte in reversed(clave.split(".")):
+            cambio = {parte: cambio}
+        _fusionar(config, cambio)
+    return config
+
+
+# ---------------------------------------------------------------------------
+# Huellas de contenido
+# ---------------------------------------------------------------------------
+
+def huella_archivo(ruta: str, cache: dict) -> str | None:
+    """
+    SHA-256 del contenido de un archivo (o de todos los de un directorio,
+    con sus rutas relativas); None si no existe. `cache` guarda la huella
+    junto al tamaño y la fecha de modificación: mientras no cambien no se
+    vuelve a leer el archivo (el CSV de fichajes puede ocupar GB).
+    """
+    if os.path.isdir(ruta):
+        h = hashlib.sha256()
+        for raiz, directorios, archivos in os.walk(ruta):
+            directorios.sort()
+            for archivo in sorted(archivos):
+                completa = os.path.join(raiz, archivo)
+                h.update(os.path.relpath(completa, ruta).encode("utf-8"))
+                h.update((huella_archivo(completa, cache) or "").encode("utf-8"))
+        return h.hexdigest()
+    try:
+        info = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+
+    firma = [info.st_size, info.st_mtime_ns]
+    clave = os.path.abspath(ruta)
+    previa = cache.get(clave)
+    if previa and previa["firma"] == firma:
+        return previa["sha256"]
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        while bloque := f.read(TAMANO_LECTURA):
+            h.update(bloque)
+    cache[clave] = {"firma": firma, "sha256": h.hexdigest()}
+    return cache[clave]["sha256"]
+
+
+def clave_etapa(etapa: Etapa, config: dict, cache: dict) -> str:
+    """Huella de todo lo que determina el resultado de la etapa."""
+    contenido = {
+        "etapa": etapa.nombre,
+        "parametros": config["parametros"][etapa.nombre],
+        "entradas": {e: huella_archivo(ruta_de(config, e), cache) for e in entradas_de(etapa, config)},
+        "salidas": {s: ruta_de(config, s) for s in etapa.salidas},
+        "codigo": {m: huella_archivo(os.path.join(SRC, f"{m}.py"), cache) for m in etapa.modulos},
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def huellas_salidas(etapa: Etapa, config: dict, cache: dict) -> dict[str, str | None]:
+    return {s: huella_archivo(ruta_de(config, s), cache) for s in etapa.salidas}
+
+
+def _cargar_estado(ruta: str) -> dict:
+    if not os.path.exists(ruta):
+        return {"etapas": {}, "huellas": {}}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _guardar_estado(ruta: str, estado: dict):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def al_dia(etapa: Etapa, clave: str, config: dict, estado: dict) -> bool:
+    """
+    Misma clave que la última ejecución correcta y las salidas tal como
+    quedaron. Una salida que esa ejecución no escribió (el estado del
+    historial con historial=False) vale mientras siga sin existir.
+
+    Salidas cambiadas por una actualización externa registrada y nueva
+    (etapa.externa: un modelo actualizado con train_incremental.py) también
+    valen: se anotan en `estado` como si las hubiera escrito la etapa, así
+    que después de eso cualquier otro cambio vuelve a invalidarlas.
+    """
+    anterior = estado["etapas"].get(etapa.nombre)
+    if not anterior or anterior["clave"] != clave:
+        return False
+    salidas = huellas_salidas(etapa, config, estado["huellas"])
+    if salidas == anterior["salidas"]:
+        return True
+    marca = etapa.externa(config, estado["huellas"]) if etapa.externa else None
+    if marca is None or marca == anterior.get("externa"):
+        return False
+    anterior.update(salidas=salidas, externa=marca)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Ejecución
+# ---------------------------------------------------------------------------
+
+def _ejecutar(etapa: Etapa, config: dict) -> float:
+    """Cuerpo de cada proceso de etapa."""
+    inicio = time.perf_counter()
+    etapa.funcion(config)
+    return time.perf_counter() - inicio
+
+
+def _activar_instrumentacion(config: dict):
+    """
+    Las etapas corren en procesos nuevos: la instrumentación les llega por
+    las variables de entorno, con un identificador de ejecución común.
+    """
+    if not config["metricas"]:
+        return
+    ejecucion = f"pipeline_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+    os.environ[VARIABLE_METRICAS] = config["metricas"]
+    os.environ[VARIABLE_EJECUCION] = ejecucion
+    if config["perfil"]:
+        os.environ[VARIABLE_PERFIL] = config["perfil"]
+    configure(config["metricas"], config["perfil"], ejecucion)
+
+
+def plan_pipeline(config: dict, hasta: str | None = None, forzar: set[str] = frozenset()) -> dict[str, str]:
+    """
+    Qué haría run_pipeline sin ejecutar nada: 'omitir', 'ejecutar' o
+    'ejecutar (dependencia)' cuando una etapa previa se va a ejecutar (su
+    clave solo se conocerá con las nuevas salidas de esa etapa).
+    """
+    etapas = seleccionar(ETAPAS, hasta)
+    previas = dependencias(etapas)
+    estado = _cargar_estado(config["rutas"]["estado"])
+    plan = {}
+    for etapa in etapas:
+        if any(plan[p] != "omitir" for p in previas[etapa.nombre]):
+            plan[etapa.nombre] = "ejecutar (dependencia)"
+        elif etapa.nombre in forzar:
+            plan[etapa.nombre] = "ejecutar (forzada)"
+        else:
+            clave = clave_etapa(etapa, config, estado["huellas"])
+            plan[etapa.nombre] = "omitir" if al_dia(etapa, clave, config, estado) else "ejecutar"
+    return plan
+
+
+def run_pipeline(config: dict, hasta: str | None = None, forzar: set[str] = frozenset()) -> dict[str, dict]:
+    """
+    Ejecuta las etapas en orden de dependencias, hasta config["concurrencia"]
+    a la vez, omitiendo las que están al día (salvo las de `forzar`). El
+    estado se guarda al terminar cada etapa: si una falla, la siguiente
+    ejecución retoma desde ella. Devuelve, por etapa, su resultado
+    ('ejecutada', 'omitida', 'fallida' o 'cancelada') y sus segundos.
+    """
+    etapas = seleccionar(ETAPAS, hasta)
+    previas = dependencias(etapas)
+    ruta_estado = config["rutas"]["estado"]
+    estado = _cargar_estado(ruta_estado)
+    _activar_instrumentacion(config)
+
+    resumen = {}
+    pendientes = {etapa.nombre: etapa for etapa in etapas}
+    terminadas, fallidas = set(), set()
+    en_curso = {}
+    print(f"🚀 Pipeline: {len(etapas)} etapas (concurrencia {config['concurrencia']})")
+
+    # Un proceso nuevo por etapa: la memoria de una etapa no se arrastra a la siguiente
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=config["concurrencia"], mp_context=contexto,
+                             max_tasks_per_child=1) as pool:
+        while pendientes or en_curso:
+            for nombre, etapa in list(pendientes.items()):
+                if previas[nombre] & fallidas:
+                    del pendientes[nombre]
+                    fallidas.add(nombre)
+                    resumen[nombre] = {"resultado": "cancelada", "segundos": 0.0}
+                    continue
+                if not previas[nombre] <= terminadas:
+                    continue
+                del pendientes[nombre]
+                clave = clave_etapa(etapa, config, estado["huellas"])
+                if nombre not in forzar and al_dia(etapa, clave, config, estado):
+                    print(f"⏭️  {nombre}: sin cambios en sus entradas, se omite")
+                    _guardar_estado(ruta_estado, estado)
+                    terminadas.add(nombre)
+                    resumen[nombre] = {"resultado": "omitida", "segundos": 0.0}
+                    continue
+                print(f"▶️  {nombre}")
+                en_curso[pool.submit(_ejecutar, etapa, config)] = (etapa, clave)
+
+            if not en_curso:
+                # ETAPAS está en orden de dependencias: una pasada resuelve todo lo omitible
+                if pendientes:
+                    raise RuntimeError(f"Etapas que no se pueden ejecutar: {sorted(pendientes)}")
+                break
+
+            listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                etapa, clave = en_curso.pop(futuro)
+                try:
+                    segundos = futuro.result()
+                except Exception as e:
+                    print(f"❌ {etapa.nombre}: {type(e).__name__}: {e}")
+                    fallidas.add(etapa.nombre)
+                    resumen[etapa.nombre] = {"resultado": "fallida", "segundos": None}
+                    continue
+                estado["etapas"][etapa.nombre] = {
+                    "clave": clave,
+                    "salidas": huellas_salidas(etapa, config, estado["huellas"]),
+                    "externa": etapa.externa(config, estado["huellas"]) if etapa.externa else None,
+                    "fin": datetime.now().isoformat(timespec="seconds"),
+                    "segundos": round(segundos, 3),
+                }
+                _guardar_estado(ruta_estado, estado)
+                terminadas.add(etapa.nombre)
+                resumen[etapa.nombre] = {"resultado": "ejecutada", "segundos": round(segundos, 3)}
+                print(f"✅ {etapa.nombre} ({segundos:.1f} s)")
+    return resumen
+
+
+if __name__ == "__main__":
+    nombres = [etapa.nombre for etapa in ETAPAS]
+    parser = argparse.ArgumentParser(description="Pipeline completo con etapas omitibles y reportes en paralelo")
+    parser.add_argument("--config", default=None, help="JSON con rutas y parámetros (ver --mostrar-config)")
+    parser.add_argument("--param", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="ajuste puntual, p. ej. parametros.train_model.max_fits=50 (repetible)")
+    parser.add_argument("--hasta", choices=nombres, default=None, help="ejecutar solo hasta esta etapa")
+    parser.add_argument("--forzar", nargs="*", choices=nombres, default=None,
+                        help="ejecutar estas etapas aunque estén al día (sin nombres: todas)")
+    parser.add_argument("--plan", action="store_true", help="mostrar qué se ejecutaría, sin ejecutar")
+    parser.add_argument("--mostrar-config", action="store_true", help="imprimir la configuración efectiva")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config, args.param)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.mostrar_config:
+        print(json.dumps(config, indent=2, ensure_ascii=False))
+        raise SystemExit(0)
+
+    forzar = set(nombres) if args.forzar == [] else set(args.forzar or ())
+    if args.plan:
+        for nombre, accion in plan_pipeline(config, args.hasta, forzar).items():
+            print(f"   {nombre:<30s} {accion}")
+        raise SystemExit(0)
+
+    inicio = time.perf_counter()
+    resumen = run_pipeline(config, args.hasta, forzar)
+    print(f"\n📋 Resumen ({time.perf_counter() - inicio:.1f} s)")
+    for nombre, r in resumen.items():
+        segundos = f"{r['segundos']:9.2f} s" if r["segundos"] is not None else "        -  "
+        print(f"   {nombre:<30s} {r['resultado']:<10s} {segundos}")
+    if any(r["resultado"] in ("fallida", "cancelada") for r in resumen.values()):
+        raise SystemExit("❌ El pipeline no terminó")
@@ -1,27 +1,41 @@
 # Predict.py
 
-import pandas as pd
-import pickle
-
-def predict_absences(input_path: str):
-    # Cargar modelo
-    with open("models/random_forest.pkl", "rb") as f:
-        model = pickle.load(f)
+import argparse
 
-    # Cargar datos
-    df = pd.read_csv(input_path)
+import pandas as pd
 
-    # ✅ Eliminar la columna objetivo si existe
-    if "ausencia" in df.columns:
-        df = df.drop(columns=["ausencia"])
+from instrumentation import registrar_filas, stage
+from scoring import MOTORES, RUTA_MODELO, score_dataset
+from storage import ruta_datos, save_table
 
-    # Hacer predicciones
-    predictions = model.predict(df)
+@stage("predict_absences")
+def predict_absences(input_path: str, original_csv_path: str = "data/raw/fichajes.csv",
+                     incremental: bool = False, motor: str = "estandar", particionado: bool = False,
+                     model_path: str = RUTA_MODELO, scored_path: str | None = None,
+                     output_path: str | None = None, particiones_path: str | None = None):
+    # ✅ Inferencia única: genera el dataset puntuado que usan también los reportes
+    # (incremental=True solo puntúa las filas nuevas o modificadas)
+    # (particionado=True usa los modelos por partición de sharding.py)
+    reporte = score_dataset(input_path, original_csv_path, output_path=scored_path, model_path=model_path,
+                            incremental=incremental, motor=motor, particionado=particionado,
+                            particiones_path=particiones_path)
+    registrar_filas(len(reporte))
 
     # Guardar resultados
-    output = pd.DataFrame(predictions, columns=["prediccion"])
-    output.to_csv("data/processed/predicciones.csv", index=False)
-    print("✅ Predicciones guardadas en data/processed/predicciones.csv")
+    output = pd.DataFrame({"prediccion": reporte["prediccion"].to_numpy()})
+    ruta_salida = output_path or ruta_datos("predicciones")
+    save_table(output, ruta_salida)
+    print(f"✅ Predicciones guardadas en {ruta_salida}")
 
 if __name__ == "__main__":
-    predict_absences("data/processed/empleados_features.csv")
+    parser = argparse.ArgumentParser(description="Predicción de ausencias")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reutilizar la caché de puntuaciones y puntuar solo filas nuevas o modificadas")
+    parser.add_argument("--motor", choices=MOTORES, default="estandar",
+                        help="'plano' usa el motor de inferencia de inference.py (no siempre más rápido "
+                             "que sklearn: mídelo antes con benchmarks/bench_inference.py)")
+    parser.add_argument("--particionado", action="store_true",
+                        help="enrutar cada fila al modelo de su partición (ver sharding.py)")
+    args = parser.parse_args()
+    predict_absences(ruta_datos("empleados_features"), incremental=args.incremental, motor=args.motor,
+                     particionado=args.particionado)
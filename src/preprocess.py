@@ -1,31 +1,135 @@
 import pandas as pd
 import numpy as np
 
-def load_and_clean_data(csv_path: str) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
+from calendar_table import join_calendar, parse_fechas
+from encoding import COLUMNA_FILA
+from ingestion import read_fichajes, ruta_cuarentena
+from instrumentation import stage
+from storage import ruta_datos, save_table
 
+# Formato explícito HH:MM o HH:MM:SS (ruta rápida, sin pasar por el parser genérico)
+PATRON_HORA = r'^(\d{1,2}):(\d{2})(?::(\d{2}))?$'
+
+NS_POR_SEGUNDO = 1_000_000_000
+
+
+def _hora_a_ns_generico(valor) -> float:
+    """Ruta lenta: interpreta la hora con pd.to_datetime (mismo criterio que antes)."""
+    try:
+        t = pd.to_datetime(valor).time()
+    except Exception:
+        return np.nan
+    return float(
+        (t.hour * 3600 + t.minute * 60 + t.second) * NS_POR_SEGUNDO
+        + t.microsecond * 1000
+    )
+
+
+def parse_horas(serie: pd.Series) -> tuple[np.ndarray, int]:
+    """
+    Convierte una columna de horas a nanosegundos desde medianoche.
+
+    Solo se interpretan los valores distintos (hay pocos cientos frente a
+    cientos de miles de filas): los que cumplen HH:MM[:SS] se convierten
+    con aritmética vectorizada y el resto pasa por pd.to_datetime uno a uno.
+    Devuelve el array (NaN donde falta o no se puede interpretar) y el
+    número de filas con un valor presente pero no interpretable.
+    """
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Series(unicos, dtype=object)
+
+    partes = unicos.astype(str).str.extract(PATRON_HORA)
+    horas = pd.to_numeric(partes[0], errors='coerce')
+    minutos = pd.to_numeric(partes[1], errors='coerce')
+    segundos = pd.to_numeric(partes[2], errors='coerce').fillna(0)
+
+    # Valores que no son texto (p. ej. números) siempre van por la ruta lenta
+    es_texto = unicos.map(lambda v: isinstance(v, str))
+    rapido = es_texto & horas.notna() & (horas < 24) & (minutos < 60) & (segundos < 60)
+
+    valores = ((horas * 3600 + minutos * 60 + segundos) * NS_POR_SEGUNDO).to_numpy(dtype=float)
+    for i in np.flatnonzero(~rapido.to_numpy()):
+        valores[i] = _hora_a_ns_generico(unicos.iat[i])
+
+    resultado = np.full(len(serie), np.nan)
+    presentes = codigos >= 0
+    resultado[presentes] = valores[codigos[presentes]]
+
+    no_interpretables = int(np.isnan(resultado[presentes]).sum())
+    return resultado, no_interpretables
+
+
+def diferencia_minutos(df: pd.DataFrame, col_desde: str, col_hasta: str) -> tuple[pd.Series, dict]:
+    """
+    Minutos entre dos columnas de hora (col_hasta - col_desde), calculado
+    por columnas. Devuelve la serie y un resumen de filas sin valor.
+    """
+    desde, invalidas_desde = parse_horas(df[col_desde])
+    hasta, invalidas_hasta = parse_horas(df[col_hasta])
+
+    diff = pd.Series((hasta - desde) / NS_POR_SEGUNDO / 60, index=df.index)
+    resumen = {
+        col_desde: invalidas_desde,
+        col_hasta: invalidas_hasta,
+        'filas_sin_valor': int(diff.isna().sum()),
+    }
+    return diff, resumen
+
+
+@stage("load_and_clean_data")
+def load_and_clean_data(csv_path: str, incluir_salida: bool = False,
+                        cuarentena: str | None = None) -> pd.DataFrame:
+    """
+    Lee fichajes.csv validado contra el esquema (ingestion.py) y lo limpia.
+    Las filas rechazadas van a `cuarentena` (por defecto
+    data/cuarentena/<archivo>_cuarentena.csv).
+    """
+    df = read_fichajes(csv_path, cuarentena=cuarentena or ruta_cuarentena(csv_path))
+    return clean_data(df, incluir_salida=incluir_salida)
+
+
+def clean_data(df: pd.DataFrame, incluir_salida: bool = False,
+               formato_fecha: str | None = None, verbose: bool = True) -> pd.DataFrame:
+    """
+    Limpieza de un DataFrame de fichajes ya leído (archivo completo o bloque).
+
+    formato_fecha fija el formato de 'fecha' si todavía es texto (con
+    ingestion.py ya llega convertida con los formatos del esquema).
+    Los datos leídos con ingestion.py ya traen COLUMNA_FILA; si no, se
+    numeran las filas del DataFrame.
+    """
     # Normalizar nombres de columnas
     df.columns = [c.strip().lower() for c in df.columns]
 
-    # Convertir fecha a datetime
-    df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce', dayfirst=True)
+    # Clave estable de cada fichaje (encoding.COLUMNA_FILA): su fila en el archivo
+    if COLUMNA_FILA not in df.columns:
+        df.insert(0, COLUMNA_FILA, np.arange(len(df), dtype=np.int64))
+
+    # Convertir fecha a datetime (solo los valores distintos)
+    df['fecha'] = parse_fechas(df['fecha'], formato=formato_fecha)
+
+    # Crear columnas derivadas (de la dimensión calendario)
+    df['dia_semana'] = join_calendar(df['fecha'], ['dia_semana'])['dia_semana']  # 0=lunes, 6=domingo
 
-    # Crear columnas derivadas
-    df['dia_semana'] = df['fecha'].dt.dayofweek  # 0=lunes, 6=domingo
+    # Calcular diferencias de horas (en minutos) por columnas
+    df['tardanza_min'], resumen_horas = diferencia_minutos(
+        df, 'hora_entrada_teorica', 'hora_entrada_real'
+    )
 
-    # Convertir horas a datetime.time y calcular diferencias (en minutos)
-    def time_diff(row):
-        try:
-            entrada_teo = pd.to_datetime(row['hora_entrada_teorica']).time()
-            entrada_real = pd.to_datetime(row['hora_entrada_real']).time()
-            diff = (
-                pd.to_datetime(str(entrada_real)) - pd.to_datetime(str(entrada_teo))
-            ).total_seconds() / 60
-            return diff
-        except:
-            return np.nan
+    if incluir_salida:
+        # Minutos de salida anticipada (positivo = se fue antes de hora)
+        df['salida_anticipada_min'], resumen_salida = diferencia_minutos(
+            df, 'hora_salida_real', 'hora_salida_teorica'
+        )
+        resumen_horas.update({k: v for k, v in resumen_salida.items() if k != 'filas_sin_valor'})
+        resumen_horas['filas_sin_valor_salida'] = resumen_salida['filas_sin_valor']
 
-    df['tardanza_min'] = df.apply(time_diff, axis=1)
+    # ✅ Reportar horas no interpretables en lugar de ocultarlas
+    invalidas = {k: v for k, v in resumen_horas.items() if k.startswith('hora_') and v > 0}
+    if invalidas and verbose:
+        print("\n⚠️  Horas no interpretables (se tratarán como 0):")
+        for col, n in invalidas.items():
+            print(f"   - {col}: {n} filas")
 
     # ✅ NUEVO: Convertir columna "ausencia" a clasificación multiclase
     # 0 = Presente
@@ -46,10 +150,11 @@ def load_and_clean_data(csv_path: str) -> pd.DataFrame:
     df['ausencia'] = df['ausencia'].apply(clasificar_ausencia)
     
     # ✅ Verificar la distribución
-    print("\n📊 Distribución de clases:")
-    print(df['ausencia'].value_counts().sort_index())
-    print("\n📈 Porcentajes:")
-    print(df['ausencia'].value_counts(normalize=True).sort_index() * 100)
+    if verbose:
+        print("\n📊 Distribución de clases:")
+        print(df['ausencia'].value_counts().sort_index())
+        print("\n📈 Porcentajes:")
+        print(df['ausencia'].value_counts(normalize=True).sort_index() * 100)
     
     # Rellenar nulos numéricos con 0
     df = df.fillna(0)
@@ -57,6 +162,7 @@ def load_and_clean_data(csv_path: str) -> pd.DataFrame:
     # Quitar columnas no útiles
     df = df.drop(columns=['nombre_empleado'], errors='ignore')
 
+    df.attrs['resumen_horas'] = resumen_horas
     return df
 
 if __name__ == "__main__":
@@ -68,5 +174,6 @@ if __name__ == "__main__":
     print("\n✅ Columnas finales:")
     print(data.columns.tolist())
     
-    data.to_csv("data/processed/empleados_clean.csv", index=False)
-    print("\n💾 Archivo guardado: data/processed/empleados_clean.csv")
\ No newline at end of file
+    ruta_salida = ruta_datos("empleados_clean")
+    save_table(data, ruta_salida)
+    print(f"\n💾 Archivo guardado: {ruta_salida}")
\ No newline at end of file
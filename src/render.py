@@ -0,0 +1,637 @@
+# render.py
+
+import hashlib
+import html
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Los reportes enlazan esta hoja de estilos en lugar de llevarla dentro
+DIRECTORIO_ESTATICOS = "reports/static"
+ARCHIVO_CSS = "reportes.css"
+
+# Estilos comunes (reporte general) y ajustes del reporte individual (body.individual)
+CSS = """\
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    padding: 20px;
+    min-height: 100vh;
+}
+.container {
+    max-width: 1400px;
+    margin: 0 auto;
+    background: white;
+    border-radius: 15px;
+    box-shadow: 0 20px 60px rgba(0,0,0,0.3);
+    overflow: hidden;
+}
+.header {
+    background: linear-gradient(135deg, #2c3e50 0%, #34495e 100%);
+    color: white;
+    padding: 30px;
+    text-align: center;
+}
+.header h1 { font-size: 36px; margin-bottom: 10px; }
+.header p { opacity: 0.9; font-size: 14px; }
+.summary {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+    gap: 20px;
+    padding: 30px;
+    background: #f8f9fa;
+}
+.card {
+    background: white;
+    padding: 25px;
+    border-radius: 10px;
+    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+    text-align: center;
+    transition: transform 0.3s;
+}
+.card:hover {
+    transform: translateY(-5px);
+    box-shadow: 0 8px 12px rgba(0,0,0,0.15);
+}
+.card h3 {
+    font-size: 14px;
+    color: #7f8c8d;
+    margin-bottom: 15px;
+    text-transform: uppercase;
+    letter-spacing: 1px;
+}
+.card .value {
+    font-size: 42px;
+    font-weight: bold;
+    margin-bottom: 10px;
+}
+.card .percentage { font-size: 16px; color: #95a5a6; }
+.content { padding: 30px; }
+h2 {
+    color: #2c3e50;
+    margin: 30px 0 20px 0;
+    padding-bottom: 10px;
+    border-bottom: 3px solid #3498db;
+}
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 20px 0;
+    background: white;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    border-radius: 8px;
+    overflow: hidden;
+}
+th {
+    background: linear-gradient(135deg, #34495e 0%, #2c3e50 100%);
+    color: white;
+    padding: 15px;
+    text-align: left;
+    font-weight: 600;
+    text-transform: uppercase;
+    font-size: 12px;
+    letter-spacing: 1px;
+}
+td { padding: 12px 15px; border-bottom: 1px solid #ecf0f1; }
+tr:hover { background-color: #f8f9fa; }
+tr:last-child td { border-bottom: none; }
+.badge {
+    padding: 6px 12px;
+    border-radius: 20px;
+    font-weight: bold;
+    font-size: 11px;
+    text-transform: uppercase;
+    display: inline-block;
+}
+.badge-presente { background: #d4edda; color: #155724; }
+.badge-tardanza { background: #fff3cd; color: #856404; }
+.high-risk { background-color: #fff5f5 !important; }
+.prob-bar {
+    height: 8px;
+    background: #ecf0f1;
+    border-radius: 4px;
+    overflow: hidden;
+    margin-top: 5px;
+}
+.prob-fill { height: 100%; transition: width 0.3s; }
+.prob-fill-yellow { background: linear-gradient(90deg, #f39c12, #e67e22); }
+.prob-fill-green { background: linear-gradient(90deg, #2ecc71, #27ae60); }
+.nota { color: #7f8c8d; margin-bottom: 15px; font-size: 14px; }
+.dato { font-size: 16px; }
+.verde { color: #27ae60; }
+.amarillo { color: #f39c12; }
+.azul { color: #3498db; }
+
+/* Reporte individual */
+.individual .container { max-width: 1200px; }
+.individual .header { padding: 40px; }
+.individual .header h1 { font-size: 32px; }
+.individual .header h2 { font-size: 24px; opacity: 0.9; margin-bottom: 5px; }
+.individual .header p { opacity: 0.7; }
+.individual .summary { grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); }
+.individual .card { padding: 20px; transition: none; }
+.individual .card:hover { transform: none; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }
+.individual .card h3 { font-size: 12px; margin-bottom: 10px; letter-spacing: normal; }
+.individual .card .value { font-size: 32px; margin-bottom: 5px; }
+.individual .card .percentage { font-size: 14px; }
+.individual th { padding: 12px; font-size: 11px; letter-spacing: normal; }
+.individual td { padding: 10px 12px; }
+.individual tr:last-child td { border-bottom: 1px solid #ecf0f1; }
+.individual .badge { padding: 5px 10px; border-radius: 15px; font-size: 10px; display: inline; }
+.individual .prob-bar { height: 6px; border-radius: 3px; }
+.individual .prob-fill { transition: none; }
+
+/* Reporte interactivo (body.interactivo) */
+.interactivo .pestanas { display: flex; gap: 10px; flex-wrap: wrap; margin-bottom: 20px; }
+.interactivo .pestanas button, .interactivo .paginacion button {
+    border: none;
+    border-radius: 20px;
+    padding: 8px 16px;
+    background: #ecf0f1;
+    color: #2c3e50;
+    cursor: pointer;
+    font-weight: 600;
+}
+.interactivo .pestanas button.activa { background: #3498db; color: white; }
+.interactivo .paginacion button:disabled { opacity: 0.4; cursor: default; }
+.interactivo .controles { display: flex; gap: 15px; align-items: center; flex-wrap: wrap; }
+.interactivo .controles input {
+    flex: 1;
+    min-width: 250px;
+    padding: 10px 15px;
+    border: 1px solid #bdc3c7;
+    border-radius: 8px;
+    font-size: 14px;
+}
+.interactivo .controles .nota { margin-bottom: 0; }
+.interactivo th { cursor: pointer; user-select: none; }
+.interactivo th.orden-asc::after { content: " ▲"; }
+.interactivo th.orden-desc::after { content: " ▼"; }
+.interactivo .paginacion { display: flex; gap: 15px; align-items: center; justify-content: center; }
+"""
+
+
+class Plantilla:
+    """
+    Plantilla HTML con campos {{ nombre }} o {{ nombre:especificación }}
+    (la especificación es la de format(), p. ej. {{ prob:.1f }}).
+
+    Se compila una sola vez a un formato posicional de str.format, así que
+    renderizar no vuelve a analizar el texto. render_filas recibe columnas
+    (listas o arrays, una por campo) y genera una fila por posición sin
+    crear un objeto por fila.
+    """
+
+    CAMPO = re.compile(r"\{\{\s*(\w+)(:[^}]*)?\s*\}\}")
+
+    def __init__(self, texto: str):
+        self.campos = []
+        partes = []
+        for i, trozo in enumerate(self.CAMPO.split(texto)):
+            if i % 3 == 0:
+                partes.append(trozo.replace("{", "{{").replace("}", "}}"))
+            elif i % 3 == 1:
+                if trozo not in self.campos:
+                    self.campos.append(trozo)
+                partes.append("{" + str(self.campos.index(trozo)))
+            else:
+                partes.append((trozo or "").rstrip() + "}")
+        self._formato = "".join(partes)
+
+    def render(self, **valores) -> str:
+        return self._formato.format(*[valores[campo] for campo in self.campos])
+
+    def render_filas(self, **columnas) -> str:
+        formato = self._formato.format
+        return "".join([formato(*fila) for fila in zip(*[columnas[campo] for campo in self.campos])])
+
+
+def escapar(valores) -> list[str]:
+    """Texto seguro para HTML, columna entera."""
+    return [html.escape(str(v)) for v in valores]
+
+
+def id_corto(valores: pd.Series) -> list[str]:
+    """Los 8 primeros caracteres del ID seguidos de '...' si es más largo."""
+    texto = valores.astype(str)
+    return escapar(np.where(texto.str.len() > 8, texto.str[:8] + "...", texto))
+
+
+def badges(prediccion: pd.Series) -> tuple[list[str], list[str]]:
+    """Clase CSS y texto del badge de cada predicción (0 = presente)."""
+    presente = prediccion.to_numpy() == 0
+    return (np.where(presente, "badge-presente", "badge-tardanza").tolist(),
+            np.where(presente, "PRESENTE", "TARDANZA").tolist())
+
+
+def publicar_estilos(directorio: str = DIRECTORIO_ESTATICOS) -> str:
+    """Escribe la hoja de estilos compartida (solo si cambió) y devuelve su ruta."""
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, ARCHIVO_CSS)
+    if os.path.exists(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            if f.read() == CSS:
+                return ruta
+    # Archivo temporal y renombrado: el reporte general y los individuales
+    # pueden publicarla a la vez (pipeline.py)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(CSS)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def enlace_estilos(ruta_css: str, directorio_html: str) -> str:
+    """Ruta relativa de la hoja de estilos vista desde la carpeta del HTML."""
+    return os.path.relpath(ruta_css, directorio_html).replace(os.sep, "/")
+
+
+# ---------------------------------------------------------------------------
+# Reporte general (generate_report.py)
+# ---------------------------------------------------------------------------
+
+PAGINA_GENERAL = Plantilla("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>Reporte de Predicción de Asistencia</title>
+<link rel="stylesheet" href="{{ css }}">
+</head>
+<body class="general">
+<div class="container">
+<div class="header">
+<h1>📊 Reporte de Predicción de Asistencia</h1>
+<p>Generado: {{ generado }}</p>
+</div>
+<div class="summary">
+<div class="card"><h3>Total Registros</h3><div class="value azul">{{ total:, }}</div></div>
+<div class="card"><h3>🟢 Presentes</h3><div class="value verde">{{ presentes:, }}</div><div class="percentage">{{ pct_presentes:.1f }}%</div></div>
+<div class="card"><h3>🟡 Tardanzas</h3><div class="value amarillo">{{ tardanzas:, }}</div><div class="percentage">{{ pct_tardanzas:.1f }}%</div></div>
+</div>
+<div class="content">
+<h2>📅 Probabilidad Mensual por Empleado (Top 50)</h2>
+<p class="nota">📊 Top 50 empleados con mayor probabilidad de tardanza mensual</p>
+<table>
+<thead><tr><th>ID</th><th>Nombre Empleado</th><th>Mes</th><th>Año</th><th>🟢 Prob. Asistencia</th><th>🟡 Prob. Tardanza</th><th>Días Laborales</th><th>Tardanzas Predichas</th><th>Nivel de Riesgo</th></tr></thead>
+<tbody>
+{{ filas_mensuales }}</tbody>
+</table>
+<h2>🟡 Empleados con Mayor Riesgo de Tardanza (Top 30 Días)</h2>
+{{ tabla_tardanzas }}
+</div>
+</div>
+</body>
+</html>
+""")
+
+FILA_MENSUAL_GENERAL = Plantilla(
+    '<tr class="{{ clase }}"><td><strong>{{ id }}</strong></td><td><strong>{{ nombre }}</strong></td>'
+    '<td>{{ mes }}</td><td>{{ anio }}</td>'
+    '<td><strong class="verde dato">{{ asistencia:.1f }}%</strong><div class="prob-bar"><div class="prob-fill prob-fill-green" style="width: {{ ancho_asistencia }}%"></div></div></td>'
+    '<td><strong class="amarillo dato">{{ tardanza:.1f }}%</strong><div class="prob-bar"><div class="prob-fill prob-fill-yellow" style="width: {{ ancho_tardanza }}%"></div></div></td>'
+    '<td><strong>{{ dias }}</strong> días</td><td><strong class="amarillo">{{ dias_tardanza }}</strong> días</td>'
+    '<td><strong>{{ riesgo }}</strong></td></tr>\n'
+)
+
+TABLA_TARDANZAS = Plantilla("""<table>
+<thead><tr><th>ID</th><th>Nombre</th><th>Fecha</th><th>Día</th><th>Predicción</th><th>Probabilidad Tardanza</th><th>Minutos de Tardanza</th></tr></thead>
+<tbody>
+{{ filas }}</tbody>
+</table>""")
+
+FILA_TARDANZA = Plantilla(
+    '<tr><td><strong>{{ id }}</strong></td><td><strong>{{ nombre }}</strong></td><td>{{ fecha }}</td><td>{{ dia }}</td>'
+    '<td><span class="badge {{ badge_clase }}">{{ badge_texto }}</span></td>'
+    '<td><strong>{{ prob:.1f }}%</strong><div class="prob-bar"><div class="prob-fill prob-fill-yellow" style="width: {{ prob }}%"></div></div></td>'
+    '<td><strong>{{ minutos:.0f }}</strong> min</td></tr>\n'
+)
+
+
+def render_reporte_general(css: str, generado: str, total: int, presentes: int, tardanzas: int,
+                           mensual: pd.DataFrame, tardanzas_pred: pd.DataFrame) -> str:
+    """`mensual` ya ordenado y recortado (top 50); `tardanzas_pred`, los días de mayor riesgo."""
+    tardanza = mensual['prob_tardanza_promedio'].to_numpy()
+    asistencia = mensual['prob_asistencia_promedio'].to_numpy()
+    filas_mensuales = FILA_MENSUAL_GENERAL.render_filas(
+        clase=np.where(tardanza >= 60, "high-risk", "").tolist(),
+        id=id_corto(mensual['empleado_id']),
+        nombre=escapar(mensual['nombre_empleado']),
+        mes=mensual['mes_nombre'].tolist(),
+        anio=mensual['anio'].astype(int).tolist(),
+        asistencia=asistencia.tolist(),
+        ancho_asistencia=np.minimum(asistencia, 100).tolist(),
+        tardanza=tardanza.tolist(),
+        ancho_tardanza=np.minimum(tardanza, 100).tolist(),
+        dias=mensual['total_dias'].astype(int).tolist(),
+        dias_tardanza=mensual['dias_tardanza_predichos'].astype(int).tolist(),
+        riesgo=np.select([tardanza >= 60, tardanza >= 40], ["🔥 ALTO", "⚠️ MEDIO"], "✅ BAJO").tolist(),
+    )
+
+    if len(tardanzas_pred) > 0:
+        badge_clase, badge_texto = badges(tardanzas_pred['prediccion'])
+        tabla_tardanzas = TABLA_TARDANZAS.render(filas=FILA_TARDANZA.render_filas(
+            id=id_corto(tardanzas_pred['empleado_id']),
+            nombre=escapar(tardanzas_pred['nombre_empleado']),
+            fecha=tardanzas_pred['fecha_str'].tolist(),
+            dia=tardanzas_pred['dia_semana'].tolist(),
+            badge_clase=badge_clase,
+            badge_texto=badge_texto,
+            prob=(tardanzas_pred['prob_tardanza'].to_numpy() * 100).tolist(),
+            minutos=tardanzas_pred['tardanza_min'].tolist(),
+        ))
+    else:
+        tabla_tardanzas = "<p>✅ No hay tardanzas de alto riesgo (>50%)</p>"
+
+    return PAGINA_GENERAL.render(
+        css=css, generado=generado, total=total, presentes=presentes, tardanzas=tardanzas,
+        pct_presentes=presentes / total * 100, pct_tardanzas=tardanzas / total * 100,
+        filas_mensuales=filas_mensuales, tabla_tardanzas=tabla_tardanzas,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Reporte individual (generate_individual_reports.py)
+# ---------------------------------------------------------------------------
+
+PAGINA_INDIVIDUAL = Plantilla("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>Reporte Individual - {{ nombre }}</title>
+<link rel="stylesheet" href="{{ css }}">
+</head>
+<body class="individual">
+<div class="container">
+<div class="header">
+<h1>📊 Reporte Individual de Asistencia</h1>
+<h2>{{ nombre }}</h2>
+<p>ID: {{ empleado_id }} | Generado: {{ generado }}</p>
+</div>
+<div class="summary">
+<div class="card"><h3>Total Días</h3><div class="value azul">{{ total_dias }}</div></div>
+<div class="card"><h3>🟢 Días Presente</h3><div class="value verde">{{ dias_presente }}</div><div class="percentage">{{ pct_presente:.1f }}%</div></div>
+<div class="card"><h3>🟡 Días Tardanza</h3><div class="value amarillo">{{ dias_tardanza }}</div><div class="percentage">{{ pct_tardanza:.1f }}%</div></div>
+</div>
+<div class="content">
+<h2>📅 Estadísticas Mensuales</h2>
+<table>
+<thead><tr><th>Mes</th><th>Año</th><th>Días Laborados</th><th>Tardanzas</th><th>Prob. Tardanza</th></tr></thead>
+<tbody>
+{{ filas_mensuales }}</tbody>
+</table>
+<h2>📋 Historial Detallado (Últimos 100 días)</h2>
+<table>
+<thead><tr><th>Fecha</th><th>Día</th><th>Mes</th><th>Predicción</th><th>Prob. Tardanza</th><th>Tardanza (min)</th></tr></thead>
+<tbody>
+{{ filas_historial }}</tbody>
+</table>
+</div>
+</div>
+</body>
+</html>
+""")
+
+FILA_MENSUAL_INDIVIDUAL = Plantilla(
+    '<tr class="{{ clase }}"><td><strong>{{ mes }}</strong></td><td>{{ anio }}</td><td>{{ dias }} días</td>'
+    '<td><strong class="amarillo">{{ dias_tardanza }}</strong> días</td>'
+    '<td><strong>{{ prob:.1f }}%</strong><div class="prob-bar"><div class="prob-fill prob-fill-yellow" style="width: {{ ancho }}%"></div></div></td></tr>\n'
+)
+
+FILA_HISTORIAL = Plantilla(
+    '<tr><td><strong>{{ fecha }}</strong></td><td>{{ dia }}</td><td>{{ mes }}</td>'
+    '<td><span class="badge {{ badge_clase }}">{{ badge_texto }}</span></td>'
+    '<td><strong>{{ prob:.1f }}%</strong><div class="prob-bar"><div class="prob-fill prob-fill-yellow" style="width: {{ prob }}%"></div></div></td>'
+    '<td><strong>{{ minutos:.0f }}</strong> min</td></tr>\n'
+)
+
+
+def render_reporte_individual(css: str, empleado_id, nombre: str, generado: str,
+                              total_dias: int, dias_presente: int, dias_tardanza: int,
+                              stats_mensuales: pd.DataFrame, historial: pd.DataFrame) -> str:
+    prob = stats_mensuales['prob_tardanza_pct'].to_numpy()
+    filas_mensuales = FILA_MENSUAL_INDIVIDUAL.render_filas(
+        clase=np.where(prob >= 50, "high-risk", "").tolist(),
+        mes=stats_mensuales['mes_nombre'].tolist(),
+        anio=stats_mensuales['anio'].astype(int).tolist(),
+        dias=stats_mensuales['total_dias'].astype(int).tolist(),
+        dias_tardanza=stats_mensuales['dias_tardanza'].astype(int).tolist(),
+        prob=prob.tolist(),
+        ancho=np.minimum(prob, 100).tolist(),
+    )
+
+    badge_clase, badge_texto = badges(historial['prediccion'])
+    filas_historial = FILA_HISTORIAL.render_filas(
+        fecha=historial['fecha_str'].tolist(),
+        dia=historial['dia_semana'].tolist(),
+        mes=historial['mes_nombre'].tolist(),
+        badge_clase=badge_clase,
+        badge_texto=badge_texto,
+        prob=(historial['prob_tardanza'].to_numpy() * 100).tolist(),
+        minutos=historial['tardanza_min'].tolist(),
+    )
+
+    return PAGINA_INDIVIDUAL.render(
+        css=css, nombre=html.escape(str(nombre)), empleado_id=html.escape(str(empleado_id)),
+        generado=generado, total_dias=total_dias, dias_presente=dias_presente,
+        dias_tardanza=dias_tardanza, pct_presente=dias_presente / total_dias * 100,
+        pct_tardanza=dias_tardanza / total_dias * 100,
+        filas_mensuales=filas_mensuales, filas_historial=filas_historial,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Reporte interactivo (generate_interactive_report.py)
+# ---------------------------------------------------------------------------
+
+# Página sin datos: lee indice.json y trae los fragmentos JSON según se
+# necesitan (la página visible, o los fragmentos de los empleados filtrados).
+# Ordenar o filtrar sin empleado carga la tabla entera salvo que supere
+# LIMITE_ORDEN filas; en ese caso se ordena lo ya cargado y se avisa.
+PAGINA_INTERACTIVA = Plantilla("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>Reporte Interactivo de Asistencia</title>
+<link rel="stylesheet" href="{{ css }}">
+</head>
+<body class="interactivo">
+<div class="container">
+<div class="header">
+<h1>📊 Reporte Interactivo de Asistencia</h1>
+<p>Generado: {{ generado }}</p>
+</div>
+<div class="summary" id="resumen"></div>
+<div class="content">
+<div class="pestanas" id="pestanas"></div>
+<div class="controles">
+<input type="search" id="filtro" placeholder="Filtrar por ID o nombre de empleado">
+<span class="nota" id="estado"></span>
+</div>
+<table><thead id="cabecera"></thead><tbody id="cuerpo"></tbody></table>
+<div class="paginacion">
+<button id="anterior">◀ Anterior</button><span id="pagina"></span><button id="siguiente">Siguiente ▶</button>
+</div>
+</div>
+</div>
+<script>
+const DATOS = "{{ datos }}";
+const FILAS_POR_PAGINA = {{ filas_por_pagina }};
+const LIMITE_ORDEN = {{ limite_orden }};
+const $ = id => document.getElementById(id);
+const esc = t => String(t).replace(/[&<>"']/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"})[c]);
+const miles = n => n.toLocaleString("es");
+let indice, tablas = {}, vista, turno = 0;
+
+const idCorto = e => { const id = indice.empleados.id[e]; return esc(id.length > 8 ? id.slice(0, 8) + "..." : id); };
+const nombre = e => indice.empleados.nombre[e];
+const fecha = f => f ? String(f % 100).padStart(2, "0") + "/" + String(Math.floor(f / 100) % 100).padStart(2, "0") + "/" + Math.floor(f / 10000) : "-";
+const barra = (p, color) => `<strong>${p.toFixed(1)}%</strong><div class="prob-bar"><div class="prob-fill prob-fill-${color}" style="width: ${Math.min(p, 100)}%"></div></div>`;
+const badge = p => p === 0 ? '<span class="badge badge-presente">PRESENTE</span>' : '<span class="badge badge-tardanza">TARDANZA</span>';
+const riesgo = p => p >= 60 ? "🔥 ALTO" : p >= 40 ? "⚠️ MEDIO" : "✅ BAJO";
+
+// [columna, título, celda(valor), valor para ordenar (por defecto el propio)]
+const COL_ID = ["e", "ID", e => `<strong>${idCorto(e)}</strong>`, e => indice.empleados.id[e]];
+const COL_NOMBRE = ["e", "Nombre Empleado", e => `<strong>${esc(nombre(e))}</strong>`, nombre];
+const VISTAS = {
+  mensual: ["📅 Mensual", [COL_ID, COL_NOMBRE, ["mes", "Mes", m => indice.meses[m]], ["anio", "Año", a => a],
+    ["asistencia", "🟢 Prob. Asistencia", p => barra(p, "green")], ["tardanza", "🟡 Prob. Tardanza", p => barra(p, "yellow")],
+    ["dias", "Días Laborales", d => `<strong>${d}</strong> días`], ["dias_tardanza", "Tardanzas Predichas", d => `<strong class="amarillo">${d}</strong> días`],
+    ["tardanza", "Nivel de Riesgo", p => `<strong>${riesgo(p)}</strong>`]]],
+  riesgo: ["🟡 Días de riesgo", [COL_ID, COL_NOMBRE, ["fecha", "Fecha", fecha], ["dia", "Día", d => indice.dias[d] || "-"],
+    ["prediccion", "Predicción", badge], ["prob", "Probabilidad Tardanza", p => barra(p, "yellow")],
+    ["minutos", "Minutos de Tardanza", m => `<strong>${m.toFixed(0)}</strong> min`]]],
+  historial: ["📋 Historial", [COL_ID, COL_NOMBRE, ["fecha", "Fecha", fecha], ["dia", "Día", d => indice.dias[d] || "-"],
+    ["mes", "Mes", m => indice.meses[m]], ["prediccion", "Predicción", badge], ["prob", "Prob. Tardanza", p => barra(p, "yellow")],
+    ["minutos", "Tardanza (min)", m => `<strong>${m.toFixed(0)}</strong> min`]]],
+  empleados: ["👥 Empleados", [COL_ID, COL_NOMBRE, ["dias", "Días", d => d], ["dias_tardanza", "Tardanzas Predichas", d => `<strong class="amarillo">${d}</strong>`],
+    ["asistencia", "🟢 Prob. Asistencia", p => barra(p, "green")], ["tardanza", "🟡 Prob. Tardanza", p => barra(p, "yellow")]]],
+};
+
+function estado(texto) { $("estado").textContent = texto; }
+
+async function cargar(nombreTabla, cuales) {
+  const t = tablas[nombreTabla];
+  const pendientes = cuales.filter(i => !t.cargados.has(i));
+  for (let k = 0; k < pendientes.length; k++) {
+    const i = pendientes[k], f = t.fragmentos[i];
+    estado(`Cargando ${k + 1}/${pendientes.length} fragmentos...`);
+    const columnas = await (await fetch(`${DATOS}/${f.archivo}`)).json();
+    for (const c of t.columnas) { const destino = t.datos[c]; for (const v of columnas[c]) destino.push(v); }
+    for (let j = 0; j < f.filas; j++) t.posicion.push(f.desde + j);
+    t.cargados.add(i);
+  }
+}
+
+// Códigos de empleado (ordenados) cuyo ID o nombre contiene el texto
+function coincidencias(texto) {
+  const q = texto.toLowerCase(), { id, nombre: nombres } = indice.empleados, codigos = [];
+  for (let e = 0; e < id.length; e++) if (id[e].toLowerCase().includes(q) || nombres[e].toLowerCase().includes(q)) codigos.push(e);
+  return codigos;
+}
+
+function contiene(codigos, desde, hasta) {
+  let a = 0, b = codigos.length;
+  while (a < b) { const m = (a + b) >> 1; if (codigos[m] < desde) a = m + 1; else b = m; }
+  return a < codigos.length && codigos[a] <= hasta;
+}
+
+async function actualizar() {
+  const mio = ++turno, v = vista, t = tablas[v.tabla];
+  const codigos = v.filtro ? coincidencias(v.filtro) : null;
+  const todos = t.fragmentos.map((_, i) => i);
+  let necesarios, parcial = false;
+  if (codigos) {
+    necesarios = todos.filter(i => contiene(codigos, t.fragmentos[i].e_min, t.fragmentos[i].e_max));
+  } else if (v.orden !== null && t.filas <= LIMITE_ORDEN) {
+    necesarios = todos;
+  } else {
+    const hasta = (v.pagina + 1) * FILAS_POR_PAGINA;
+    necesarios = todos.filter(i => t.fragmentos[i].desde < hasta);
+    parcial = v.orden !== null && t.cargados.size < t.fragmentos.length;
+  }
+  await cargar(v.tabla, necesarios);
+  if (mio !== turno) return;
+
+  const e = t.datos.e, elegidos = codigos ? new Set(codigos) : null;
+  let filas = [];
+  for (let r = 0; r < t.posicion.length; r++) if (!elegidos || elegidos.has(e[r])) filas.push(r);
+  filas.sort((a, b) => t.posicion[a] - t.posicion[b]);
+  if (v.orden !== null) {
+    const [c, , , clave] = VISTAS[v.tabla][1][v.orden], datos = t.datos[c], valor = clave || (x => x);
+    const claves = new Map(filas.map(r => [r, valor(datos[r])]));
+    filas.sort((a, b) => { const x = claves.get(a), y = claves.get(b); return (x < y ? -1 : x > y ? 1 : 0) * v.sentido; });
+  }
+
+  const total = codigos || parcial || t.cargados.size === t.fragmentos.length ? filas.length : t.filas;
+  const paginas = Math.max(1, Math.ceil(total / FILAS_POR_PAGINA));
+  v.pagina = Math.min(v.pagina, paginas - 1);
+  const columnas = VISTAS[v.tabla][1];
+  $("cabecera").innerHTML = "<tr>" + columnas.map(([, titulo], i) =>
+    `<th data-i="${i}" class="${v.orden === i ? (v.sentido > 0 ? "orden-asc" : "orden-desc") : ""}">${titulo}</th>`).join("") + "</tr>";
+  $("cuerpo").innerHTML = filas.slice(v.pagina * FILAS_POR_PAGINA, (v.pagina + 1) * FILAS_POR_PAGINA).map(r => {
+    const clase = v.tabla === "mensual" && t.datos.tardanza[r] >= 60 ? ' class="high-risk"' : "";
+    return `<tr${clase}>` + columnas.map(([c, , celda]) => `<td>${celda(t.datos[c][r])}</td>`).join("") + "</tr>";
+  }).join("");
+  $("pagina").textContent = `Página ${v.pagina + 1} de ${miles(paginas)}`;
+  $("anterior").disabled = v.pagina === 0;
+  $("siguiente").disabled = v.pagina >= paginas - 1;
+  estado(`${miles(total)} filas` + (parcial ? ` (orden aplicado a las ${miles(t.posicion.length)} filas cargadas de ${miles(t.filas)})` : "")
+         + ` | ${t.cargados.size}/${t.fragmentos.length} fragmentos cargados`);
+}
+
+function abrir(tabla) {
+  vista = { tabla, pagina: 0, orden: null, sentido: 1, filtro: $("filtro").value.trim() };
+  document.querySelectorAll("#pestanas button").forEach(b => b.classList.toggle("activa", b.dataset.tabla === tabla));
+  actualizar();
+}
+
+async function iniciar() {
+  indice = await (await fetch(`${DATOS}/indice.json`)).json();
+  const r = indice.resumen;
+  $("resumen").innerHTML =
+    `<div class="card"><h3>Total Registros</h3><div class="value azul">${miles(r.total)}</div></div>` +
+    `<div class="card"><h3>🟢 Presentes</h3><div class="value verde">${miles(r.presentes)}</div><div class="percentage">${(r.presentes / r.total * 100).toFixed(1)}%</div></div>` +
+    `<div class="card"><h3>🟡 Tardanzas</h3><div class="value amarillo">${miles(r.tardanzas)}</div><div class="percentage">${(r.tardanzas / r.total * 100).toFixed(1)}%</div></div>` +
+    `<div class="card"><h3>👥 Empleados</h3><div class="value azul">${miles(indice.empleados.id.length)}</div></div>`;
+  for (const [nombreTabla, t] of Object.entries(indice.tablas)) {
+    tablas[nombreTabla] = { ...t, cargados: new Set(), posicion: [], datos: Object.fromEntries(t.columnas.map(c => [c, []])) };
+  }
+  $("pestanas").innerHTML = Object.keys(VISTAS).map(t =>
+    `<button data-tabla="${t}">${VISTAS[t][0]} (${miles(tablas[t].filas)})</button>`).join("");
+  $("pestanas").onclick = ev => { if (ev.target.dataset.tabla) abrir(ev.target.dataset.tabla); };
+  $("cabecera").onclick = ev => {
+    const i = Number(ev.target.dataset.i);
+    if (ev.target.dataset.i === undefined) return;
+    vista.sentido = vista.orden === i ? -vista.sentido : (VISTAS[vista.tabla][1][i][0] === "e" ? 1 : -1);
+    vista.orden = i; vista.pagina = 0; actualizar();
+  };
+  let espera;
+  $("filtro").oninput = () => { clearTimeout(espera); espera = setTimeout(() => { vista.filtro = $("filtro").value.trim(); vista.pagina = 0; actualizar(); }, 250); };
+  $("anterior").onclick = () => { vista.pagina--; actualizar(); };
+  $("siguiente").onclick = () => { vista.pagina++; actualizar(); };
+  abrir("mensual");
+}
+
+iniciar().catch(err => estado("❌ No se pudieron cargar los datos (" + err + "). Abre el reporte desde un servidor: python -m http.server"));
+</script>
+</body>
+</html>
+""")
+
+
+def render_reporte_interactivo(css: str, generado: str, datos: str,
+                               filas_por_pagina: int, limite_orden: int) -> str:
+    """`datos` es la carpeta de los fragmentos vista desde el HTML."""
+    return PAGINA_INTERACTIVA.render(css=css, generado=generado, datos=datos,
+                                     filas_por_pagina=filas_por_pagina, limite_orden=limite_orden)
+
+
+def huella_plantillas() -> str:
+    """Huella de los estilos y las plantillas del reporte individual; si cambia hay que regenerarlos todos."""
+    h = hashlib.sha256(CSS.encode("utf-8"))
+    for plantilla in (PAGINA_INDIVIDUAL, FILA_MENSUAL_INDIVIDUAL, FILA_HISTORIAL):
+        h.update(plantilla._formato.encode("utf-8"))
+    return h.hexdigest()
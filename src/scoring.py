@@ -0,0 +1,292 @@
+# scoring.py
+
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from encoding import COLUMNA_FILA, matriz_features
+from ingestion import read_fichajes
+from inference import FlatForest
+from model_store import load_compact, ruta_compacta
+from storage import load_table, ruta_datos, save_table
+
+RUTA_MODELO = "models/random_forest.pkl"
+
+# "estandar": el modelo tal como lo devuelve load_model (compacto o pickle)
+# "plano": motor FlatForest (inference.py), mismas clases y probabilidades;
+# opcional: solo compensa en algunos modelos y máquinas (ver FlatForest)
+MOTORES = ("estandar", "plano")
+
+# Columnas guardadas en la caché de puntuaciones (además de la clave)
+COLUMNAS_PUNTUACION = ['prediccion', 'prob_presente', 'prob_tardanza']
+CLAVE_CACHE = ['empleado_id', 'fecha', 'hash_features']
+
+# Columnas de fichajes.csv que necesitan las puntuaciones (el resto no se lee)
+COLUMNAS_ORIGINAL = ['empleado_id', 'nombre_empleado', 'fecha']
+
+dias_map = {0: 'Lun', 1: 'Mar', 2: 'Mié', 3: 'Jue', 4: 'Vie', 5: 'Sáb', 6: 'Dom'}
+meses_map = {1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril', 5: 'Mayo', 6: 'Junio',
+             7: 'Julio', 8: 'Agosto', 9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'}
+
+
+def load_model(model_path: str = RUTA_MODELO, compacto: bool = True):
+    """
+    Carga el modelo para inferencia. Si existe la exportación compacta
+    (model_store) y corresponde a este mismo .pkl, se usa esa: solo lee el
+    manifest y mapea los arrays bajo demanda. Si no, se deserializa el pickle.
+    La correspondencia se comprueba con el sello (tamaño y mtime) guardado
+    en el manifest; solo si no coincide se calcula la huella completa.
+    """
+    directorio = ruta_compacta(model_path)
+    if compacto and os.path.exists(os.path.join(directorio, "manifest.json")):
+        modelo = load_compact(directorio)
+        if (modelo.manifest.get("sello_fuente") == model_stamp(model_path)
+                or modelo.manifest.get("fuente") == model_fingerprint(model_path)):
+            return modelo
+        print("   ⚠️  El modelo compacto no corresponde al .pkl actual, se carga el pickle")
+    with open(model_path, "rb") as f:
+        return pickle.load(f)
+
+
+def predict_with_proba(model, X: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Una sola pasada por el bosque: las probabilidades salen de predict_proba
+    y la clase es su argmax (lo mismo que hace RandomForestClassifier.predict).
+    """
+    probabilities = model.predict_proba(X)
+    predictions = model.classes_.take(np.argmax(probabilities, axis=1))
+    return predictions, probabilities
+
+
+def model_fingerprint(model_path: str = RUTA_MODELO) -> str:
+    """Huella SHA-256 del archivo del modelo; cambia con cada reentrenamiento."""
+    h = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def model_stamp(model_path: str = RUTA_MODELO) -> dict:
+    """Sello barato del archivo del modelo (tamaño y mtime), sin leer su contenido."""
+    estado = os.stat(model_path)
+    return {"bytes": estado.st_size, "mtime_ns": estado.st_mtime_ns}
+
+
+def stamped_fingerprint(model_path: str = RUTA_MODELO) -> str:
+    """
+    Huella de model_fingerprint sin leer el .pkl cuando se puede: si el
+    manifest de la copia compacta tiene el mismo sello que el archivo, su
+    "fuente" es esa huella (la misma comprobación que load_model).
+    """
+    try:
+        with open(os.path.join(ruta_compacta(model_path), "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("fuente") and manifest.get("sello_fuente") == model_stamp(model_path):
+        return manifest["fuente"]
+    return model_fingerprint(model_path)
+
+
+def _rutas_cache(output_path: str) -> tuple[str, str]:
+    """La caché vive junto a predicciones, con su metadato (huella del modelo) aparte."""
+    directorio = os.path.dirname(output_path) or "."
+    ruta_cache = os.path.join(directorio, f"predicciones_cache{os.path.splitext(output_path)[1]}")
+    return ruta_cache, os.path.join(directorio, "predicciones_cache.json")
+
+
+def _load_cache(ruta_cache: str, ruta_meta: str, huella: str) -> pd.DataFrame | None:
+    if not (os.path.exists(ruta_cache) and os.path.exists(ruta_meta)):
+        return None
+    with open(ruta_meta, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("modelo") != huella:
+        print("   ♻️  El modelo cambió: se descarta la caché de puntuaciones")
+        return None
+    cache = load_table(ruta_cache)
+    cache['empleado_id'] = cache['empleado_id'].astype(str)
+    return cache
+
+
+def predict_incremental(model, X: pd.DataFrame, claves: pd.DataFrame, huella: str,
+                        output_path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Igual que predict_with_proba, pero solo pasa por el modelo las filas cuya
+    clave (empleado_id, fecha, hash de las features) no está en la caché.
+
+    Devuelve (predicciones, matriz con prob_presente y prob_tardanza).
+    """
+    ruta_cache, ruta_meta = _rutas_cache(output_path)
+
+    claves = claves.reset_index(drop=True).copy()
+    # Hash sobre float64 para que el mismo valor dé el mismo hash aunque el
+    # almacenamiento haya elegido otro tipo compacto (int8, float32...)
+    claves['hash_features'] = pd.util.hash_pandas_object(X.astype(np.float64), index=False).to_numpy()
+
+    cache = _load_cache(ruta_cache, ruta_meta, huella)
+    if cache is not None:
+        cache = cache.drop_duplicates(subset=CLAVE_CACHE)
+        resultado = claves.merge(cache, on=CLAVE_CACHE, how='left')
+    else:
+        resultado = claves.reindex(columns=CLAVE_CACHE + COLUMNAS_PUNTUACION)
+
+    pendientes = resultado['prediccion'].isna().to_numpy()
+    print(f"   ♻️  Filas en caché: {(~pendientes).sum():,} | a puntuar: {pendientes.sum():,}")
+
+    if pendientes.any():
+        predictions, probabilities = predict_with_proba(model, X[pendientes])
+        resultado.loc[pendientes, 'prediccion'] = predictions
+        resultado.loc[pendientes, 'prob_presente'] = probabilities[:, 0]
+        resultado.loc[pendientes, 'prob_tardanza'] = probabilities[:, 1]
+
+    resultado['prediccion'] = resultado['prediccion'].astype(model.classes_.dtype)
+
+    # La caché guarda solo las claves actuales (las filas que desaparecen se descartan)
+    save_table(resultado.drop_duplicates(subset=CLAVE_CACHE), ruta_cache, compactar=False)
+    with open(ruta_meta, "w", encoding="utf-8") as f:
+        json.dump({"modelo": huella}, f)
+
+    return (resultado['prediccion'].to_numpy(),
+            resultado[['prob_presente', 'prob_tardanza']].to_numpy())
+
+
+def load_original(original_csv_path: str, columnas: list[str] = COLUMNAS_ORIGINAL) -> pd.DataFrame:
+    """
+    Fichajes originales leídos con el esquema de ingestion.py (cabeceras
+    normalizadas, fecha convertida). Solo se leen `columnas`, más
+    COLUMNA_FILA: el número de fila que preprocess asigna a cada fichaje.
+    """
+    return read_fichajes(original_csv_path, columnas=columnas, verbose=False)
+
+
+def join_original(df: pd.DataFrame, df_original: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fila de df_original que corresponde a cada fila de las features, en el
+    orden de las features. El cruce es por COLUMNA_FILA, no por posición:
+    aunque alguna etapa descarte, reordene o trocee filas, cada predicción
+    sigue yendo a su fichaje. Si una fila de features no existe en los
+    fichajes, falla en lugar de atribuirla a otro.
+
+    Las features generadas antes de existir COLUMNA_FILA se emparejan por
+    posición, solo si tienen el mismo número de filas.
+    """
+    if COLUMNA_FILA not in df.columns:
+        if len(df) != len(df_original):
+            raise ValueError(f"Las features ({len(df):,} filas) no se corresponden con los fichajes "
+                             f"originales ({len(df_original):,} filas)")
+        print(f"   ⚠️  Las features no tienen '{COLUMNA_FILA}' (vuelve a ejecutar preprocess y features): "
+              "se emparejan por posición")
+        return df_original.reset_index(drop=True)
+
+    posiciones = pd.Index(df_original[COLUMNA_FILA]).get_indexer(df[COLUMNA_FILA].to_numpy())
+    faltan = int((posiciones < 0).sum())
+    if faltan:
+        raise ValueError(f"{faltan:,} filas de las features no están en los fichajes originales: "
+                         "¿cambió fichajes.csv sin volver a ejecutar preprocess?")
+    return df_original.take(posiciones).reset_index(drop=True)
+
+
+def score_dataset(input_path: str, original_csv_path: str = "data/raw/fichajes.csv",
+                  output_path: str | None = None, model_path: str = RUTA_MODELO,
+                  incremental: bool = False, motor: str = "estandar",
+                  particionado: bool = False, particiones_path: str | None = None) -> pd.DataFrame:
+    """
+    Etapa de inferencia compartida por predict.py y los reportes.
+
+    Aplica el modelo una vez sobre las features, une el resultado con los
+    datos originales (nombres, fechas) y guarda el dataset puntuado que
+    leen generate_report y generate_individual_reports.
+
+    Con incremental=True se reutilizan las puntuaciones de la ejecución
+    anterior para las filas que no cambiaron (ver predict_incremental).
+    Con motor="plano" el bosque se evalúa con FlatForest usando todos los núcleos
+    (no siempre más rápido que sklearn: medir antes con bench_inference.py).
+    Con particionado=True cada fila va al modelo de su partición (sharding.py,
+    en particiones_path) en lugar de al modelo global de model_path, que
+    queda de respaldo para las particiones sin modelo.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"motor debe ser uno de {MOTORES}")
+    output_path = output_path or ruta_datos("predicciones_detalladas")
+
+    print("   Cargando features...")
+    df = load_table(input_path)
+
+    print("   Cargando modelo...")
+    columnas = COLUMNAS_ORIGINAL
+    if particionado:
+        from sharding import DIRECTORIO_PARTICIONES, load_sharded
+        enrutador = load_sharded(particiones_path or DIRECTORIO_PARTICIONES, motor=motor, model_path=model_path)
+        columnas = COLUMNAS_ORIGINAL + [enrutador.manifiesto["clave"]]
+
+    # Solo las columnas necesarias, cruzadas con las features por COLUMNA_FILA
+    print("   Cargando datos originales...")
+    df_original = join_original(df, load_original(original_csv_path, columnas))
+
+    if particionado:
+        model = enrutador.ligar(enrutador.particiones_de(df_original))
+        huella = hashlib.sha256(enrutador.huella.encode("utf-8")).hexdigest()
+    else:
+        model = load_model(model_path)
+        if motor == "plano":
+            model = FlatForest.from_model(model, n_hilos=-1)
+        huella = stamped_fingerprint(model_path) if incremental else None
+
+    X = matriz_features(df)
+    if hasattr(model, "feature_names_in_"):
+        # Features añadidas después de entrenar el modelo (p. ej. feriados) no se usan hasta reentrenar
+        X = X[list(model.feature_names_in_)]
+
+    empleado_id = df_original['empleado_id'].fillna('Sin ID').astype(str)
+
+    print("   Realizando predicciones...")
+    if incremental:
+        claves = pd.DataFrame({'empleado_id': empleado_id, 'fecha': df_original['fecha']})
+        predictions, probabilities = predict_incremental(
+            model, X, claves, huella, output_path
+        )
+    else:
+        predictions, probabilities = predict_with_proba(model, X)
+
+    mes = df_original['fecha'].dt.month.fillna(0).astype(int)
+    reporte = pd.DataFrame({
+        COLUMNA_FILA: df_original[COLUMNA_FILA].to_numpy(),
+        'empleado_id': empleado_id,
+        'nombre_empleado': df_original['nombre_empleado'].fillna('Sin nombre'),
+        'fecha': df_original['fecha'],
+        'fecha_str': df_original['fecha'].dt.strftime('%d/%m/%Y'),
+        'dia_semana': df['dia_semana'].fillna(0).astype(int).map(dias_map),
+        'mes': mes,
+        'mes_nombre': mes.map(meses_map),
+        'anio': df_original['fecha'].dt.year.fillna(0).astype(int),
+        'tardanza_min': df['tardanza_min'].fillna(0),
+        'prediccion': predictions,
+        'prob_presente': probabilities[:, 0],
+        'prob_tardanza': probabilities[:, 1]
+    })
+
+    save_table(reporte, output_path)
+    print(f"   💾 Dataset puntuado guardado en {output_path}")
+    return reporte
+
+
+def load_scored(scored_path: str | None = None, input_path: str | None = None,
+                original_csv_path: str = "data/raw/fichajes.csv") -> pd.DataFrame:
+    """Carga el dataset puntuado; si todavía no existe, ejecuta la inferencia."""
+    scored_path = scored_path or ruta_datos("predicciones_detalladas")
+    try:
+        return load_table(scored_path)
+    except FileNotFoundError:
+        print(f"   ℹ️  No existe {scored_path}, ejecutando la inferencia...")
+        return score_dataset(input_path or ruta_datos("empleados_features"),
+                             original_csv_path, output_path=scored_path)
+
+
+if __name__ == "__main__":
+    print("📊 Puntuando dataset...")
+    score_dataset(ruta_datos("empleados_features"), "data/raw/fichajes.csv")
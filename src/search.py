@@ -0,0 +1,190 @@
+# search.py
+
+import math
+import random
+import time
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, cross_val_score, train_test_split
+
+# Recurso mínimo de la primera ronda (si no se indica min_resource)
+RECURSO_MINIMO = {"n_samples": 500, "n_estimators": 10}
+
+
+class SuccessiveHalvingSearch:
+    """
+    Búsqueda de hiperparámetros por "successive halving" con presupuesto.
+
+    Todas las combinaciones se evalúan primero con poco recurso (pocas filas
+    o pocos árboles); en cada ronda solo pasa 1/factor de las mejores y el
+    recurso se multiplica por factor, hasta llegar al recurso completo.
+
+    Presupuesto opcional:
+    - max_fits: número máximo de ajustes (candidato x fold). Se reduce el
+      número inicial de candidatos (elegidos al azar) hasta que el plan quepa.
+    - max_seconds: tiempo máximo; al agotarse se devuelve el mejor candidato
+      de la ronda más alta (con más recurso) que llegó a evaluarse.
+
+    Expone los mismos atributos que usa train_model de GridSearchCV
+    (best_estimator_, best_params_, best_score_) y además history_, con la
+    evolución del mejor score en el tiempo.
+    """
+
+    def __init__(self, estimator, param_grid: dict, *, resource: str = "n_samples",
+                 factor: int = 3, min_resource: int | None = None, max_fits: int | None = None,
+                 max_seconds: float | None = None, cv: int = 5, scoring: str = "f1_weighted",
+                 n_jobs: int | None = -1, random_state: int = 42, refit: bool = True,
+                 verbose: bool = True):
+        if resource not in ("n_samples", "n_estimators"):
+            raise ValueError("resource debe ser 'n_samples' o 'n_estimators'")
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.resource = resource
+        self.factor = factor
+        self.min_resource = min_resource
+        self.max_fits = max_fits
+        self.max_seconds = max_seconds
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.refit = refit
+        self.verbose = verbose
+
+    def _plan(self, n_candidatos: int, max_recurso: int) -> list[tuple[int, int]]:
+        """
+        Lista de rondas (candidatos, recurso). Los recursos se calculan desde
+        arriba (max_recurso / factor^k) para que la última ronda use exactamente
+        el recurso completo; la primera nunca baja de min_resource.
+        """
+        minimo = self.min_resource or RECURSO_MINIMO[self.resource]
+        minimo = min(minimo, max_recurso)
+        if self.min_resource is None:
+            # Por defecto: tantas rondas como haga falta para quedarse con ~1 candidato
+            rondas = max(1, math.ceil(math.log(max(n_candidatos, 1), self.factor)) + 1)
+        else:
+            rondas = max(1, int(math.log(max_recurso / minimo, self.factor)) + 1)
+        while rondas > 1 and max_recurso // self.factor ** (rondas - 1) < minimo:
+            rondas -= 1
+
+        plan = []
+        candidatos = n_candidatos
+        for i in range(rondas):
+            recurso = max_recurso // self.factor ** (rondas - 1 - i)
+            plan.append((candidatos, recurso))
+            if candidatos == 1 and recurso < max_recurso:
+                # Con un solo candidato no hay nada que descartar: directo al recurso completo
+                plan.append((1, max_recurso))
+                break
+            candidatos = max(math.ceil(candidatos / self.factor), 1)
+        return plan
+
+    def _fits(self, plan: list[tuple[int, int]]) -> int:
+        return sum(candidatos * self.cv for candidatos, _ in plan)
+
+    def fit(self, X, y):
+        inicio = time.perf_counter()
+        candidatos = list(ParameterGrid(self.param_grid))
+        random.Random(self.random_state).shuffle(candidatos)
+
+        if self.resource == "n_estimators":
+            max_recurso = max(p.get("n_estimators", 100) for p in candidatos)
+            # El número de árboles pasa a ser el recurso: se quita de la rejilla
+            vistos, unicos = set(), []
+            for p in candidatos:
+                p = {k: v for k, v in p.items() if k != "n_estimators"}
+                clave = tuple(sorted(p.items(), key=lambda kv: kv[0]))
+                if clave not in vistos:
+                    vistos.add(clave)
+                    unicos.append(p)
+            candidatos = unicos
+        else:
+            max_recurso = len(X)
+
+        plan = self._plan(len(candidatos), max_recurso)
+        if self.max_fits is not None:
+            while len(candidatos) > 1 and self._fits(plan) > self.max_fits:
+                candidatos = candidatos[:max(len(candidatos) * 3 // 4, 1)]
+                plan = self._plan(len(candidatos), max_recurso)
+
+        if self.verbose:
+            print(f"\n🔍 Successive halving: {len(candidatos)} candidatos, "
+                  f"{len(plan)} rondas, {self._fits(plan)} ajustes previstos")
+            for i, (n, r) in enumerate(plan):
+                print(f"   Ronda {i}: {n} candidatos con {self.resource}={r}")
+
+        self.history_ = []
+        self.n_fits_ = 0
+        self.rounds_ = []
+        mejor_score, mejor_params, ronda_mejor, recurso_mejor = -np.inf, None, -1, None
+        agotado = False
+
+        for ronda, (n_candidatos, recurso) in enumerate(plan):
+            candidatos = candidatos[:n_candidatos]
+            X_r, y_r = self._recortar(X, y, recurso)
+            cv = StratifiedKFold(n_splits=self.cv, shuffle=True, random_state=self.random_state)
+
+            resultados = []
+            for params in candidatos:
+                # Al menos un candidato evaluado antes de mirar el presupuesto
+                if (self.max_seconds is not None and mejor_params is not None
+                        and time.perf_counter() - inicio > self.max_seconds):
+                    agotado = True
+                    break
+                modelo = clone(self.estimator).set_params(**params)
+                if self.resource == "n_estimators":
+                    modelo.set_params(n_estimators=recurso)
+                score = cross_val_score(modelo, X_r, y_r, cv=cv, scoring=self.scoring,
+                                        n_jobs=self.n_jobs).mean()
+                self.n_fits_ += self.cv
+                resultados.append((score, params))
+
+                # El mejor es el de la ronda más alta (más recurso) con algún candidato evaluado
+                if ronda > ronda_mejor or score > mejor_score:
+                    mejor_score, mejor_params, ronda_mejor, recurso_mejor = score, params, ronda, recurso
+                self.history_.append({
+                    "segundos": round(time.perf_counter() - inicio, 3),
+                    "ajustes": self.n_fits_,
+                    "ronda": ronda,
+                    "recurso": recurso,
+                    "score": float(score),
+                    "mejor_score": float(mejor_score),
+                })
+
+            if not resultados:
+                break
+            resultados.sort(key=lambda r: r[0], reverse=True)
+            self.rounds_.append({"ronda": ronda, "recurso": recurso, "evaluados": len(resultados),
+                                 "mejor_score": float(resultados[0][0])})
+            candidatos = [params for _, params in resultados]
+
+            if self.verbose:
+                print(f"   [{time.perf_counter() - inicio:7.1f}s] Ronda {ronda} ({self.resource}={recurso}): "
+                      f"mejor f1 = {resultados[0][0]:.4f} | ajustes acumulados: {self.n_fits_}")
+            if agotado:
+                print("   ⏱️  Presupuesto de tiempo agotado")
+                break
+
+        if mejor_params is None:
+            raise ValueError("Successive halving sin candidatos evaluados: la rejilla está vacía")
+        self.best_params_ = dict(mejor_params)
+        self.best_score_ = float(mejor_score)
+        if self.resource == "n_estimators":
+            self.best_params_["n_estimators"] = recurso_mejor
+
+        # Reajuste con todos los datos (como refit=True en GridSearchCV)
+        if self.refit:
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+            self.best_estimator_.fit(X, y)
+        self.elapsed_ = time.perf_counter() - inicio
+        return self
+
+    def _recortar(self, X, y, recurso: int):
+        """Submuestra estratificada de `recurso` filas (o todo si el recurso son árboles)."""
+        # train_test_split necesita dejar fuera al menos una fila por clase
+        if self.resource != "n_samples" or recurso > len(X) - len(np.unique(y)):
+            return X, y
+        X_r, _, y_r, _ = train_test_split(X, y, train_size=recurso, stratify=y,
+                                          random_state=self.random_state)
+        return X_r, y_r
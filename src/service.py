@@ -0,0 +1,305 @@
+# service.py
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from encoding import RUTA_VOCABULARIO, EmployeeVocabulary
+from features import build_features_row
+from history import COLUMNAS_HISTORIAL, RUTA_ESTADO, HistoryState
+from inference import FlatForest
+from scoring import RUTA_MODELO, load_model
+
+FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y")
+
+# Micro-batching: una llamada al bosque por cada MAX_LOTE solicitudes o cada
+# ESPERA_MAX_MS desde la primera solicitud del lote, lo que ocurra antes
+MAX_LOTE = 256
+ESPERA_MAX_MS = 1.0
+
+
+class SolicitudInvalida(ValueError):
+    """Parámetros de una solicitud que no se pueden interpretar (HTTP 400)."""
+
+
+def parse_fecha(valor) -> date:
+    """AAAA-MM-DD o dd/mm/aaaa; sin fecha se predice para mañana."""
+    if valor is None or valor == "":
+        return date.today() + timedelta(days=1)
+    if isinstance(valor, date):
+        return valor
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(str(valor).strip(), formato).date()
+        except ValueError:
+            pass
+    raise SolicitudInvalida(f"Fecha no válida: {valor!r} (se espera AAAA-MM-DD o dd/mm/aaaa)")
+
+
+class PredictionService:
+    """
+    Modelo cargado una sola vez y listo para puntuar fichajes sueltos.
+
+    Las features de cada solicitud se calculan con build_features_row (sin
+    DataFrames) y el bosque se evalúa con FlatForest sobre una matriz
+    float32 ya en el orden del entrenamiento. empleado_id se traduce con el
+    vocabulario de empleados del entrenamiento; los que no están en él
+    reciben encoding.SIN_CODIGO. Si el modelo se entrenó con las features
+    de historial, salen del HistoryState guardado (historial_path), que
+    solo responde para días posteriores al último fichaje procesado de
+    cada empleado. El constructor hace una
+    predicción de calentamiento para que la primera solicitud real no pague
+    la compilación de numba ni la lectura de los arrays del disco.
+    """
+
+    def __init__(self, model_path: str = RUTA_MODELO, vocabulario_path: str = RUTA_VOCABULARIO,
+                 historial_path: str = RUTA_ESTADO):
+        self.model_path = model_path
+        self.vocabulario = EmployeeVocabulary.load(vocabulario_path)
+        self.forest = FlatForest.from_model(load_model(model_path), n_hilos=1)
+        self.features = list(self.forest.feature_names_in_)
+        self.historial = None
+        if any(nombre in COLUMNAS_HISTORIAL for nombre in self.features):
+            if not os.path.exists(historial_path):
+                raise FileNotFoundError(f"El modelo {model_path} usa features de historial y no está su estado "
+                                        f"{historial_path} (genera las features con historial)")
+            self.historial = HistoryState.load(historial_path)
+        self.predict("calentamiento", date.today())
+
+    def vector(self, empleado_id, fecha=None, tardanza_min: float = 0.0) -> list[float]:
+        fecha = parse_fecha(fecha)
+        fila = build_features_row(empleado_id, fecha, tardanza_min, self.vocabulario)
+        if self.historial is not None:
+            try:
+                fila.update(self.historial.features_dia(empleado_id, fecha))
+            except ValueError as error:
+                raise SolicitudInvalida(str(error)) from error
+        return [fila[nombre] for nombre in self.features]
+
+    def predict_vectors(self, vectores: list[list[float]]) -> tuple[np.ndarray, np.ndarray]:
+        """Una sola pasada por el bosque para todas las filas."""
+        proba = self.forest.predict_proba(np.asarray(vectores, dtype=np.float32))
+        return self.forest.classes_.take(np.argmax(proba, axis=1)), proba
+
+    @staticmethod
+    def respuesta(empleado_id, fecha: date, prediccion, proba: np.ndarray) -> dict:
+        # Mismas columnas que el dataset puntuado de scoring.score_dataset
+        return {
+            "empleado_id": str(empleado_id),
+            "fecha": fecha.isoformat(),
+            "prediccion": int(prediccion),
+            "prob_presente": float(proba[0]),
+            "prob_tardanza": float(proba[1]),
+        }
+
+    def predict(self, empleado_id, fecha=None, tardanza_min: float = 0.0) -> dict:
+        fecha = parse_fecha(fecha)
+        prediccion, proba = self.predict_vectors([self.vector(empleado_id, fecha, tardanza_min)])
+        return self.respuesta(empleado_id, fecha, prediccion[0], proba[0])
+
+
+class MicroBatcher:
+    """
+    Junta las solicitudes concurrentes en una sola llamada al bosque.
+
+    Cada hilo que llama a predict() calcula sus features, deja la fila en
+    una cola y espera su Future. Un hilo trabajador toma la primera fila,
+    sigue recogiendo hasta MAX_LOTE filas o hasta que pasan ESPERA_MAX_MS,
+    puntúa el lote entero y reparte los resultados.
+
+        with MicroBatcher(PredictionService()) as lotes:
+            lotes.predict("E001", "2024-05-20")
+    """
+
+    def __init__(self, servicio: PredictionService, max_lote: int = MAX_LOTE,
+                 espera_max_ms: float = ESPERA_MAX_MS):
+        self.servicio = servicio
+        self.max_lote = max_lote
+        self.espera_max = espera_max_ms / 1000
+        self.lotes = 0
+        self.solicitudes = 0
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._bucle, name="micro-batcher", daemon=True)
+        self._hilo.start()
+
+    def submit(self, empleado_id, fecha=None, tardanza_min: float = 0.0) -> Future:
+        futuro = Future()
+        fecha = parse_fecha(fecha)
+        vector = self.servicio.vector(empleado_id, fecha, tardanza_min)
+        self._cola.put((empleado_id, fecha, vector, futuro))
+        return futuro
+
+    def predict(self, empleado_id, fecha=None, tardanza_min: float = 0.0) -> dict:
+        return self.submit(empleado_id, fecha, tardanza_min).result()
+
+    def _bucle(self):
+        while True:
+            primera = self._cola.get()
+            if primera is None:
+                return
+            lote = [primera]
+            limite = time.perf_counter() + self.espera_max
+            cerrar = False
+            while len(lote) < self.max_lote:
+                restante = limite - time.perf_counter()
+                try:
+                    solicitud = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if solicitud is None:
+                    cerrar = True
+                    break
+                lote.append(solicitud)
+
+            try:
+                predicciones, proba = self.servicio.predict_vectors([s[2] for s in lote])
+            except Exception as error:
+                for *_, futuro in lote:
+                    futuro.set_exception(error)
+            else:
+                for i, (empleado_id, fecha, _, futuro) in enumerate(lote):
+                    futuro.set_result(self.servicio.respuesta(empleado_id, fecha, predicciones[i], proba[i]))
+            self.lotes += 1
+            self.solicitudes += len(lote)
+            if cerrar:
+                return
+
+    def estadisticas(self) -> dict:
+        return {
+            "lotes": self.lotes,
+            "solicitudes": self.solicitudes,
+            "tamano_medio_lote": self.solicitudes / self.lotes if self.lotes else 0.0,
+        }
+
+    def close(self):
+        self._cola.put(None)
+        self._hilo.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def atender(predictor, metodo: str, url: str) -> tuple[int, dict]:
+    """
+    Rutas de la API, independientes del servidor HTTP:
+      GET /health
+      GET /predict?empleado_id=...&fecha=AAAA-MM-DD[&tardanza_min=...]
+    `predictor` es un PredictionService o un MicroBatcher.
+    """
+    partes = urlsplit(url)
+    parametros = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+    if metodo != "GET":
+        return 405, {"error": f"Método no permitido: {metodo}"}
+    if partes.path == "/health":
+        return 200, {"estado": "ok"}
+    if partes.path == "/predict":
+        if not parametros.get("empleado_id"):
+            return 400, {"error": "Falta el parámetro empleado_id"}
+        try:
+            return 200, predictor.predict(parametros["empleado_id"], parametros.get("fecha"),
+                                          parametros.get("tardanza_min", 0.0))
+        except SolicitudInvalida as error:
+            return 400, {"error": str(error)}
+        except Exception as error:
+            # Fallo del servicio (modelo, lote...): respuesta JSON en vez de cortar la conexión
+            return 500, {"error": f"{type(error).__name__}: {error}"}
+    return 404, {"error": f"Ruta no encontrada: {partes.path}"}
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    predictor = None
+
+    def do_GET(self):
+        estado, cuerpo = atender(self.predictor, "GET", self.path)
+        datos = json.dumps(cuerpo).encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def crear_servidor(predictor, host: str = "127.0.0.1", puerto: int = 8000) -> ThreadingHTTPServer:
+    """Servidor HTTP con un hilo por conexión; el micro-batcher junta sus solicitudes."""
+    manejador = type("Manejador", (_Manejador,), {"predictor": predictor})
+    return ThreadingHTTPServer((host, puerto), manejador)
+
+
+class ClienteLocal:
+    """
+    Cliente HTTP de prueba: mismas rutas y respuestas que el servidor, pero
+    llamando a `atender` en el mismo proceso, sin sockets.
+
+        cliente = ClienteLocal(PredictionService())
+        estado, cuerpo = cliente.get("/predict?empleado_id=E001&fecha=2024-05-20")
+    """
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+
+    def get(self, url: str) -> tuple[int, dict]:
+        estado, cuerpo = atender(self.predictor, "GET", url)
+        # Ida y vuelta por JSON, como con un cliente real
+        return estado, json.loads(json.dumps(cuerpo))
+
+
+def medir_latencia(servicio: PredictionService, n: int = 2000) -> dict:
+    """Latencia de predicciones sueltas (sin micro-batching), en microsegundos."""
+    hoy = date.today()
+    empleados = servicio.vocabulario.empleados or [f"E{i:03d}" for i in range(200)]
+    tiempos = np.empty(n)
+    for i in range(n):
+        inicio = time.perf_counter()
+        servicio.predict(empleados[i % len(empleados)], hoy + timedelta(days=i % 365), i % 45)
+        tiempos[i] = time.perf_counter() - inicio
+    tiempos *= 1e6
+    return {"p50_us": float(np.percentile(tiempos, 50)), "p99_us": float(np.percentile(tiempos, 99)),
+            "media_us": float(tiempos.mean())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio de predicción por empleado")
+    parser.add_argument("--modelo", default=RUTA_MODELO)
+    parser.add_argument("--vocabulario", default=RUTA_VOCABULARIO)
+    parser.add_argument("--historial", default=RUTA_ESTADO,
+                        help="estado del historial (solo si el modelo usa sus features)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--medir", action="store_true", help="mide la latencia y termina")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    servicio = PredictionService(args.modelo, args.vocabulario, args.historial)
+    print(f"🌲 Modelo listo en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    if args.medir:
+        latencia = medir_latencia(servicio)
+        print(f"⏱️  Latencia por solicitud: p50 {latencia['p50_us']:.0f} µs | "
+              f"p99 {latencia['p99_us']:.0f} µs | media {latencia['media_us']:.0f} µs")
+    else:
+        with MicroBatcher(servicio) as lotes:
+            servidor = crear_servidor(lotes, args.host, args.puerto)
+            print(f"🚀 Escuchando en http://{args.host}:{args.puerto}/predict?empleado_id=...&fecha=AAAA-MM-DD")
+            try:
+                servidor.serve_forever()
+            except KeyboardInterrupt:
+                print("\n👋 Servidor detenido")
+            finally:
+                servidor.server_close()
+                print(f"📊 {lotes.estadisticas()}")
@@ -0,0 +1,316 @@
+# sharding.py
+
+import json
+import os
+import pickle
+import re
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+
+from inference import FlatForest
+from model_store import export_compact, ruta_compacta
+from encoding import matriz_features
+from scoring import MOTORES, RUTA_MODELO, join_original, load_model, load_original, model_fingerprint, model_stamp
+from storage import load_table, ruta_datos
+
+DIRECTORIO_PARTICIONES = "models/particiones"
+ARCHIVO_MANIFIESTO = "manifest.json"
+
+# Versión del manifest de particiones; cambia si cambia su estructura
+VERSION_PARTICIONES = 1
+
+# Partición por defecto: 8 cubos por hash de empleado_id
+CLAVE_PARTICION = "empleado_id"
+N_CUBOS = 8
+
+
+def _nombre_particion(valor) -> str:
+    """Valor de la clave -> nombre de carpeta ('Sede Lima' -> 'Sede_Lima')."""
+    return re.sub(r"[^\w.-]+", "_", str(valor)).strip("_") or "sin_valor"
+
+
+def asignar_particiones(df_original: pd.DataFrame, clave: str = CLAVE_PARTICION,
+                        n_cubos: int | None = N_CUBOS) -> np.ndarray:
+    """
+    Partición de cada fila a partir de la columna `clave` de los fichajes
+    originales (sede, departamento, empleado_id...).
+
+    Con n_cubos, la partición es un cubo del hash del valor ('cubo_03'); el
+    hash de pandas usa una semilla fija, así que un valor cae siempre en el
+    mismo cubo. Sin n_cubos, cada valor distinto es su propia partición.
+    """
+    if clave not in df_original.columns:
+        raise KeyError(f"La clave de partición '{clave}' no está en los datos "
+                       f"(columnas: {', '.join(df_original.columns)})")
+    valores = df_original[clave].fillna("").astype(str).to_numpy(dtype=object)
+    if n_cubos:
+        cubos = pd.util.hash_array(valores) % np.uint64(n_cubos)
+        nombres = np.array([f"cubo_{i:02d}" for i in range(n_cubos)], dtype=object)
+        return nombres[cubos.astype(np.int64)]
+    codigos, unicos = pd.factorize(valores)
+    return np.array([_nombre_particion(v) for v in unicos], dtype=object)[codigos]
+
+
+def _parametros_base() -> dict:
+    """Hiperparámetros del modelo global si existe (los eligió la búsqueda), o los por defecto."""
+    if os.path.exists(RUTA_MODELO):
+        with open(RUTA_MODELO, "rb") as f:
+            parametros = pickle.load(f).get_params()
+    else:
+        parametros = RandomForestClassifier(random_state=42, class_weight='balanced').get_params()
+    # Paralelismo entre particiones, no dentro de cada bosque
+    parametros.update(n_jobs=1, verbose=0)
+    return parametros
+
+
+def _entrenar_particion(nombre: str, X: pd.DataFrame, y: pd.Series, parametros: dict,
+                        directorio: str) -> dict:
+    """Ajusta y guarda el modelo de una partición (pickle + formato compacto)."""
+    inicio = time.perf_counter()
+    estratificar = y if y.value_counts().min() >= 2 else None
+    if len(X) >= 10:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=estratificar
+        )
+    else:
+        X_train, X_test, y_train, y_test = X, X.iloc[:0], y, y.iloc[:0]
+
+    modelo = RandomForestClassifier(**parametros).fit(X_train, y_train)
+    f1 = float(f1_score(y_test, modelo.predict(X_test), average="weighted")) if len(X_test) else None
+
+    ruta = os.path.join(directorio, nombre, "random_forest.pkl")
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, "wb") as f:
+        pickle.dump(modelo, f)
+    export_compact(modelo, ruta_compacta(ruta), fuente=model_fingerprint(ruta), sello_fuente=model_stamp(ruta))
+
+    return {
+        "modelo": os.path.relpath(ruta, directorio).replace(os.sep, "/"),
+        "huella": model_fingerprint(ruta),
+        "filas": len(X),
+        "clases": modelo.classes_.tolist(),
+        "f1_test": f1,
+        "segundos": round(time.perf_counter() - inicio, 2),
+        "entrenado": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _cargar_manifiesto(directorio: str) -> dict:
+    ruta = os.path.join(directorio, ARCHIVO_MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def train_sharded(input_path: str, original_csv_path: str = "data/raw/fichajes.csv",
+                  clave: str = CLAVE_PARTICION, n_cubos: int | None = N_CUBOS,
+                  particiones: list[str] | None = None, n_procesos: int = -1,
+                  directorio: str = DIRECTORIO_PARTICIONES) -> dict:
+    """
+    Entrena un Random Forest por partición, en paralelo (n_procesos, -1 = todos
+    los núcleos), y deja en `directorio`/manifest.json qué modelo corresponde
+    a cada partición.
+
+    Las filas de las features se cruzan por fila_id con los fichajes
+    originales, de donde sale la clave (igual que en scoring.score_dataset).
+    Los hiperparámetros son los del modelo global si existe.
+
+    Con `particiones` solo se reentrenan esas; el resto de modelos y sus
+    entradas del manifest no se tocan. La clave y los cubos tienen que ser
+    los del manifest existente.
+    """
+    print("🧩 Iniciando entrenamiento por particiones...")
+    df = load_table(input_path)
+    X = matriz_features(df)
+    y = df["ausencia"]
+
+    df_original = join_original(df, load_original(original_csv_path, [clave]))
+    por_fila = asignar_particiones(df_original, clave, n_cubos)
+
+    manifiesto = _cargar_manifiesto(directorio)
+    anteriores = set(manifiesto.get("particiones", {}))
+    if particiones:
+        if not manifiesto:
+            raise FileNotFoundError(f"No hay particiones entrenadas en {directorio}: entrena todas primero")
+        if (manifiesto["clave"], manifiesto["n_cubos"]) != (clave, n_cubos or None):
+            raise ValueError(f"Las particiones existentes usan clave='{manifiesto['clave']}' y "
+                             f"n_cubos={manifiesto['n_cubos']}; reentrena todas para cambiarlas")
+        if manifiesto["features"] != X.columns.tolist():
+            raise ValueError("Las features cambiaron desde el último entrenamiento: reentrena todas las particiones")
+        parametros = manifiesto["parametros"]
+    else:
+        parametros = _parametros_base()
+        manifiesto = {
+            "version": VERSION_PARTICIONES,
+            "clave": clave,
+            "n_cubos": n_cubos or None,
+            "features": X.columns.tolist(),
+            "parametros": parametros,
+            "particiones": {},
+        }
+
+    presentes = pd.unique(por_fila)
+    objetivo = sorted(particiones) if particiones else sorted(presentes)
+    desconocidas = sorted(set(objetivo) - set(presentes))
+    if desconocidas:
+        raise ValueError(f"Particiones sin filas en los datos: {', '.join(desconocidas)}")
+
+    codigos, nombres = pd.factorize(por_fila)
+    orden = np.argsort(codigos, kind="stable")
+    limites = np.searchsorted(codigos[orden], np.arange(len(nombres) + 1))
+    filas = {nombre: orden[limites[k]:limites[k + 1]] for k, nombre in enumerate(nombres)}
+    print(f"   Clave: {clave}" + (f" ({n_cubos} cubos por hash)" if n_cubos else "")
+          + f" | particiones a entrenar: {len(objetivo)} de {len(presentes)}")
+
+    # Las particiones más grandes primero, para repartir mejor entre procesos
+    objetivo.sort(key=lambda nombre: -len(filas[nombre]))
+    inicio = time.perf_counter()
+    resultados = Parallel(n_jobs=n_procesos)(
+        delayed(_entrenar_particion)(nombre, X.iloc[filas[nombre]], y.iloc[filas[nombre]],
+                                     parametros, directorio)
+        for nombre in objetivo
+    )
+
+    for nombre, entrada in zip(objetivo, resultados):
+        manifiesto["particiones"][nombre] = entrada
+        f1 = f"{entrada['f1_test']:.4f}" if entrada["f1_test"] is not None else "-"
+        print(f"   ✅ {nombre}: {entrada['filas']:,} filas, F1 test {f1}, {entrada['segundos']:.1f} s")
+    manifiesto["particiones"] = dict(sorted(manifiesto["particiones"].items()))
+    manifiesto["clases"] = sorted({c for p in manifiesto["particiones"].values() for c in p["clases"]})
+
+    # El manifest se escribe al final: si un entrenamiento falla, sigue apuntando a los modelos anteriores
+    with open(os.path.join(directorio, ARCHIVO_MANIFIESTO), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+
+    # En un entrenamiento completo, las particiones que ya no existen se borran
+    for nombre in sorted(anteriores - set(manifiesto["particiones"])):
+        shutil.rmtree(os.path.join(directorio, nombre), ignore_errors=True)
+
+    print(f"\n💾 {len(objetivo)} modelos guardados en {directorio}/ ({time.perf_counter() - inicio:.1f} s)")
+    return manifiesto
+
+
+class ShardedForest:
+    """
+    Predictor que reparte cada lote entre los modelos de las particiones.
+
+    predict_proba(X, particiones) agrupa las filas por partición, pasa cada
+    grupo por su modelo en una sola llamada y devuelve las probabilidades
+    en el orden original, con las columnas de `classes_` (la unión de las
+    clases de todas las particiones; una partición que no vio una clase le
+    da probabilidad 0). Las filas de particiones sin modelo van al
+    `respaldo` (el modelo global) si lo hay.
+    """
+
+    def __init__(self, manifiesto: dict, modelos: dict, respaldo=None):
+        self.manifiesto = manifiesto
+        self.modelos = modelos
+        self.respaldo = respaldo
+        self.classes_ = np.asarray(manifiesto["clases"])
+        self.feature_names_in_ = np.asarray(manifiesto["features"], dtype=object)
+        self._columnas = {nombre: np.searchsorted(self.classes_, np.asarray(modelo.classes_))
+                          for nombre, modelo in modelos.items()}
+
+    @property
+    def huella(self) -> str:
+        """Cambia si se reentrena cualquier partición."""
+        return json.dumps({n: p["huella"] for n, p in self.manifiesto["particiones"].items()}, sort_keys=True)
+
+    def particiones_de(self, df_original: pd.DataFrame) -> np.ndarray:
+        return asignar_particiones(df_original, self.manifiesto["clave"], self.manifiesto["n_cubos"])
+
+    def predict_proba(self, X: pd.DataFrame, particiones) -> np.ndarray:
+        particiones = np.asarray(particiones, dtype=object)
+        if len(particiones) != len(X):
+            raise ValueError(f"{len(X)} filas y {len(particiones)} particiones")
+        proba = np.zeros((len(X), len(self.classes_)), dtype=np.float64)
+        codigos, nombres = pd.factorize(particiones)
+        orden = np.argsort(codigos, kind="stable")
+        limites = np.searchsorted(codigos[orden], np.arange(len(nombres) + 1))
+        for k, nombre in enumerate(nombres):
+            filas = orden[limites[k]:limites[k + 1]]
+            modelo = self.modelos.get(nombre, self.respaldo)
+            if modelo is None:
+                raise KeyError(f"No hay modelo para la partición '{nombre}' ni modelo global de respaldo")
+            columnas = self._columnas.get(nombre)
+            if columnas is None:
+                columnas = np.searchsorted(self.classes_, np.asarray(modelo.classes_))
+            proba[np.ix_(filas, columnas)] = modelo.predict_proba(X.iloc[filas])
+        return proba
+
+    def predict(self, X: pd.DataFrame, particiones) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X, particiones), axis=1))
+
+    def ligar(self, particiones) -> "EnrutadoLigado":
+        """Versión con la interfaz de un modelo normal (predict_proba(X)) para scoring."""
+        return EnrutadoLigado(self, np.asarray(particiones, dtype=object))
+
+
+class EnrutadoLigado:
+    """
+    ShardedForest con la partición de cada fila ya fijada: la fila con
+    etiqueta i del índice de X usa particiones[i]. Así sirve también con
+    subconjuntos de X (p. ej. las filas pendientes de la puntuación incremental).
+    """
+
+    def __init__(self, enrutador: ShardedForest, particiones: np.ndarray):
+        self.enrutador = enrutador
+        self.particiones = particiones
+        self.classes_ = enrutador.classes_
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        return self.enrutador.predict_proba(X, self.particiones[X.index.to_numpy()])
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def load_sharded(directorio: str = DIRECTORIO_PARTICIONES, motor: str = "estandar",
+                 model_path: str = RUTA_MODELO) -> ShardedForest:
+    """
+    Carga el manifest y los modelos de todas las particiones (formato compacto
+    cuando está al día, ver scoring.load_model). El modelo global de
+    model_path, si existe, queda de respaldo para particiones sin modelo.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"motor debe ser uno de {MOTORES}")
+    manifiesto = _cargar_manifiesto(directorio)
+    if not manifiesto:
+        raise FileNotFoundError(f"No hay particiones entrenadas en {directorio} (ejecuta src/sharding.py)")
+    if manifiesto["version"] != VERSION_PARTICIONES:
+        raise ValueError(f"Manifest de particiones no soportado: versión {manifiesto['version']}")
+
+    modelos = {nombre: load_model(os.path.join(directorio, p["modelo"]))
+               for nombre, p in manifiesto["particiones"].items()}
+    respaldo = load_model(model_path) if os.path.exists(model_path) else None
+    if motor == "plano":
+        modelos = {nombre: FlatForest.from_model(m, n_hilos=-1) for nombre, m in modelos.items()}
+        respaldo = FlatForest.from_model(respaldo, n_hilos=-1) if respaldo is not None else None
+    return ShardedForest(manifiesto, modelos, respaldo)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Entrenamiento de un modelo por partición")
+    parser.add_argument("--clave", default=CLAVE_PARTICION,
+                        help="columna de los fichajes que define la partición (sede, departamento, empleado_id...)")
+    parser.add_argument("--cubos", type=int, default=N_CUBOS,
+                        help="cubos por hash de la clave (0 = una partición por valor)")
+    parser.add_argument("--particiones", nargs="+", default=None,
+                        help="reentrenar solo estas particiones (p. ej. cubo_03)")
+    parser.add_argument("--procesos", type=int, default=-1, help="procesos en paralelo (-1 = todos los núcleos)")
+    args = parser.parse_args()
+
+    os.makedirs(DIRECTORIO_PARTICIONES, exist_ok=True)
+    train_sharded(ruta_datos("empleados_features"), clave=args.clave, n_cubos=args.cubos or None,
+                  particiones=args.particiones, n_procesos=args.procesos)
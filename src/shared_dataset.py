@@ -0,0 +1,83 @@
+# shared_dataset.py
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# /dev/shm es memoria compartida en Linux; si no existe se usa el temporal normal
+DIRECTORIO_COMPARTIDO = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def compact_matrix_dtype(X: pd.DataFrame) -> np.dtype:
+    """
+    Tipo más pequeño que representa exactamente todas las columnas en una
+    sola matriz: entero si todos los valores son enteros (int8 para flags y
+    campos de calendario pequeños), si no float32 cuando es exacto.
+    """
+    valores = X.to_numpy(dtype=np.float64)
+    if np.isnan(valores).any():
+        return np.dtype(np.float32) if np.array_equal(
+            valores.astype(np.float32).astype(np.float64), valores, equal_nan=True
+        ) else np.dtype(np.float64)
+
+    if np.array_equal(valores, np.round(valores)):
+        minimo, maximo = valores.min(initial=0), valores.max(initial=0)
+        for tipo in (np.int8, np.int16, np.int32):
+            info = np.iinfo(tipo)
+            if info.min <= minimo and maximo <= info.max:
+                return np.dtype(tipo)
+    if np.array_equal(valores.astype(np.float32).astype(np.float64), valores):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+class SharedDataset:
+    """
+    Matriz de features y objetivo volcadas una vez a disco (en /dev/shm si
+    existe) y abiertas como memmap de solo lectura.
+
+    joblib pasa los np.memmap a los workers como referencia al archivo, así
+    que cada proceso de GridSearchCV / cross_val_score los abre sin copiarlos;
+    solo se copia el subconjunto de filas de cada fold al ajustar.
+
+        with SharedDataset(X_train, y_train) as datos:
+            grid.fit(datos.X, datos.y)
+    """
+
+    def __init__(self, X: pd.DataFrame, y: pd.Series, directorio: str | None = DIRECTORIO_COMPARTIDO):
+        self._X = X
+        self._y = y
+        self._directorio_base = directorio
+        self.columns = list(X.columns)
+        self.dtype = compact_matrix_dtype(X)
+        self.X = None
+        self.y = None
+        self._directorio = None
+
+    def __enter__(self):
+        self._directorio = tempfile.mkdtemp(prefix="dataset_", dir=self._directorio_base)
+        ruta_X = os.path.join(self._directorio, "X.npy")
+        ruta_y = os.path.join(self._directorio, "y.npy")
+
+        np.save(ruta_X, np.ascontiguousarray(self._X.to_numpy(dtype=self.dtype)))
+        y = self._y.to_numpy()
+        np.save(ruta_y, y.astype(np.int8) if np.issubdtype(y.dtype, np.integer)
+                and y.min() >= -128 and y.max() <= 127 else y)
+
+        self.X = np.load(ruta_X, mmap_mode="r")
+        self.y = np.load(ruta_y, mmap_mode="r")
+        self._X = self._y = None
+        return self
+
+    @property
+    def nbytes(self) -> int:
+        return self.X.nbytes + self.y.nbytes
+
+    def __exit__(self, *exc):
+        self.X = self.y = None
+        if self._directorio is not None:
+            shutil.rmtree(self._directorio, ignore_errors=True)
+        return False
@@ -0,0 +1,193 @@
+# storage.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+DIRECTORIO_PROCESADOS = "data/processed"
+
+# Formato de los archivos intermedios entre etapas (preprocess → features → ...)
+FORMATO_INTERMEDIO = "parquet" if PYARROW_DISPONIBLE else "csv"
+
+EXTENSIONES = (".parquet", ".feather", ".csv")
+
+# Columnas de texto con pocos valores distintos que se guardan como categoría
+COLUMNAS_CATEGORICAS = ("empleado_id", "nombre_empleado", "dia_semana", "mes_nombre")
+
+
+def ruta_datos(nombre: str, formato: str | None = None) -> str:
+    """Ruta de un archivo intermedio en data/processed con la extensión del formato."""
+    formato = formato or FORMATO_INTERMEDIO
+    return os.path.join(DIRECTORIO_PROCESADOS, f"{nombre}.{formato}")
+
+
+def _formato(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSIONES:
+        raise ValueError(f"Formato no soportado: '{path}' (usar {', '.join(EXTENSIONES)})")
+    formato = extension[1:]
+    if formato != "csv" and not PYARROW_DISPONIBLE:
+        raise ImportError(f"Se necesita pyarrow para leer/escribir '{path}' (pip install pyarrow)")
+    return formato
+
+
+def _resolver_ruta(path: str) -> str:
+    """
+    Si el archivo pedido no existe, usa el mismo nombre con otra extensión
+    (p. ej. un empleados_features.csv generado antes de pasar a Parquet).
+    """
+    if os.path.exists(path):
+        return path
+    base = os.path.splitext(path)[0]
+    for extension in EXTENSIONES:
+        alternativa = base + extension
+        if os.path.exists(alternativa) and (extension == ".csv" or PYARROW_DISPONIBLE):
+            print(f"   ℹ️  No existe {path}, usando {alternativa}")
+            return alternativa
+    raise FileNotFoundError(path)
+
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce los tipos sin perder información:
+    - enteros (y flotantes con valores enteros) al entero más pequeño que los contiene
+      (los flags 0/1 quedan en int8),
+    - flotantes a float32 cuando la conversión es exacta,
+    - columnas de texto de identificadores/nombres a categoría.
+    """
+    df = df.copy()
+    for col in df.columns:
+        serie = df[col]
+
+        if col in COLUMNAS_CATEGORICAS and serie.dtype == "object":
+            df[col] = serie.astype("category")
+            continue
+
+        if not pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            continue
+        if serie.isna().any():
+            continue
+
+        valores = serie.to_numpy()
+        if pd.api.types.is_float_dtype(serie) and not np.array_equal(valores, np.round(valores)):
+            como_float32 = valores.astype(np.float32)
+            if np.array_equal(como_float32.astype(valores.dtype), valores):
+                df[col] = como_float32
+            continue
+
+        if len(valores) == 0:
+            continue
+        minimo, maximo = valores.min(), valores.max()
+        for tipo in (np.int8, np.int16, np.int32, np.int64):
+            info = np.iinfo(tipo)
+            if info.min <= minimo and maximo <= info.max:
+                df[col] = valores.astype(tipo)
+                break
+    return df
+
+
+def _texto_homogeneo(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Arrow exige un solo tipo por columna; las columnas de objetos mezclados
+    (p. ej. horas con el 0 de fillna, o Timestamps con 0) se guardan como
+    texto, igual que quedarían al escribirlas en CSV.
+    """
+    mezcladas = [
+        col for col in df.columns
+        if df[col].dtype == "object"
+        and not df[col].map(lambda v: isinstance(v, str) or v is None or v != v).all()
+    ]
+    if not mezcladas:
+        return df
+    df = df.copy()
+    for col in mezcladas:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def save_table(df: pd.DataFrame, path: str, compactar: bool = True) -> None:
+    """Guarda un DataFrame según la extensión de `path` (.parquet, .feather o .csv)."""
+    formato = _formato(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    if formato != "csv":
+        df = _texto_homogeneo(df)
+        if compactar:
+            df = compact_dtypes(df)
+
+    if formato == "parquet":
+        df.to_parquet(path, index=False)
+    elif formato == "feather":
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+
+
+def load_table(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Carga un DataFrame guardado con save_table. `columns` limita la lectura a
+    esas columnas (en Parquet/Feather no se leen las demás del disco).
+    """
+    path = _resolver_ruta(path)
+    formato = _formato(path)
+
+    if formato == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    if formato == "feather":
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+class TableWriter:
+    """
+    Escritura incremental (por bloques) en CSV o Parquet con un esquema fijo,
+    el del primer bloque. Se usa como context manager.
+
+    No se compactan los tipos: el rango de un bloque no dice nada del
+    siguiente, así que un int8 elegido con el primero podría desbordar.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.formato = _formato(path)
+        if self.formato == "feather":
+            raise ValueError("Feather no admite escritura por bloques, usar .parquet o .csv")
+        self._esquema = None
+        self._escritor = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        return self
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._esquema is None:
+            self._esquema = df.dtypes
+        else:
+            df = df[self._esquema.index].astype(self._esquema)
+
+        if self.formato != "csv":
+            df = _texto_homogeneo(df)
+
+        if self.formato == "csv":
+            df.to_csv(self.path, mode="a", header=not os.path.exists(self.path), index=False)
+            return
+
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        if self._escritor is None:
+            self._escritor = pq.ParquetWriter(self.path, tabla.schema)
+        self._escritor.write_table(tabla.cast(self._escritor.schema))
+
+    def __exit__(self, *exc):
+        if self._escritor is not None:
+            self._escritor.close()
+        return False
@@ -0,0 +1,76 @@
+# streaming.py
+
+import argparse
+
+import pandas as pd
+
+from encoding import EmployeeVocabulary
+from ingestion import iter_fichajes, ruta_cuarentena
+from preprocess import clean_data
+from features import build_features
+from storage import TableWriter, ruta_datos
+
+TAMANO_BLOQUE = 100_000
+
+
+def process_in_chunks(csv_path: str, output_path: str, chunksize: int = TAMANO_BLOQUE,
+                      incluir_salida: bool = False) -> int:
+    """
+    Lee fichajes.csv por bloques de `chunksize` filas (validados con el
+    esquema de ingestion.py, con la misma cuarentena que load_and_clean_data),
+    pasa cada bloque por clean_data y build_features y lo añade al archivo de
+    features (.parquet o .csv).
+
+    Todas las features actuales dependen solo de la fila (fecha, horas), así
+    que procesar por bloques da el mismo resultado que el archivo completo
+    siempre que todos los bloques se escriban con el mismo esquema, que se
+    fija con el primer bloque. Las fechas ya llegan interpretadas con los
+    formatos declarados del esquema, iguales en todos los bloques.
+    El vocabulario de empleados es uno solo para todos los bloques (un
+    empleado tiene el mismo código en cualquier bloque) y se guarda al final.
+    La memoria máxima depende de `chunksize`, no del tamaño del archivo.
+    """
+    total_filas = 0
+    distribucion = pd.Series(dtype='int64')
+    resumen_horas = {}
+    vocabulario = EmployeeVocabulary.load()
+
+    with TableWriter(output_path) as escritor:
+        lector = iter_fichajes(csv_path, chunksize, cuarentena=ruta_cuarentena(csv_path))
+        for i, bloque in enumerate(lector, 1):
+            limpio = clean_data(bloque, incluir_salida=incluir_salida, verbose=False)
+            for clave, valor in limpio.attrs.get('resumen_horas', {}).items():
+                resumen_horas[clave] = resumen_horas.get(clave, 0) + valor
+            distribucion = distribucion.add(limpio['ausencia'].value_counts(), fill_value=0)
+
+            features = build_features(limpio, verbose=False, vocabulario=vocabulario)
+            escritor.write(features)
+
+            total_filas += len(features)
+            print(f"   Bloque {i}: {len(features):,} filas (acumulado: {total_filas:,})")
+
+    if vocabulario.modificado:
+        vocabulario.save()
+
+    print("\n📊 Distribución de clases:")
+    print(distribucion.astype(int).sort_index())
+
+    invalidas = {k: v for k, v in resumen_horas.items() if k.startswith('hora_') and v > 0}
+    if invalidas:
+        print("\n⚠️  Horas no interpretables (se tratarán como 0):")
+        for col, n in invalidas.items():
+            print(f"   - {col}: {n} filas")
+
+    return total_filas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocesado y features por bloques")
+    parser.add_argument("--input", default="data/raw/fichajes.csv")
+    parser.add_argument("--output", default=ruta_datos("empleados_features"))
+    parser.add_argument("--chunksize", type=int, default=TAMANO_BLOQUE)
+    args = parser.parse_args()
+
+    print(f"🚀 Procesando {args.input} en bloques de {args.chunksize:,} filas...")
+    filas = process_in_chunks(args.input, args.output, chunksize=args.chunksize)
+    print(f"\n✅ Archivo generado: {args.output} ({filas:,} filas)")
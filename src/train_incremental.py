@@ -0,0 +1,214 @@
+# train_incremental.py
+
+import json
+import os
+import pickle
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score
+from sklearn.utils.class_weight import compute_class_weight
+
+from encoding import matriz_features
+from model_store import export_compact, ruta_compacta
+from scoring import RUTA_MODELO, model_fingerprint, model_stamp
+from storage import load_table, ruta_datos
+
+# Árboles nuevos por actualización, como fracción del bosque actual: con el
+# tamaño fijo, cada actualización sustituye a la cuarta parte más antigua
+FRACCION_NUEVA = 0.25
+
+# Días más recientes que no se entrenan y sirven para evaluar la actualización
+VENTANA_EVALUACION_DIAS = 7
+
+# Filas nuevas mínimas para que merezca la pena ajustar árboles
+MIN_FILAS_NUEVAS = 100
+
+
+def ruta_entrenamiento(model_path: str = RUTA_MODELO) -> str:
+    """models/random_forest.pkl -> models/random_forest_entrenamiento.json (marca de agua y lotes)"""
+    return os.path.splitext(model_path)[0] + "_entrenamiento.json"
+
+
+def fecha_features(df: pd.DataFrame) -> pd.Series:
+    """Fecha de cada fila a partir de anio/mes/dia_mes de las features (NaT si la fecha era inválida)."""
+    return pd.to_datetime(pd.DataFrame({"year": df["anio"], "month": df["mes"], "day": df["dia_mes"]}),
+                          errors="coerce")
+
+
+def cargar_entrenamiento(model_path: str = RUTA_MODELO) -> dict:
+    ruta = ruta_entrenamiento(model_path)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def guardar_entrenamiento(model_path: str, registro: dict):
+    with open(ruta_entrenamiento(model_path), "w", encoding="utf-8") as f:
+        json.dump(registro, f, indent=2, ensure_ascii=False)
+
+
+def registrar_entrenamiento_completo(model_path: str, model, df: pd.DataFrame):
+    """
+    Tras un entrenamiento completo (train_model): la marca de agua es la
+    fecha más reciente de los datos y todo el bosque es un único lote.
+    """
+    guardar_entrenamiento(model_path, {
+        "marca_agua": fecha_features(df).max().date().isoformat(),
+        "lotes": [{"tipo": "completo", "hasta": fecha_features(df).max().date().isoformat(),
+                   "arboles": len(model.estimators_), "filas": len(df)}],
+        "actualizado": datetime.now().isoformat(timespec="seconds"),
+    })
+
+
+def _guardar_modelo(model, model_path: str) -> str:
+    """Guarda el pickle y su copia compacta; devuelve la huella del pickle."""
+    with open(model_path, "wb") as f:
+        pickle.dump(model, f)
+    huella = model_fingerprint(model_path)
+    export_compact(model, ruta_compacta(model_path), fuente=huella, sello_fuente=model_stamp(model_path))
+    return huella
+
+
+def train_incremental(input_path: str, model_path: str = RUTA_MODELO,
+                      arboles_nuevos: int | None = None, max_arboles: int | None = None,
+                      ventana_dias: int = VENTANA_EVALUACION_DIAS, desde: str | None = None,
+                      solo_si_mejora: bool = False) -> dict | None:
+    """
+    Actualiza el bosque con las filas posteriores a la marca de agua en lugar
+    de reentrenar todo el histórico:
+
+    1. Filas nuevas = fecha > marca de agua (o > `desde` si se indica). Los
+       últimos `ventana_dias` días se reservan para evaluar y no se entrenan.
+    2. Se añaden `arboles_nuevos` árboles (por defecto FRACCION_NUEVA del
+       bosque) ajustados solo con las filas nuevas (warm_start de
+       RandomForestClassifier; los árboles viejos no se tocan). Con
+       class_weight='balanced' los pesos salen de todo el histórico, no solo
+       de las filas nuevas, para que todos los árboles usen los mismos.
+    3. Envejecimiento: si el bosque supera `max_arboles` (por defecto, el
+       tamaño que tenía antes de la actualización) se quitan los árboles más
+       antiguos, lote a lote en el orden en que se añadieron.
+    4. Se compara el F1 ponderado del modelo anterior y del nuevo en la
+       ventana reservada. Con solo_si_mejora=True no se guarda si empeora.
+
+    La marca de agua pasa a ser la última fecha entrenada, así que los días
+    reservados hoy entran en la siguiente actualización. El registro queda
+    en models/random_forest_entrenamiento.json.
+    """
+    print("🔄 Iniciando actualización incremental del modelo...")
+    inicio = time.perf_counter()
+
+    registro = cargar_entrenamiento(model_path)
+    marca = desde or registro.get("marca_agua")
+    if marca is None:
+        raise ValueError(f"No hay marca de agua en {ruta_entrenamiento(model_path)}: "
+                         f"entrena con train_model.py o indica desde='AAAA-MM-DD'")
+    marca = pd.Timestamp(marca)
+
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    lotes = registro.get("lotes") or [{"tipo": "completo", "hasta": marca.date().isoformat(),
+                                       "arboles": len(model.estimators_), "filas": None}]
+
+    df = load_table(input_path)
+    fecha = fecha_features(df)
+    X = matriz_features(df)[list(model.feature_names_in_)]
+    y = df["ausencia"]
+
+    nuevas = (fecha > marca).to_numpy()
+    if not nuevas.any():
+        print(f"   ✅ Sin filas posteriores a la marca de agua ({marca.date()}): el modelo está al día")
+        return None
+    corte = fecha[nuevas].max() - pd.Timedelta(days=ventana_dias)
+    evaluacion = nuevas & (fecha > corte).to_numpy() if ventana_dias > 0 else np.zeros(len(df), dtype=bool)
+    entrenamiento = nuevas & ~evaluacion
+
+    print(f"   Marca de agua: {marca.date()} | filas nuevas: {nuevas.sum():,} "
+          f"(entrenamiento: {entrenamiento.sum():,}, evaluación: {evaluacion.sum():,} "
+          f"de los últimos {ventana_dias} días)")
+    if entrenamiento.sum() < MIN_FILAS_NUEVAS:
+        print(f"   ⏸️  Menos de {MIN_FILAS_NUEVAS} filas nuevas para entrenar: se espera a tener más")
+        return None
+
+    # Los árboles nuevos tienen que producir las mismas columnas de clases que los viejos
+    faltan = sorted(set(model.classes_.tolist()) - set(y[entrenamiento].unique().tolist()))
+    if faltan:
+        print(f"   ⏸️  Las filas nuevas no tienen ejemplos de las clases {faltan}: "
+              f"se espera a tener más datos o se reentrena completo")
+        return None
+
+    f1_anterior = (f1_score(y[evaluacion], model.predict(X[evaluacion]), average="weighted")
+                   if evaluacion.any() else None)
+
+    # Nuevos árboles solo con las filas nuevas
+    n_antes = len(model.estimators_)
+    arboles_nuevos = arboles_nuevos or max(1, round(n_antes * FRACCION_NUEVA))
+    max_arboles = max_arboles or n_antes
+    class_weight = model.class_weight
+    if class_weight == "balanced":
+        conocidas = y[fecha.notna().to_numpy() & ~evaluacion]
+        model.class_weight = dict(zip(model.classes_, compute_class_weight("balanced", classes=model.classes_,
+                                                                           y=conocidas)))
+    model.set_params(warm_start=True, n_estimators=n_antes + arboles_nuevos)
+    model.fit(X[entrenamiento], y[entrenamiento])
+    model.set_params(warm_start=False, class_weight=class_weight)
+    hasta = fecha[entrenamiento].max()
+    lotes.append({"tipo": "incremental", "hasta": hasta.date().isoformat(),
+                  "arboles": arboles_nuevos, "filas": int(entrenamiento.sum())})
+
+    # Envejecimiento: fuera los lotes más antiguos (el último lote no se recorta)
+    sobran = len(model.estimators_) - max_arboles
+    while sobran > 0 and len(lotes) > 1:
+        quitar = min(sobran, lotes[0]["arboles"])
+        model.estimators_ = model.estimators_[quitar:]
+        lotes[0]["arboles"] -= quitar
+        if lotes[0]["arboles"] == 0:
+            lotes.pop(0)
+        sobran -= quitar
+    model.n_estimators = len(model.estimators_)
+
+    f1_nuevo = (f1_score(y[evaluacion], model.predict(X[evaluacion]), average="weighted")
+                if evaluacion.any() else None)
+    if f1_anterior is not None:
+        print(f"   📈 F1 ponderado en la ventana reservada: {f1_anterior:.4f} → {f1_nuevo:.4f}")
+
+    resultado = {
+        "marca_agua": hasta.date().isoformat(),
+        "lotes": lotes,
+        "evaluacion": {"desde": (corte + pd.Timedelta(days=1)).date().isoformat() if evaluacion.any() else None,
+                       "filas": int(evaluacion.sum()), "f1_anterior": f1_anterior, "f1_nuevo": f1_nuevo},
+        "actualizado": datetime.now().isoformat(timespec="seconds"),
+    }
+    if solo_si_mejora and f1_anterior is not None and f1_nuevo < f1_anterior:
+        print("   ⚠️  El modelo actualizado empeora en la ventana reservada: no se guarda")
+        return resultado
+
+    # Huella del modelo escrito: el pipeline la usa para aceptarlo como salida de train_model
+    resultado["modelo"] = _guardar_modelo(model, model_path)
+    guardar_entrenamiento(model_path, resultado)
+    print(f"\n💾 Modelo actualizado en {model_path}: +{arboles_nuevos} árboles, "
+          f"{model.n_estimators} en total ({len(lotes)} lotes) | nueva marca de agua: {hasta.date()} "
+          f"({time.perf_counter() - inicio:.1f} s)")
+    return resultado
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Actualización incremental del Random Forest con las filas nuevas")
+    parser.add_argument("--arboles", type=int, default=None,
+                        help=f"árboles nuevos a ajustar (por defecto {FRACCION_NUEVA:.0%} del bosque)")
+    parser.add_argument("--max-arboles", type=int, default=None,
+                        help="tamaño máximo del bosque; se quitan los árboles más antiguos (por defecto, el actual)")
+    parser.add_argument("--ventana", type=int, default=VENTANA_EVALUACION_DIAS,
+                        help="días más recientes reservados para evaluar (0 = sin evaluación)")
+    parser.add_argument("--desde", default=None, help="marca de agua manual 'AAAA-MM-DD' (si no hay registro)")
+    parser.add_argument("--solo-si-mejora", action="store_true",
+                        help="no guardar si el F1 en la ventana reservada empeora")
+    args = parser.parse_args()
+    train_incremental(ruta_datos("empleados_features"), arboles_nuevos=args.arboles,
+                      max_arboles=args.max_arboles, ventana_dias=args.ventana, desde=args.desde,
+                      solo_si_mejora=args.solo_si_mejora)
@@ -1,16 +1,58 @@
+import os
 import pandas as pd
 import pickle
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import numpy as np
 
-def train_model(input_path: str):
+from encoding import matriz_features
+from instrumentation import registrar_filas, stage
+from model_store import export_compact, ruta_compacta
+from scoring import RUTA_MODELO, model_fingerprint, model_stamp
+from search import SuccessiveHalvingSearch
+from shared_dataset import SharedDataset
+from train_incremental import registrar_entrenamiento_completo
+from storage import load_table, ruta_datos
+
+# ✅ Parámetros optimizados para clasificación multiclase
+PARAM_GRID = {
+    "n_estimators": [200, 300, 500],
+    "max_depth": [15, 20, 30, None],
+    "min_samples_split": [2, 5, 10],
+    "min_samples_leaf": [1, 2, 4],
+    "criterion": ["gini", "entropy"],
+    "max_features": ["sqrt", "log2", None]
+}
+
+# Presupuesto por defecto de la búsqueda por halving (la rejilla completa son 648 x 5 = 3240 ajustes)
+MAX_AJUSTES_HALVING = 600
+
+@stage("train_model")
+def train_model(input_path: str, busqueda: str = "halving", max_fits: int | None = MAX_AJUSTES_HALVING,
+                max_seconds: float | None = None, recurso: str = "n_samples",
+                memoria_compartida: bool = False, model_path: str = RUTA_MODELO):
+    """
+    Entrena el Random Forest con búsqueda de hiperparámetros.
+
+    busqueda="halving" (por defecto) usa successive halving con presupuesto
+    de ajustes (max_fits) y/o de tiempo (max_seconds); recurso indica qué se
+    escala por ronda ("n_samples" o "n_estimators"). busqueda="grid" es la
+    búsqueda exhaustiva con GridSearchCV.
+
+    memoria_compartida=True vuelca X_train/y_train una sola vez a un memmap
+    de tipo compacto (ver shared_dataset.py) que los workers de la búsqueda
+    abren sin copiarlo; el modelo final se reajusta sobre el DataFrame.
+
+    El modelo se guarda en model_path, junto con su copia compacta.
+    """
     # Cargar los datos
-    df = pd.read_csv(input_path)
+    df = load_table(input_path)
+    registrar_filas(len(df))
 
     # Separar características (X) y objetivo (y)
-    X = df.drop(columns=["ausencia"])
+    X = matriz_features(df)
     y = df["ausencia"]
     
     # ✅ Verificar que tenemos 3 clases
@@ -38,34 +80,53 @@ def train_model(input_path: str):
     # Definir el modelo base
     model = RandomForestClassifier(random_state=42, class_weight='balanced')
     
-    # ✅ Parámetros optimizados para clasificación multiclase
-    param_grid = {
-        "n_estimators": [200, 300, 500],
-        "max_depth": [15, 20, 30, None],
-        "min_samples_split": [2, 5, 10],
-        "min_samples_leaf": [1, 2, 4],
-        "criterion": ["gini", "entropy"],
-        "max_features": ["sqrt", "log2", None]
-    }
+    param_grid = PARAM_GRID
 
     print("\n🔍 Iniciando búsqueda de hiperparámetros...")
     print("   Esto puede tardar varios minutos...")
 
-    # Búsqueda con validación cruzada estratificada
-    grid = GridSearchCV(
-        estimator=model,
-        param_grid=param_grid,
-        cv=5,  # 5 divisiones
-        scoring="f1_weighted",  # F1 ponderado para clases desbalanceadas
-        n_jobs=-1,
-        verbose=2
-    )
+    if busqueda == "halving":
+        # Successive halving: todas las combinaciones con pocos datos, solo las mejores con todos
+        grid = SuccessiveHalvingSearch(
+            estimator=model,
+            param_grid=param_grid,
+            resource=recurso,
+            max_fits=max_fits,
+            max_seconds=max_seconds,
+            cv=5,
+            scoring="f1_weighted",
+            n_jobs=-1,
+            refit=not memoria_compartida
+        )
+    elif busqueda == "grid":
+        # Búsqueda con validación cruzada estratificada
+        grid = GridSearchCV(
+            estimator=model,
+            param_grid=param_grid,
+            cv=5,  # 5 divisiones
+            scoring="f1_weighted",  # F1 ponderado para clases desbalanceadas
+            n_jobs=-1,
+            verbose=2,
+            refit=not memoria_compartida
+        )
+    else:
+        raise ValueError(f"Búsqueda desconocida: '{busqueda}' (usar 'halving' o 'grid')")
 
     # Entrenar todas las combinaciones
-    grid.fit(X_train, y_train)
+    if memoria_compartida:
+        with SharedDataset(X_train, y_train) as datos:
+            print(f"   Dataset compartido: {datos.X.shape[0]:,} x {datos.X.shape[1]} "
+                  f"({datos.dtype}, {datos.nbytes / 1e6:.1f} MB)")
+            grid.fit(datos.X, datos.y)
+
+        # Reajuste del mejor modelo sobre el DataFrame (conserva los nombres de las features)
+        best_model = clone(model).set_params(**grid.best_params_)
+        best_model.fit(X_train, y_train)
+    else:
+        grid.fit(X_train, y_train)
 
-    # Obtener el mejor modelo
-    best_model = grid.best_estimator_
+        # Obtener el mejor modelo
+        best_model = grid.best_estimator_
 
     # Evaluar en el conjunto de prueba
     y_pred = best_model.predict(X_test)
@@ -75,7 +136,8 @@ def train_model(input_path: str):
     for param, value in grid.best_params_.items():
         print(f"   {param}: {value}")
     
-    print(f"\n🎯 Precisión en test: {acc:.4f}")
+    print(f"\n📈 F1 ponderado (validación cruzada): {grid.best_score_:.4f}")
+    print(f"🎯 Precisión en test: {acc:.4f}")
     
     # ✅ Reporte detallado de clasificación
     print("\n📊 Reporte de Clasificación:")
@@ -104,10 +166,19 @@ def train_model(input_path: str):
         print(f"{row['feature']:20s}: {row['importance']:.4f}")
 
     # Guardar el mejor modelo
-    with open("models/random_forest.pkl", "wb") as f:
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    with open(model_path, "wb") as f:
         pickle.dump(best_model, f)
 
-    print("\n💾 Mejor modelo guardado en models/random_forest.pkl")
+    print(f"\n💾 Mejor modelo guardado en {model_path}")
+
+    # Copia en formato compacto (memmap) para que la inferencia cargue al instante
+    export_compact(best_model, ruta_compacta(model_path),
+                   fuente=model_fingerprint(model_path), sello_fuente=model_stamp(model_path))
+    print(f"💾 Modelo compacto guardado en {ruta_compacta(model_path)}/")
+
+    # Marca de agua para las actualizaciones incrementales (train_incremental.py)
+    registrar_entrenamiento_completo(model_path, best_model, df)
     
     # ✅ Verificar que el modelo predice las 3 clases
     clases_predichas = np.unique(y_pred)
@@ -121,6 +192,20 @@ def train_model(input_path: str):
         print("   - Necesitas más datos de la clase minoritaria")
 
 if __name__ == "__main__":
-    import os
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Entrenamiento del modelo de ausencias")
+    parser.add_argument("--busqueda", choices=["halving", "grid"], default="halving")
+    parser.add_argument("--max-fits", type=int, default=MAX_AJUSTES_HALVING,
+                        help="presupuesto de ajustes para halving (0 = sin límite)")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="presupuesto de tiempo para halving")
+    parser.add_argument("--recurso", choices=["n_samples", "n_estimators"], default="n_samples")
+    parser.add_argument("--memoria-compartida", action="store_true",
+                        help="compartir X_train entre los workers con un memmap en lugar de copiarlo")
+    args = parser.parse_args()
+
     os.makedirs("models", exist_ok=True)
-    train_model("data/processed/empleados_features.csv")
\ No newline at end of file
+    train_model(ruta_datos("empleados_features"), busqueda=args.busqueda,
+                max_fits=args.max_fits or None, max_seconds=args.max_seconds, recurso=args.recurso,
+                memoria_compartida=args.memoria_compartida)
\ No newline at end of file